@@ -0,0 +1,82 @@
+# ble-reconnect.py
+# Reconnect time after a link drop, measured on the host against
+# fake_hw.FakeBLERadio with the firmware's own ble_link.Link driving it.
+#
+#   python3 ble-reconnect.py
+#   python3 ble-reconnect.py --trials 500 --asleep 1 30 600
+#
+# Each trial connects, drops the link, and leaves the host away for
+# --asleep seconds (a laptop lid closed, say).  It then times from the
+# moment the host scans again to the moment the firmware sees the link up.
+# Host scan settings are Android's documented scan modes (window / interval):
+# desktop stacks reconnecting to a bonded device behave like "balanced" or
+# better.  Each strategy is one fixed advertising interval; the firmware
+# uses 100 ms (ble_link.ADVERT_INTERVAL).  The adverts column is what the
+# radio spent getting there.  Run enough trials: the medians move by a
+# scan step or two between runs of 200.
+
+import argparse
+
+import ble_link
+from chord_sim import FakeClock, percentile
+from fake_hw import FakeBLERadio
+
+HOSTS = {
+    "low-latency": (4.096, 4.096),
+    "balanced":    (1.024, 4.096),
+    "low-power":   (0.512, 5.120),
+}
+
+STRATEGIES = {
+    "20ms":    dict(interval=0.02),
+    "100ms":   dict(interval=0.1),
+    "152.5ms": dict(interval=0.1525),
+}
+
+LINK_POLL = 0.05   # c5k-left.py's link_task period
+
+
+def trial(host, strategy, asleep, seed):
+    window, interval = HOSTS[host]
+    clock = FakeClock()
+    radio = FakeBLERadio(clock.monotonic, scan_interval=interval, window=window,
+                         seed=seed)
+    link = ble_link.Link(radio, None, now=clock.t, **STRATEGIES[strategy])
+    while not link.connected:
+        link.poll(clock.t)
+        clock.t += LINK_POLL
+    # drop at a random point in the host's scan cycle
+    clock.t += radio.rng.uniform(0, interval)
+    radio.drop(host_delay=asleep)
+    link.poll(clock.t)
+    adverts = radio.adverts
+    while not link.connected:
+        clock.t += LINK_POLL
+        link.poll(clock.t)
+    return link.last - asleep, radio.adverts - adverts
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--trials", type=int, default=1000)
+    ap.add_argument("--asleep", type=float, nargs="+", default=[2.0, 120.0],
+                    help="seconds the host is away before scanning again")
+    args = ap.parse_args()
+
+    print(f"{'host':12} {'asleep':>7} {'strategy':12} {'median':>8} {'p95':>8}"
+          f" {'adverts':>8}")
+    for host in HOSTS:
+        for asleep in args.asleep:
+            for strategy in STRATEGIES:
+                times, adverts = [], 0
+                for seed in range(args.trials):
+                    t, n = trial(host, strategy, asleep, seed)
+                    times.append(t)
+                    adverts += n
+                print(f"{host:12} {asleep:6.0f}s {strategy:12}"
+                      f" {percentile(times, 50):7.2f}s {percentile(times, 95):7.2f}s"
+                      f" {adverts / args.trials:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
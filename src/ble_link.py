@@ -0,0 +1,79 @@
+# ble_link.py
+# BLE connection lifecycle.  Instead of stopping when the host goes away,
+# the firmware keeps polling the link: on a drop it starts advertising again
+# so a bonded host that scans (a laptop waking up) finds it.  Chord state
+# lives in the engine and isn't touched, so a locked layer or an armed
+# modifier survives the reconnect.
+#
+# Works with anything shaped like adafruit_ble.BLERadio: connected,
+# advertising, start_advertising(advert, interval=...), stop_advertising().
+# fake_hw.FakeBLERadio is the host-side stand-in ble-reconnect.py uses.
+
+# One interval throughout.  Against duty-cycled host scans a faster burst
+# after the drop didn't reconnect measurably sooner (ble-reconnect.py,
+# 1000 trials), and it sent several times the adverts.
+ADVERT_INTERVAL = 0.1    # adafruit_ble's default
+
+DOWN = 0   # not advertising yet
+ADV  = 1
+UP   = 2
+
+
+class Link:
+    def __init__(self, ble, advert, now=0.0, interval=ADVERT_INTERVAL):
+        self.ble      = ble
+        self.advert   = advert
+        self.interval = interval
+        self.state   = DOWN
+        self.since   = now     # entered the current state
+        self.down_at = now     # link lost (or boot)
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.connects = 0
+        self.drops    = 0
+        self.last     = 0.0    # seconds from drop/boot to connected
+        self.worst    = 0.0
+        self.total    = 0.0
+
+    @property
+    def connected(self):
+        return self.state == UP
+
+    def poll(self, now):
+        """Advance the lifecycle.  Returns True on the pass the link comes
+        up (time to resume output)."""
+        if self.ble.connected:
+            if self.state == UP:
+                return False
+            if self.ble.advertising:
+                self.ble.stop_advertising()
+            dt = now - self.down_at
+            self.connects += 1
+            self.last   = dt
+            self.total += dt
+            if dt > self.worst:
+                self.worst = dt
+            self.state = UP
+            self.since = now
+            return True
+        if self.state == UP:
+            self.drops  += 1
+            self.down_at = now
+            self._advertise(now)
+        elif self.state == DOWN:
+            self._advertise(now)
+        return False
+
+    def _advertise(self, now):
+        ble = self.ble
+        if ble.advertising:
+            ble.stop_advertising()
+        ble.start_advertising(self.advert, interval=self.interval)
+        self.state = ADV
+        self.since = now
+
+    def dump(self, out=print):
+        avg = self.total / self.connects if self.connects else 0.0
+        out(f"ble: {self.connects} connects, {self.drops} drops, connect time "
+            f"last={self.last:.2f} avg={avg:.2f} max={self.worst:.2f} s")
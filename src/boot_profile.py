@@ -0,0 +1,42 @@
+# boot_profile.py
+# Boot phase timer.  c5k-left.py marks the end of each setup phase and dumps
+# the table once the first chord can be typed (link up, scan loop running):
+#
+#   boot:   38 ms    +1.2 kB  imports
+#   boot:    6 ms    +0.9 kB  chord tables
+#   ...
+#   boot: 1870 ms total to first usable chord
+#
+# The clock is supervisor.ticks_ms() on the board, started at the top of
+# code.py.  It counts from about 2**29 - 65000 and wraps about 65 s after
+# power-on, so every interval goes through ticks_diff rather than a plain
+# subtraction.
+
+from adafruit_ticks import ticks_diff
+
+
+class BootProfile:
+    def __init__(self, clock_ms, mem_free=None):
+        self.clock_ms = clock_ms
+        self.mem_free = mem_free
+        self.start    = clock_ms()
+        self.last     = self.start
+        self.free     = mem_free() if mem_free else 0
+        self.phases   = []       # (name, ms, heap used since the last mark)
+
+    def mark(self, name):
+        """End the current phase under `name`."""
+        now = self.clock_ms()
+        used = 0
+        if self.mem_free:
+            free = self.mem_free()
+            used = self.free - free
+            self.free = free
+        self.phases.append((name, ticks_diff(now, self.last), used))
+        self.last = now
+
+    def dump(self, out=print):
+        for name, ms, used in self.phases:
+            mem = f" {used / 1024:+6.1f} kB" if self.mem_free else ""
+            out(f"boot: {ms:5d} ms{mem}  {name}")
+        out(f"boot: {ticks_diff(self.last, self.start):5d} ms total to first usable chord")
@@ -1,277 +1,381 @@
+import gc
+import supervisor
+from boot_profile import BootProfile
+boot = BootProfile(supervisor.ticks_ms, gc.mem_free)
+
 import board
+import microcontroller
 import busio
 import digitalio
+import alarm
+import asyncio
+import sys
 import time
-from adafruit_mcp230xx.mcp23008 import MCP23008
 import adafruit_ble
 from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
 from adafruit_ble.services.standard.hid import HIDService
 from adafruit_hid.keyboard import Keyboard
-from adafruit_hid.mouse import Mouse
-from adafruit_hid.keycode import Keycode
-from adafruit_hid.consumer_control import ConsumerControl
-from adafruit_hid.consumer_control_code import ConsumerControlCode
-import chords_config
-
-DEBUG_L6 = True
+boot.mark("imports")
+
+# Chord tables come from chords.bin when it is present and current (see
+# chord-pack.py), else chords_config.py is compiled.
+import chord_tables
+boot.mark(f"chord tables ({chord_tables.SOURCE})")
+import chord_engine
+from chord_engine import ChordEngine
+from hid_output import HIDQueue
+from hid_transport import Router, Transport
+import keyscan
+from latency_stats import Stats
+from power import ScanScheduler
+from ble_link import Link
+from stagger import StaggerModel
+from keytrace import TraceRecorder
+from gc_sched import GCScheduler
+import word_dict
+boot.mark("firmware modules")
+
+# Debug prints block the scan loop while USB/serial drains; the histograms
+# (send "s" over serial to dump, "r" to reset) are the cheap way to look.
+DEBUG_L6 = False
+
+# Controller pin wired to the MCP23008 INT pad (e.g. board.P0_06).  With it
+# set, keys are only read over I2C when INT fires; None polls every pass.
+MCP_INT_PIN   = None
+FAST_SCAN     = True    # one GPIO register read per pass instead of five pin reads
+I2C_FREQUENCY = 400000  # nRF52840 TWIM maximum; busio takes more but runs slower
+SCAN_INTERVAL = 0.01    # main-loop period when polling
+IRQ_INTERVAL  = 0.002   # main-loop period when INT-driven (no I2C while idle)
+LIGHT_SLEEP   = True    # sleep when idle and wake on INT (needs MCP_INT_PIN)
+LINK_POLL     = 0.05    # BLE link check period (reconnect latency floor)
+# Send over USB instead of BLE while a host has the board enumerated (1 ms
+# polls instead of a connection event per report), back to BLE when the
+# cable comes out (hid_transport.py).
+USB_HID       = True
+MCP_SETTLE_MAX  = 0.5   # give up waiting for the keypad to power up after this
+MCP_SETTLE_POLL = 0.002
+# Split keyboard: a right-hand keypad on a second MCP23008 (A0 high, 0x21) on
+# the same I2C bus.  Chords may then use keys 5..9 too (split_layer_maps in
+# chords_config.py).  The right half is polled, so this turns off INT-driven
+# scanning and light sleep.
+SPLIT = False
+# Learn per-chord stabilize windows from how this typist's fingers land
+# (stagger.py), kept in nvm across resets.  Saved at most every STAGGER_SAVE s
+# (and before light sleep), only when a window has moved: nvm is flash.
+# This shortens settle time; chords sent on release go out no sooner.
+ADAPTIVE_STABLE = True
+STAGGER_SAVE    = 4 * 3600   # worst case ~3 writes a typing day: years of flash
+# Send a chord as soon as it settles when no bigger chord on its layer
+# contains it (chord_tables.terminal), rather than on the first release.
+EAGER_COMMIT = True
+# Collect garbage in idle gaps between chords (gc_sched.py) rather than
+# whenever the heap happens to fill up mid-chord.
+GC_SCHEDULE = True
+# 128x32 SSD1306 status panel (status_display.py) at 0x3C on the keypad's
+# I2C bus: layer, armed modifier, link and battery.  It is only written
+# between chords, a chunk at a time.  BATTERY_PIN is an analog pin reading
+# the cell through a BATTERY_DIVIDER divider, or None to leave it off.
+DISPLAY         = False
+DISPLAY_POLL    = 0.05
+BATTERY_PIN     = None
+BATTERY_DIVIDER = 2.0
+BATTERY_POLL    = 60
+# Keystroke trace (keytrace.py) for chasing eaten or wrong chords: every key
+# edge and chord sent is appended to TRACE_FILE while the keys are idle.
+# Needs CIRCUITPY writable from code (storage.remount in boot.py); read it
+# back with trace-analyze.py.
+TRACE      = False
+TRACE_FILE = "/trace.bin"
+
+# Word-layer dictionary (word_dict.py), first file found wins.  Pack the .txt
+# on a desktop with word-dict.py; a .txt is packed at boot, slower and
+# needing the RAM for it.  With neither file the word layer is left out.
+WORD_FILES = ("/words.bin", "/words.txt")
 
 # ─── Hardware setup ────────────────────────────────────────────────────
 vcc = digitalio.DigitalInOut(board.VCC_OFF)
 vcc.direction = digitalio.Direction.OUTPUT
 vcc.value = True
-time.sleep(0.5)
 
-i2c = busio.I2C(scl=board.SCL, sda=board.SDA, frequency=400000)
-mcp = MCP23008(i2c)
-pins = [mcp.get_pin(i) for i in range(5)]
-for p in pins:
-    p.direction = digitalio.Direction.INPUT
-    p.pull = digitalio.Pull.UP
-
-# ─── BLE HID setup ────────────────────────────────────────────────────
+def wait_for_mcp():
+    # Poll until the expander answers rather than sleeping a fixed settle
+    # time.  Until the keypad is powered its pull-ups are missing and
+    # busio.I2C refuses to start, so that counts as "not yet" too.
+    deadline = time.monotonic() + MCP_SETTLE_MAX
+    while True:
+        try:
+            bus = busio.I2C(scl=board.SCL, sda=board.SDA,
+                            frequency=I2C_FREQUENCY)
+        except RuntimeError:
+            bus = None
+        if bus:
+            while not bus.try_lock():
+                pass
+            try:
+                found = keyscan.MCP_ADDRESS in bus.scan()
+            finally:
+                bus.unlock()
+            bus.deinit()
+            if found:
+                return True
+        if time.monotonic() >= deadline:
+            print("MCP23008 not answering; carrying on")
+            return False
+        time.sleep(MCP_SETTLE_POLL)
+
+def open_int_pin():
+    pin = digitalio.DigitalInOut(MCP_INT_PIN)
+    pin.direction = digitalio.Direction.INPUT
+    pin.pull = digitalio.Pull.UP
+    return pin
+
+wait_for_mcp()
+boot.mark("keypad power")
+i2c = busio.I2C(scl=board.SCL, sda=board.SDA, frequency=I2C_FREQUENCY)
+scanner = None
+loop_interval = SCAN_INTERVAL
+try:
+    if MCP_INT_PIN is not None:
+        scanner = keyscan.InterruptScanner(i2c, open_int_pin())
+        loop_interval = IRQ_INTERVAL
+    elif FAST_SCAN:
+        scanner = keyscan.RegisterScanner(i2c)
+except OSError as e:
+    print(f"register scan unavailable ({e}), using pin reads")
+
+if scanner is None:
+    from adafruit_mcp230xx.mcp23008 import MCP23008
+    mcp = MCP23008(i2c)
+    pins = [mcp.get_pin(i) for i in range(5)]
+    for p in pins:
+        p.direction = digitalio.Direction.INPUT
+        p.pull = digitalio.Pull.UP
+    scanner = keyscan.PinScanner(pins)
+
+if SPLIT:
+    chord_tables.split()
+    scanner = keyscan.SplitScanner(
+        scanner, keyscan.RegisterScanner(i2c, keyscan.RIGHT_MCP_ADDRESS),
+        clock=time.monotonic_ns)
+    loop_interval = SCAN_INTERVAL
+boot.mark("i2c + scanner")
+
+display = None
+battery = None
+if DISPLAY:
+    from status_display import StatusDisplay, battery_percent
+    try:
+        display = StatusDisplay(i2c)
+    except OSError as e:
+        print(f"status display not answering ({e}); carrying on without")
+    if display and BATTERY_PIN is not None:
+        import analogio
+        battery = analogio.AnalogIn(BATTERY_PIN)
+    boot.mark("display")
+
+def battery_level():
+    volts = battery.value / 65535 * battery.reference_voltage * BATTERY_DIVIDER
+    return battery_percent(volts)
+
+# ─── HID setup ────────────────────────────────────────────────────────
 ble = adafruit_ble.BLERadio()
 hid_svc = HIDService()
 advert = ProvideServicesAdvertisement(hid_svc)
 keyboard = Keyboard(hid_svc.devices)
-mouse = Mouse(hid_svc.devices)
-cc = ConsumerControl(hid_svc.devices)
-ble.start_advertising(advert)
-while not ble.connected:
-    pass
-ble.stop_advertising()
-
-# ─── Timing constants ────────────────────────────────────────────────
-STABLE_MS_ALPHA = 0.03   # 30 ms for layer-1 (alpha)
-STABLE_MS_OTHER = 0.02   # 20 ms for layers 2/3
-DEBOUNCE_UP      = 0.05  # pause after send
-TAP_WINDOW       = 0.5   # thumb-tap window
-MIN_TAP_INT      = 0.1   # thumb debounce
-L5_REPEAT_MS     = 0.1   # repeat interval for held moves
-NAV_REPEAT_MS    = 0.2   # min seconds between repeats on layer-5 nav
-LAYER_LOCK_COOLDOWN = 0.1  # minimum seconds between layer‐lock taps
-SCROLL_REPEAT_MS  = 0.15   # or whatever interval you like
-THUMB_HOLD_TO_LOCK = 0.12   # seconds you must hold thumb alone to trigger layer-lock
-
-# ─── State variables ────────────────────────────────────────────────
-layer            = 1     # layers 1..5
-thumb_taps       = 0
-tap_in_prog      = False
-last_tap_time    = 0.0
-last_combo       = ()
-pending_combo    = None
-sent_release     = False
-skip_scag        = False
-scag_skip_combo  = None
-modifier_armed   = False
-held_modifier    = None
-last_time        = time.monotonic()
-held_combo       = ()
-last_repeat      = 0.0
-accel_active     = False
-held_nav_combo   = ()
-last_nav         = 0.0
-last_pending_combo = None
-last_layer_change = 0.0
-held_scroll_combo = ()
-last_scroll       = 0.0
-last_thumb_rise    = 0.0
-thumb_locked       = False  # only lock once per hold
-
-# ─── Mouse chords for layer-7 (no thumb) ─────────────────────────────
-MOVE_DELTA = 5
-ACCEL_MULTIPLIER = 2
-ACCEL_CHORD = (1, 2, 3)  # three-finger accel combo
-
-# ─── Core chord logic with layers 1–5 ──────────────────────────────
-
-def check_chords():
-    global layer, thumb_taps, last_tap_time
-    global last_combo, pending_combo, sent_release, skip_scag, scag_skip_combo
-    global modifier_armed, held_modifier, last_time, last_repeat, accel_active
-    global held_nav_combo, last_nav, held_combo, last_pending_combo
-    global held_scroll_combo, last_scroll
-
-    now     = time.monotonic()
-    pressed = tuple(not p.value for p in pins)
-    combo   = tuple(i for i, down in enumerate(pressed) if down)
-
-    # ─── A) Pure-thumb release ⇒ layer-lock (always first) ─────────────
-    if last_combo == (4,) and combo == ():
-        # count the tap
-        if now - last_tap_time < TAP_WINDOW:
-            thumb_taps += 1
-        else:
-            thumb_taps = 1
-        last_tap_time = now
-
-        # clamp & switch layer
-        layer = min(thumb_taps, 7)
-        print(f"→ locked to layer-{layer}")
-
-        # reset all combo state
-        pending_combo     = None
-        sent_release      = False
-        skip_scag         = False
-        modifier_armed    = False
-        held_modifier     = None
-        scag_skip_combo   = None
-        held_scroll_combo = ()
-
-        # clear last_combo so it won’t retrigger
-        last_combo = combo   # combo is ()
-        return
 
-    # ─── B) Stabilize into pending_combo ─────────────────────────────────
-    if combo != last_combo:
-        last_time = now
-        if last_combo == () and combo != ():
-            pending_combo  = None
-            sent_release   = False
-
-    ms = STABLE_MS_ALPHA if layer == 1 else STABLE_MS_OTHER
-    if combo and (now - last_time) >= ms and combo != pending_combo:
-        pending_combo = combo
-
-    pending_changed    = (pending_combo != last_pending_combo)
-    last_pending_combo = pending_combo
-
-    # ─── C) Fetch this layer’s map ──────────────────────────────────────
-    lm = chords_config.layer_maps[layer]
-
-    # ───  macOS media keys ─────────────────────────────────
-    if layer == 6:
-        if combo and combo != last_combo and combo in lm:
-            code = lm[combo]
-            print(f"[L6] sending {code!r} for {combo}")
-            cc.send(code)
-            sent_release = True
-            time.sleep(DEBOUNCE_UP)
-        # **do not return here**—let the final update of last_combo happen below
-
-    # ─── Layer-4 SCAG “arm” ──────────────────────────────────────────
-    if layer == 4 and not modifier_armed and pending_combo in chords_config.scag:
-        held_modifier   = chords_config.scag[pending_combo]
-        modifier_armed  = True
-        scag_skip_combo = pending_combo
-        skip_scag       = True
-        pending_combo = None
-        last_combo    = ()
+# Mouse (layer 5) and media keys (layer 6) are built on first use; most
+# sessions never touch them, and boot doesn't wait for them.
+def open_mouse(devices):
+    from adafruit_hid.mouse import Mouse
+    return Mouse(devices)
+
+def open_cc(devices):
+    from adafruit_hid.consumer_control import ConsumerControl
+    return ConsumerControl(devices)
+
+# Advertising, connects and drops are handled by link_task from here on.
+link = Link(ble, advert, now=time.monotonic())
+
+# USB first when enumerated; its devices can only be built once it is.
+transports = []
+if USB_HID:
+    import usb_hid
+    transports.append(Transport(
+        "usb", lambda: Keyboard(usb_hid.devices), lambda: open_mouse(usb_hid.devices),
+        lambda: open_cc(usb_hid.devices), lambda: supervisor.runtime.usb_connected))
+transports.append(Transport(
+    "ble", lambda: keyboard, lambda: open_mouse(hid_svc.devices),
+    lambda: open_cc(hid_svc.devices), lambda: link.connected))
+router = Router(transports)
+boot.mark("ble + keyboard")
+
+# ─── Chord engine ────────────────────────────────────────────────
+words = None
+for path in WORD_FILES:
+    words = word_dict.load(path)
+    if words:
+        print(f"word layer: {path} ({len(words.blob)} bytes)")
+        break
+
+stagger = None
+if ADAPTIVE_STABLE:
+    stagger = StaggerModel()
+    if stagger.from_bytes(microcontroller.nvm):
+        print("stagger: learned windows loaded")
+
+trace = TraceRecorder(TRACE_FILE) if TRACE else None
+
+stats = Stats() if chord_engine.STATS else None
+hid = HIDQueue(router.keyboard, router.mouse, router.cc)
+engine = ChordEngine(hid.keyboard, hid.mouse, hid.cc, now=time.monotonic(),
+                     debug=DEBUG_L6, stats=stats, words=words, stagger=stagger,
+                     trace=trace, eager=EAGER_COMMIT)
+hid.pause()   # until the first link comes up
+gcs = GCScheduler(gc, now=time.monotonic()) if GC_SCHEDULE else None
+boot.mark("engine")
+
+can_sleep = LIGHT_SLEEP and isinstance(scanner, keyscan.InterruptScanner)
+sched = ScanScheduler(loop_interval, can_sleep=can_sleep, now=time.monotonic())
+
+stagger_saved = time.monotonic()
+
+def save_stagger():
+    global stagger_saved
+    now = time.monotonic()
+    if now - stagger_saved >= STAGGER_SAVE and stagger.save(microcontroller.nvm):
+        stagger_saved = now
+
+def light_sleep():
+    if stagger:
+        save_stagger()   # idle anyway; the write can't delay a chord
+    # The INT pin has to be handed over to the alarm for the duration.
+    scanner.int_pin.deinit()
+    alarm.light_sleep_until_alarms(
+        alarm.pin.PinAlarm(MCP_INT_PIN, value=False, pull=True))
+    scanner.int_pin = open_int_pin()
+    sched.wake(time.monotonic())
+
+def serial_command():
+    if not supervisor.runtime.serial_bytes_available:
         return
-
-    # ─── Layer-5: Mouse with event-only debug ───────────────────────────
-    if layer == 5:
-        accel_active = (pending_combo == chords_config.ACCEL_CHORD)
-
-        # BUTTON CLICK
-        if pending_combo in chords_config.mouse_button_chords and pending_changed:
-            mouse.click(chords_config.mouse_button_chords[pending_combo])
-            held_combo   = ()
-            sent_release = True
-            time.sleep(DEBOUNCE_UP)
-            return
-
-        # ─── SCROLL (initial & arm for repeat) ─────────────────────────────
-        if pending_combo in chords_config.mouse_scroll_chords and pending_changed:
-            amt = chords_config.mouse_scroll_chords[pending_combo]
-            if accel_active:
-                amt *= ACCEL_MULTIPLIER
-            mouse.move(wheel=amt)
-            held_scroll_combo = pending_combo
-            last_scroll       = now
-            sent_release      = True
-            return
-
-        # ─── SCROLL REPEAT ─────────────────────────────────────────────────
-        if (
-            pending_combo == held_scroll_combo
-            and pending_combo in chords_config.mouse_scroll_chords
-            and (now - last_scroll) >= SCROLL_REPEAT_MS
-        ):
-            amt = chords_config.mouse_scroll_chords[pending_combo]
-            if accel_active:
-                amt *= ACCEL_MULTIPLIER
-            mouse.move(wheel=amt)
-            last_scroll = now
-            return
-
-        # MOVE (initial)
-        if pending_combo in chords_config.mouse_move_chords and pending_changed:
-            dx, dy = chords_config.mouse_move_chords[pending_combo]
-            if accel_active:
-                dx *= ACCEL_MULTIPLIER
-                dy *= ACCEL_MULTIPLIER
-            mouse.move(dx, dy)
-            held_combo   = pending_combo
-            last_repeat  = now
-            sent_release = True
-            return
-
-        # MOVE REPEAT
-        if pending_combo == held_combo \
-           and pending_combo in chords_config.mouse_move_chords \
-           and (now - last_repeat) >= L5_REPEAT_MS:
-            dx, dy = chords_config.mouse_move_chords[held_combo]
-            if accel_active:
-                dx *= ACCEL_MULTIPLIER
-                dy *= ACCEL_MULTIPLIER
-            mouse.move(dx, dy)
-            last_repeat = now
-            return
-
-        # HOLD
-        if pending_combo in chords_config.mouse_hold_chords and pending_changed:
-            mouse.press(chords_config.mouse_hold_chords[pending_combo])
-            held_combo   = ()
-            sent_release = True
-            return
-
-        # RELEASE
-        if pending_combo in chords_config.mouse_release_chords and pending_changed:
-            mouse.release(chords_config.mouse_release_chords[pending_combo])
-            held_combo   = ()
-            sent_release = True
-            return
-
-    # ─── First-release send for layers 1–3,6-7 ───────────────────────
-    if len(combo) < len(last_combo) and last_combo and not sent_release:
-        # skip SCAG if it’s the skip combo
-        if skip_scag and last_combo == scag_skip_combo:
-            skip_scag = False
+    cmd = sys.stdin.read(1)
+    if cmd == "s":
+        if stats:
+            stats.dump()
+        hid.dump()
+        router.dump()
+        link.dump()
+        if SPLIT:
+            scanner.dump()
+        if stagger:
+            stagger.dump()
+        if gcs:
+            gcs.dump()
+        if display:
+            display.dump()
+    elif cmd == "r":
+        if stats:
+            stats.reset()
+        hid.reset_counts()
+        router.reset_counts()
+        link.reset_counts()
+        if gcs:
+            gcs.reset_counts()
+        print("stats reset")
+
+# ─── Tasks ────────────────────────────────────────────────────
+async def link_task():
+    # Keeps advertising while the host is away, even while USB carries the
+    # output, so a pulled cable falls back to BLE at once.  The engine keeps
+    # its state (layer, armed modifier) across a drop; output is only
+    # paused while no link at all is up.
+    while True:
+        now = time.monotonic()
+        up = link.connected
+        if link.poll(now):
+            print(f"connected after {link.last:.2f} s")
+            if link.connects == 1:
+                boot.mark("ble connect")
+                boot.dump()
+        elif up and not link.connected:
+            print("disconnected, advertising")
+        route = router.name
+        router.poll(now)
+        if router.name != route:
+            if not route:
+                hid.resume()
+            elif not router.name:
+                hid.pause()
+            print(f"output over {router.name or 'nothing'}")
+        await asyncio.sleep(LINK_POLL)
+
+async def scan_task():
+    while True:
+        if not router.online:
+            await asyncio.sleep(LINK_POLL)
+            continue
+        now = time.monotonic()
+        engine.service(scanner, now)
+        busy = engine.next_timer() is not None or len(hid)
+        sched.note(now, scanner, busy=busy)
+        if gcs:
+            gcs.poll(now, scanner.mask, busy)
+        if trace and trace.due(now, scanner.mask):
+            trace.flush()
+        serial_command()
+        if sched.should_sleep(now):
+            light_sleep()
+            continue
+        await asyncio.sleep(sched.interval(now))
+
+async def timer_task():
+    # Stabilize deadlines and mouse/scroll repeat fire on time rather than
+    # on the next scan pass.
+    while True:
+        t = engine.next_timer()
+        now = time.monotonic()
+        if t is None:
+            await asyncio.sleep(sched.interval(now))
+        elif t > now:
+            await asyncio.sleep(t - now)
+        else:
+            engine.update(now, scanner.mask)
+            nxt = engine.next_timer()
+            await asyncio.sleep(loop_interval if nxt is not None and nxt <= now else 0)
+
+async def display_task():
+    # The panel shares the keypad's bus: write only while no key is held and
+    # no engine timer is due, one chunk per wakeup.
+    level = None
+    read_at = None
+    while True:
+        now = time.monotonic()
+        if battery and (read_at is None or now - read_at >= BATTERY_POLL):
+            level   = battery_level()
+            read_at = now
+        display.update(engine.layer, engine.mods, link.connected, level,
+                       engine.mods_sticky, router.name == "usb")
+        if not scanner.mask and engine.next_timer() is None and display.flush(now):
+            await asyncio.sleep(0)
         else:
-            skip_layer_lock = True
-            use = pending_combo or last_combo
-            # SCAG send (layer-4)
-            if layer == 4 and modifier_armed and last_combo in chords_config.alpha:
-                key = chords_config.alpha[last_combo]
-                keyboard.press(held_modifier, key)
-                keyboard.release_all()
-                layer       = 1
-                thumb_taps  = 1
-                modifier_armed = False
-                skip_scag      = False
-            # normal layers
-            elif layer in (1, 2, 3, 6, 7):
-                if use != (4,):  # ignore pure thumb
-                    kc = lm.get(use)
-                    if kc:
-                        keyboard.press(kc)
-                        keyboard.release_all()
-                    else:
-                        print(f"Unknown L{layer}: {use!r}")
-        sent_release = True
-        time.sleep(DEBOUNCE_UP)
-
-    # ─── 8) Clear on full release ────────────────────────────────────────
-    if not combo and last_combo:
-        pending_combo  = None
-        sent_release   = False
-        held_nav_combo = ()
-        skip_layer_lock = False
-
-    # Save for next pass
-    last_combo = combo
-
-# ─── Main loop ────────────────────────────────────────────────
-while ble.connected:
-    check_chords()
-    time.sleep(0.01)
+            await asyncio.sleep(DISPLAY_POLL)
+
+async def stagger_task():
+    # For boards that never light-sleep.  A write takes a page erase, so
+    # only between chords.
+    while True:
+        await asyncio.sleep(STAGGER_SAVE)
+        while scanner.mask or engine.next_timer() is not None:
+            await asyncio.sleep(LINK_POLL)
+        save_stagger()
+
+async def main():
+    # Runs for good: a dropped link is re-advertised, not a reason to stop.
+    tasks = [link_task(), hid.run(), timer_task(), scan_task()]
+    if stagger:
+        tasks.append(stagger_task())
+    if display:
+        tasks.append(display_task())
+    await asyncio.gather(*tasks)
+
+asyncio.run(main())
@@ -0,0 +1,190 @@
+# chord-bench.py
+# Chord latency benchmark on the host simulator (chord_sim.py).  Types a
+# corpus with each typist profile over several seeds and reports per-chord
+# latency (first press -> HID report) plus misfire/duplicate/missed rates.
+# "settle" is first press -> the sent chord becoming pending: what the
+# stabilize window costs, separate from how long the typist holds the keys.
+#
+#   python3 chord-bench.py                       # built-in corpus
+#   python3 chord-bench.py --adaptive            # learned windows (stagger.py)
+#   python3 chord-bench.py --eager               # send terminal chords on settle,
+#                                                # then compare per layer
+#   python3 chord-bench.py --split               # two expanders, left hand typing
+#   python3 chord-bench.py --display             # SSD1306 status panel on the bus
+#   python3 chord-bench.py --save base.json      # record a baseline
+#   python3 chord-bench.py --baseline base.json  # exit 1 on regression
+#
+# Tweak the timing constants in chord_engine.py, rerun against the saved
+# baseline, and only flash if it passes.
+
+import argparse
+import json
+import sys
+
+import chord_sim
+import chord_tables
+from latency_stats import Stats
+from stagger import StaggerModel
+
+CORPUS = (
+    "the quick brown fox jumps over the lazy dog "
+    "pack my box with five dozen liquor jugs "
+    "a chording keyboard trades key count for timing so every "
+    "millisecond spent waiting for fingers to settle is felt by the typist"
+)
+
+
+def run(text, profile, seeds, scan, interval, adaptive=False, split=False,
+        eager=False, display=False):
+    agg = {"chords": 0, "latencies": [], "misfires": 0,
+           "duplicates": 0, "missed": 0}
+    reports = 0
+    stats = Stats()
+    # one model per typist, learning across the seeds as the firmware would
+    stagger = StaggerModel() if adaptive else None
+    skew = 0.0
+    hold = 0.0
+    writes = 0
+    for seed in range(seeds):
+        edges, expected = chord_sim.typing_trace(
+            text, chord_sim.PROFILES[profile], seed=seed)
+        sim = chord_sim.replay(edges, scan=scan, interval=interval,
+                               stagger=stagger, stats=stats, split=split,
+                               eager=eager, display=display)
+        if split:
+            skew = max(skew, sim.scanner.skew.hi)
+        if display:
+            hold = max(hold, sim.display_hold)
+            writes += sim.display.writes
+        res = chord_sim.score(expected, sim.reports)
+        for k in agg:
+            agg[k] += res[k]
+        reports += sum(1 for r in sim.reports if r[1] == "kbd")
+    lat = agg.pop("latencies")
+    n = max(1, agg["chords"])
+    return {
+        "chords":     agg["chords"],
+        "mean_ms":    1000 * sum(lat) / max(1, len(lat)),
+        "p50_ms":     1000 * chord_sim.percentile(lat, 50),
+        "p95_ms":     1000 * chord_sim.percentile(lat, 95),
+        "max_ms":     1000 * max(lat, default=0.0),
+        "settle_ms":  stats.settle.total / max(1, stats.settle.n),
+        "misfire_pct":   100 * agg["misfires"] / n,
+        "duplicate_pct": 100 * agg["duplicates"] / n,
+        "missed_pct":    100 * agg["missed"] / n,
+        "reports_per_chord": reports / n,
+        "split_skew_ms": skew,
+        "display_hold_ms": 1000 * hold,
+        "display_writes": writes,
+    }
+
+
+def layer_run(layer, profile, seeds, scan, interval, eager, masks=None, count=200):
+    """Mean latency and error rate typing random chords of one layer."""
+    lat = []
+    errors = chords = 0
+    for seed in range(seeds):
+        edges, expected = chord_sim.layer_trace(
+            layer, count, chord_sim.PROFILES[profile], seed=seed, masks=masks)
+        sim = chord_sim.replay(edges, scan=scan, interval=interval,
+                               eager=eager, layer=layer)
+        res = chord_sim.score(expected, sim.reports)
+        lat += res["latencies"]
+        errors += res["misfires"] + res["duplicates"] + res["missed"]
+        chords += res["chords"]
+    return 1000 * sum(lat) / max(1, len(lat)), 100 * errors / max(1, chords)
+
+
+def eager_report(profiles, seeds, scan, interval):
+    """Latency eager commit saves on each key layer: over all of its
+    chords, and over the terminal ones it actually sends early."""
+    print("\neager commit: mean latency off -> on (change in error %)")
+    print(f"{'profile':8} {'layer':>5} {'terminal':>9} {'all chords':>22}"
+          f" {'terminal chords':>22}")
+    for name in profiles:
+        for layer in (1, 2, 3, 7):
+            kinds = chord_tables.kinds[layer]
+            keys = [m for m in range(chord_tables.SLOTS) if kinds[m] == chord_tables.KEY]
+            term = [m for m in keys if chord_tables.terminal[layer][m]]
+            cols = []
+            for masks in (None, term):
+                if masks == []:
+                    cols.append(f"{'-':>22}")
+                    continue
+                off, e0 = layer_run(layer, name, seeds, scan, interval, False, masks)
+                on, e1 = layer_run(layer, name, seeds, scan, interval, True, masks)
+                cols.append(f"{off:6.1f} -> {on:5.1f}ms ({e1 - e0:+.1f})")
+            print(f"{name:8} {layer:5d} {len(term):4d}/{len(keys):<4d} {cols[0]} {cols[1]}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--text", help="corpus file (default: built-in text)")
+    ap.add_argument("--seeds", type=int, default=5)
+    ap.add_argument("--scan", choices=("pin", "register", "irq"), default="register")
+    ap.add_argument("--interval", type=float, default=0.01, help="main-loop period (s)")
+    ap.add_argument("--adaptive", action="store_true",
+                    help="learn stabilize windows per chord instead of the fixed ones")
+    ap.add_argument("--eager", action="store_true",
+                    help="send chords nothing bigger contains as soon as they settle")
+    ap.add_argument("--display", action="store_true",
+                    help="drive a status display on the keypad's bus between chords")
+    ap.add_argument("--split", action="store_true",
+                    help="scan a second (idle) right-hand expander as well")
+    ap.add_argument("--profile", action="append", choices=sorted(chord_sim.PROFILES),
+                    help="typist profile(s) to run (default: all)")
+    ap.add_argument("--save", help="write results as JSON")
+    ap.add_argument("--baseline", help="compare against a saved JSON run")
+    ap.add_argument("--tolerance", type=float, default=2.0,
+                    help="allowed p95 latency increase in ms / error increase in %%")
+    args = ap.parse_args()
+
+    text = open(args.text).read() if args.text else CORPUS
+    profiles = args.profile or sorted(chord_sim.PROFILES)
+    if args.split:
+        chord_tables.split()
+
+    results = {}
+    print(f"{'profile':8} {'chords':>6} {'mean':>7} {'p50':>7} {'p95':>7} {'max':>7}"
+          f" {'settle':>7} {'misfire':>8} {'dup':>6} {'missed':>7} {'rpt/ch':>7}")
+    for name in profiles:
+        r = run(text, name, args.seeds, args.scan, args.interval, args.adaptive,
+                args.split, args.eager, args.display)
+        results[name] = r
+        print(f"{name:8} {r['chords']:6d} {r['mean_ms']:6.1f}ms {r['p50_ms']:6.1f}ms"
+              f" {r['p95_ms']:6.1f}ms {r['max_ms']:6.1f}ms {r['settle_ms']:5.1f}ms"
+              f" {r['misfire_pct']:7.2f}% {r['duplicate_pct']:5.2f}%"
+              f" {r['missed_pct']:6.2f}% {r['reports_per_chord']:7.2f}")
+    if args.split:
+        print(f"split: right half sampled up to "
+              f"{max(r['split_skew_ms'] for r in results.values()):.2f} ms after the left")
+    if args.display:
+        print(f"display: {sum(r['display_writes'] for r in results.values())} I2C writes,"
+              f" each holding the bus up to "
+              f"{max(r['display_hold_ms'] for r in results.values()):.2f} ms")
+    if args.eager:
+        eager_report(profiles, args.seeds, args.scan, args.interval)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        failed = False
+        for name, r in results.items():
+            b = base.get(name)
+            if not b:
+                continue
+            for key in ("p95_ms", "misfire_pct", "duplicate_pct", "missed_pct"):
+                if r[key] > b[key] + args.tolerance:
+                    print(f"REGRESSION {name} {key}: {b[key]:.2f} -> {r[key]:.2f}")
+                    failed = True
+        if failed:
+            sys.exit(1)
+        print("no regressions against", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# chord-pack.py
+# Compiles chords_config.py into chords.bin (see chord_tables.py) for
+# CIRCUITPY, and compares what importing the tables costs either way.
+#
+#   python3 chord-pack.py                 # writes chords.bin
+#   python3 chord-pack.py -o /Volumes/CIRCUITPY/chords.bin
+#
+# Re-run it after editing chords_config.py.  A stale chords.bin is ignored
+# on boot (the CRC of chords_config.py no longer matches), so forgetting
+# costs boot time, not wrong keys.
+#
+# The comparison is measured under CPython, so the absolute numbers are only
+# indicative.  The firmware prints its own heap/time figures for the table
+# import at boot.
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import chord_tables
+import chords_config
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+MEASURE = """
+import gc, time, tracemalloc
+gc.collect()
+tracemalloc.start()
+t = time.perf_counter()
+import chord_tables
+dt = time.perf_counter() - t
+gc.collect()
+print(chord_tables.SOURCE, tracemalloc.get_traced_memory()[0], dt)
+"""
+
+
+def measure(blob):
+    """(source, bytes held after import, seconds) for a fresh interpreter
+    importing chord_tables with or without chords.bin in its directory."""
+    with tempfile.TemporaryDirectory() as tmp:
+        if blob is not None:
+            with open(os.path.join(tmp, chord_tables.TABLES_FILE), "wb") as f:
+                f.write(blob)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (HERE, env.get("PYTHONPATH")) if p)
+        out = subprocess.run([sys.executable, "-c", MEASURE], cwd=tmp, env=env,
+                             capture_output=True, text=True, check=True).stdout
+    source, held, seconds = out.split()
+    return source, int(held), float(seconds)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("-o", "--output", default=chord_tables.TABLES_FILE)
+    ap.add_argument("--no-measure", action="store_true")
+    args = ap.parse_args()
+
+    kinds, payloads = chord_tables.compile_layers(chords_config.layer_maps)
+    repeats = chord_tables.compile_repeats(kinds, payloads, chords_config.repeatable)
+    crc = chord_tables.source_crc(os.path.join(HERE, chord_tables.CONFIG_FILE))
+    blob = chord_tables.pack(kinds, payloads, repeats, crc or 0)
+
+    k2, p2, r2, _ = chord_tables.unpack(blob)
+    for layer in range(1, len(kinds)):
+        if (bytes(k2[layer]) != bytes(kinds[layer]) or p2[layer] != payloads[layer]
+                or r2[layer] != repeats[layer]):
+            raise SystemExit(f"layer {layer} did not survive packing")
+
+    with open(args.output, "wb") as f:
+        f.write(blob)
+    print(f"wrote {args.output}: {len(kinds) - 1} layers, {len(blob)} bytes")
+
+    if not args.no_measure:
+        for label, b in (("python", None), ("binary", blob)):
+            source, held, seconds = measure(b)
+            print(f"  {label:7} ({source}): {held:6d} bytes held, "
+                  f"{seconds * 1000:5.1f} ms import")
+
+
+if __name__ == "__main__":
+    main()
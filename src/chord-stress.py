@@ -0,0 +1,308 @@
+# chord-stress.py
+# Randomized stress test for chord_engine.  Generates human-plausible
+# sessions (staggered chords, thumb-tap layer switches, SCAG modifiers,
+# rollover into the next chord, long holds) and plays them through the engine
+# on every core, checking invariants after every scan pass:
+#
+#   stuck key       the keyboard report still holds a key after a pass
+#   stuck button    a mouse button is held while off layer 5
+#   stuck modifier  modifiers armed on a layer that can't use them, or a
+#                   one-shot set still armed after its shortcut was let go
+#   double send     a key or media code sent twice with no new key pressed
+#                   in between (typematic repeat aside)
+#   bad layer       the layer left 1..7 (1..8 with a word dictionary)
+#
+# The first failure of each kind is shrunk to a minimal sequence of chords
+# and printed as edges chord_sim.replay() takes.  The engine's own time is
+# measured separately from the harness to give chords per second.
+#
+#   python3 chord-stress.py                        # 20000 sessions, all cores
+#   python3 chord-stress.py --sessions 1000000 --jobs 8
+#   python3 chord-stress.py --words words.txt      # include the word layer
+
+import argparse
+import multiprocessing
+import random
+import time
+
+import chord_sim
+import chord_tables
+from chord_engine import ChordEngine
+from chord_tables import THUMB, WORD_LAYER
+from hid_output import HIDQueue, MODIFIER_MIN
+import word_dict
+
+INTERVAL = 0.01      # scan pass, as in c5k-left.py
+TAIL     = 1.5       # s played after the last edge (word timeout, repeats)
+ACTIONS  = 40        # actions per session
+
+_words = None        # per worker process
+_eager = False
+
+
+# ─── Session generation ──────────────────────────────────────────────
+# An action is (mask, edges, length, gap): edges relative to its start,
+# then `gap` s (negative: the next action rolls over into this one).
+
+def _tap(rng):
+    hold = rng.uniform(0.03, 0.09)
+    return (THUMB, [(0.0, 4, True), (hold, 4, False)], hold,
+            rng.uniform(0.06, 0.16))
+
+
+def _chord(rng, mask):
+    profile = chord_sim.PROFILES[rng.choice(sorted(chord_sim.PROFILES))]
+    edges, end = chord_sim.chord_edges(mask, 0.0, profile, rng)
+    if rng.random() < 0.05:                  # held on: typematic, mouse motion
+        extra = rng.uniform(0.3, 1.5)
+        edges = [(t + extra if not down else t, k, down) for t, k, down in edges]
+        end += extra
+    gap = profile["gap"] + rng.uniform(-profile["jitter"], profile["jitter"])
+    if rng.random() < 0.08:
+        gap = -rng.uniform(0.0, 0.03)        # next chord starts before this ends
+    return mask, edges, end, gap
+
+
+def session(seed, count=ACTIONS):
+    rng = random.Random(seed)
+    actions = []
+    while len(actions) < count:
+        r = rng.random()
+        if r < 0.15:
+            for _ in range(rng.choice((1, 1, 2, 3, 4, 4, 5, 6, 7, 8))):
+                actions.append(_tap(rng))
+            actions[-1] = actions[-1][:3] + (rng.uniform(0.5, 0.8),)   # let the taps settle
+        elif r < 0.2:
+            actions.append((0, [], 0.0, rng.uniform(0.3, 1.5)))        # pause
+        else:
+            actions.append(_chord(rng, rng.randrange(1, chord_tables.SLOTS)))
+    return actions
+
+
+def build(actions):
+    """Absolute, sorted edges.  An action that reuses a key still held by
+    an earlier one (a rollover) waits until that key is up."""
+    edges = []
+    free = [0.0] * 5         # when each key was last released
+    t = 0.1
+    for mask, rel, length, gap in actions:
+        for k in range(5):
+            if mask >> k & 1 and free[k] + 0.005 > t:
+                t = free[k] + 0.005
+        for dt, k, down in rel:
+            edges.append((t + dt, k, down))
+            if not down:
+                free[k] = t + dt
+        t += max(length + gap, 0.005)
+    edges.sort(key=lambda e: (e[0], e[2]))   # releases first at a tie
+    return edges
+
+
+# ─── Playback and invariants ─────────────────────────────────────────
+class Failure(Exception):
+    def __init__(self, kind, t, detail):
+        super().__init__(f"{kind} at {t:.3f}s: {detail}")
+        self.kind = kind
+
+
+class Checker:
+    def __init__(self, engine, kbd, mouse, log):
+        self.engine = engine
+        self.kbd    = kbd
+        self.mouse  = mouse
+        self.log    = log
+        self.top    = engine.top_layer
+        self.seen   = 0         # reports already looked at
+        self.keys   = ()        # keyboard report before them
+        self.fresh  = False     # a key went down since the last send
+        self.layer  = 1         # layer before this pass
+        self.prev_mask = 0
+
+    def after(self, now, mask):
+        e = self.engine
+        if self.kbd.held:
+            raise Failure("stuck key", now, f"{self.kbd.held} held on layer {e.layer}")
+        if not 1 <= e.layer <= self.top:
+            raise Failure("bad layer", now, f"layer {e.layer}")
+        if self.mouse.buttons and e.layer != 5:
+            raise Failure("stuck button", now,
+                          f"buttons {self.mouse.buttons:#x} held on layer {e.layer}")
+        if e.mods and e.layer in (5, 6, WORD_LAYER):
+            raise Failure("stuck modifier", now,
+                          f"modifiers {e.mods:08b} armed on layer {e.layer}")
+        if not mask and e.mods_spent:
+            raise Failure("stuck modifier", now,
+                          f"one-shot modifiers {e.mods:08b} still armed after the shortcut")
+        self._sends(now)
+        if mask & ~self.prev_mask:
+            self.fresh = True
+        self.prev_mask = mask
+        self.layer     = e.layer
+
+    def _sends(self, now):
+        # Only a new press can start a new chord, so two sends with no press
+        # between them are one chord sent twice.  Typematic repeat and the
+        # word layer (a stroke can type a whole word) are exempt.
+        reports = self.log.reports
+        words = WORD_LAYER in (self.layer, self.engine.layer)
+        for i in range(self.seen, len(reports)):
+            _, dev, data = reports[i]
+            if dev == "kbd":
+                sent = any(k < MODIFIER_MIN and k not in self.keys for k in data)
+                self.keys = data
+            else:
+                sent = dev == "cc" and bool(data)
+            if not sent or words or self.engine.held_nav_combo:
+                continue
+            if not self.fresh:
+                raise Failure("double send", now,
+                              f"{dev} {data} sent again with no new press "
+                              f"on layer {self.layer}")
+            self.fresh = False
+        self.seen = len(reports)
+
+
+def play(edges, words=None, eager=False):
+    """Run one session; returns (engine seconds, chords).  Raises Failure."""
+    clock = chord_sim.FakeClock()
+    log   = chord_sim.HIDLog(clock)
+    kbd   = chord_sim.RecKeyboard(log)
+    mouse = chord_sim.RecMouse(log)
+    cc    = chord_sim.RecConsumer(log)
+    hid   = HIDQueue(kbd, mouse, cc, clock=clock.monotonic)
+    engine = ChordEngine(hid.keyboard, hid.mouse, hid.cc, debug=False, words=words,
+                         eager=eager)
+    check = Checker(engine, kbd, mouse, log)
+    perf = time.perf_counter
+    busy = 0.0
+    chords = 0
+    mask = 0
+    i = 0
+    n = len(edges)
+    end = (edges[-1][0] if edges else 0.0) + TAIL
+    t = 0.0
+    while t < end:
+        while i < n and edges[i][0] <= t:
+            _, key, down = edges[i]
+            if down and not mask:
+                chords += 1
+            mask = mask | (1 << key) if down else mask & ~(1 << key)
+            i += 1
+        t0 = perf()
+        engine.update(t, mask)
+        busy += perf() - t0
+        clock.t = t
+        hid.drain()
+        check.after(t, mask)
+        wake = t + INTERVAL
+        nt = engine.next_timer()
+        while nt is not None and t <= nt < wake:
+            clock.t = nt
+            t0 = perf()
+            engine.update(nt, mask)
+            busy += perf() - t0
+            hid.drain()
+            check.after(nt, mask)
+            nxt = engine.next_timer()
+            nt = nxt if nxt is not None and nxt > nt else None
+        t = wake
+    return busy, chords
+
+
+def fails(actions, kind, words):
+    try:
+        play(build(actions), words, _eager)
+    except Failure as f:
+        return f.kind == kind
+    return False
+
+
+def shrink(actions, kind, words):
+    """Drop actions while the same kind of failure still happens: halves
+    first, then single actions, until nothing more can go."""
+    chunk = len(actions) // 2
+    while chunk >= 1:
+        i = 0
+        while i < len(actions):
+            trial = actions[:i] + actions[i + chunk:]
+            if trial and fails(trial, kind, words):
+                actions = trial
+            else:
+                i += chunk
+        chunk //= 2
+    return actions
+
+
+# ─── Workers ─────────────────────────────────────────────────────────
+def _init(words_path, eager):
+    global _words, _eager
+    _eager = eager
+    if words_path:
+        _words = word_dict.load(words_path)
+
+
+def _run(job):
+    first, count = job
+    out = {"sessions": 0, "chords": 0, "busy": 0.0, "failures": {}}
+    for seed in range(first, first + count):
+        try:
+            busy, chords = play(build(session(seed)), _words, _eager)
+        except Failure as f:
+            out["failures"].setdefault(f.kind, [0, seed, str(f)])[0] += 1
+            continue
+        out["sessions"] += 1
+        out["chords"]   += chords
+        out["busy"]     += busy
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sessions", type=int, default=20000)
+    ap.add_argument("--jobs", type=int, default=multiprocessing.cpu_count())
+    ap.add_argument("--seed", type=int, default=0, help="first session seed")
+    ap.add_argument("--batch", type=int, default=200, help="sessions per work unit")
+    ap.add_argument("--words", help="word dictionary (.bin or .txt) for layer 8")
+    ap.add_argument("--eager", action="store_true",
+                    help="send terminal chords as soon as they settle")
+    args = ap.parse_args()
+
+    jobs = [(s, min(args.batch, args.seed + args.sessions - s))
+            for s in range(args.seed, args.seed + args.sessions, args.batch)]
+    total = {"sessions": 0, "chords": 0, "busy": 0.0, "failures": {}}
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.jobs, _init, (args.words, args.eager)) as pool:
+        for out in pool.imap_unordered(_run, jobs):
+            total["sessions"] += out["sessions"]
+            total["chords"]   += out["chords"]
+            total["busy"]     += out["busy"]
+            for kind, (n, seed, msg) in out["failures"].items():
+                seen = total["failures"].setdefault(kind, [0, seed, msg])
+                seen[0] += n
+                if seed < seen[1]:
+                    seen[1], seen[2] = seed, msg
+    wall = time.perf_counter() - start
+
+    print(f"{args.sessions} sessions, {total['chords']} chords in {wall:.1f} s "
+          f"on {args.jobs} processes")
+    if total["busy"]:
+        print(f"engine: {total['chords'] / total['busy']:,.0f} chords/s per core "
+              f"({1e6 * total['busy'] / max(1, total['chords']):.1f} us per chord)")
+    if not total["failures"]:
+        print("all invariants held")
+        return
+    _init(args.words, args.eager)
+    for kind, (n, seed, msg) in sorted(total["failures"].items()):
+        print(f"\n{kind}: {n} session(s), first seed {seed}: {msg}")
+        actions = shrink(session(seed), kind, _words)
+        edges = build(actions)
+        try:
+            play(edges, _words, _eager)
+        except Failure as f:
+            print(f"  shrunk to {len(actions)} chord(s): {f}")
+        print("  edges = [" + ", ".join(f"({t:.3f}, {k}, {d})" for t, k, d in edges) + "]")
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
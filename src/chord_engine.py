@@ -0,0 +1,467 @@
+# chord_engine.py
+# The chord state machine from c5k-left.py, with its inputs injected: the
+# caller hands it (now, key mask) and the HID objects to send through.  The
+# firmware passes the real BLE Keyboard/Mouse/ConsumerControl; chord_sim.py
+# passes a fake clock and recording fakes so the same code runs on a host.
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+import chord_tables
+from chord_tables import (THUMB, POPCOUNT, mask_combo, KEY, MODIFIER,
+                          CONSUMER, CLICK, SCROLL, MOVE, PRESS, RELEASE, ACCEL,
+                          STROKE, LAYERS, WORD_LAYER)
+from word_dict import Translator
+from mouse_motion import Motion
+from hid_output import MODIFIER_MIN
+
+# Latency histograms (latency_stats.py).  With 0 the firmware builds no
+# Stats and every `if STATS and self.stats:` site is skipped after one test;
+# the checks stay in the bytecode (the compiler only folds a bare constant
+# condition).  The other serial dumps don't depend on it.
+STATS = const(1)
+
+# ─── Timing constants ────────────────────────────────────────────────
+STABLE_MS_ALPHA = 0.03   # 30 ms for layer-1 (alpha)
+STABLE_MS_OTHER = 0.02   # 20 ms for layers 2/3
+# (both are only the starting point when a stagger.StaggerModel is given)
+DEBOUNCE_UP      = 0.05  # per-key lockout after send (bounce on release)
+TAP_WINDOW       = 0.5   # thumb-tap window
+MIN_TAP_INT      = 0.1   # thumb debounce
+LAYER_LOCK_COOLDOWN = 0.1  # minimum seconds between layer‐lock taps
+THUMB_HOLD_TO_LOCK = 0.12   # seconds you must hold thumb alone to trigger layer-lock
+WORD_TIMEOUT      = 1.0    # word layer: type a buffered stroke sequence after this idle
+WORD_SPACE        = True   # word layer: space after each dictionary word
+# Typematic repeat for chords_config.repeatable keys held on KEY_LAYERS:
+# the first key goes out REPEAT_DELAY after the chord settles, then the gap
+# shrinks from REPEAT_SLOW to REPEAT_FAST over REPEAT_RAMP seconds.  The
+# same layers take eager commit and carry armed modifiers.
+KEY_LAYERS        = (1, 2, 3, 7)
+REPEAT_DELAY      = 0.35
+REPEAT_SLOW       = 0.1
+REPEAT_FAST       = 0.025
+REPEAT_RAMP       = 2.0
+
+# ─── Mouse chords for layer-7 (no thumb) ─────────────────────────────
+MOVE_DELTA = 5
+ACCEL_MULTIPLIER = 2
+ACCEL_CHORD = (1, 2, 3)  # three-finger accel combo
+
+
+class ChordEngine:
+    """Chord state for layers 1–7, plus the word layer when a dictionary
+    (word_dict.WordTrie) is given.  Combos are key masks (bit i == key i
+    held, 0 == nothing).
+
+    With eager=True, a chord on layers 1–3 or 7 that no bigger chord in the
+    layer contains (chord_tables.terminal) is sent as soon as it settles
+    instead of on the first key release."""
+
+    def __init__(self, keyboard, mouse, cc, now=0.0, debug=True, stats=None,
+                 words=None, stagger=None, trace=None, eager=False):
+        self.keyboard = keyboard
+        self.mouse    = mouse
+        self.cc       = cc
+        self.debug    = debug
+        self.stats    = stats
+        self.stagger  = stagger   # learned stabilize windows (stagger.py)
+        self.trace    = trace     # keystroke recorder (keytrace.py)
+        self.eager    = eager
+        self.motion   = Motion(mouse)   # layer-5 move/scroll (mouse_motion.py)
+        self.words    = None
+        self.top_layer = LAYERS
+        if words:
+            self.words = Translator(words, keyboard, chord_tables.payloads[1],
+                                    space=WORD_SPACE)
+            self.top_layer = WORD_LAYER
+
+        # ─── State variables ────────────────────────────────────────
+        self.layer            = 1     # layers 1..7
+        self.thumb_taps       = 0
+        self.last_tap_time    = 0.0
+        self.last_combo       = 0
+        self.last_mask        = 0     # raw scan mask, for the trace
+        self.pending_combo    = 0
+        self.sent_release     = False
+        self.mods             = 0     # armed modifiers, bit i == keycode 0xE0 + i
+        self.mods_done        = False # layer 4: the next chord is the key
+        self.mods_sticky      = False # stay armed after a shortcut
+        self.mods_used        = False # sticky set has typed a shortcut
+        self.mods_spent       = False # one-shot set used; drop it on release
+        self.last_time        = now
+        self.chord_start      = now   # first press of the current chord
+        self.chord_keys       = 0     # every key touched since that press
+        self.settled          = now   # pending_combo last changed
+        self.held_combo       = 0     # layer-5 move/scroll chord in motion
+        self.buttons          = 0     # layer-5 mouse buttons held down
+        self.accel_active     = False
+        self.held_nav_combo   = 0     # repeatable chord being held
+        self.last_nav         = 0.0   # armed, or its last repeat
+        self.nav_start        = 0.0   # its first repeat
+        self.nav_count        = 0
+        self.last_pending_combo = 0
+        self.lock_keys         = 0     # keys that just sent; re-presses ignored
+        self.lock_until        = 0.0
+        self.last_stroke       = 0.0   # word layer
+        self.eager_sent        = False # sent on settle; release still debounced
+
+    def service(self, scanner, now):
+        """One main-loop pass: poll the scanner and run every queued edge at
+        the time it was seen, or a plain timing pass when nothing moved."""
+        if STATS and self.stats:
+            self.stats.tick(now)
+        scanner.poll(now)
+        if scanner.pending:
+            while scanner.pending:
+                t = scanner.peek()
+                self.update(t, scanner.pop())
+        else:
+            self.update(now, scanner.mask)
+
+    def log(self, msg):
+        # callers check self.debug first: building msg allocates
+        print(msg)
+
+    def next_timer(self):
+        """Earliest time update() has something to do without a key edge
+        (stabilize, mouse/scroll report), or None."""
+        t = None
+        combo = self.last_combo
+        if combo and combo != self.pending_combo:
+            t = self.last_time + self._stable_ms(self.layer, combo)
+        elif not combo and self.words and self.words.pending:
+            t = self.last_stroke + WORD_TIMEOUT
+        if self.held_nav_combo and combo == self.held_nav_combo:
+            r = self._nav_due()
+            t = r if t is None or r < t else t
+        if self.layer == 5 and self.motion.active:
+            r = self.motion.next_time()
+            t = r if t is None or r < t else t
+        return t
+
+    def _stable_ms(self, layer, combo):
+        if self.stagger:
+            w = self.stagger.window(combo)
+            if w is not None:
+                return w
+        return STABLE_MS_ALPHA if layer in (1, WORD_LAYER) else STABLE_MS_OTHER
+
+    def _nav_due(self):
+        if not self.nav_count:
+            return self.last_nav + REPEAT_DELAY
+        ramp = (self.last_nav - self.nav_start) / REPEAT_RAMP
+        if ramp > 1.0:
+            ramp = 1.0
+        return self.last_nav + REPEAT_SLOW - (REPEAT_SLOW - REPEAT_FAST) * ramp
+
+    def _lockout(self, now, keys):
+        # Debounce-up per key: the keys of a chord that just sent can't
+        # register a fresh press for DEBOUNCE_UP, while other fingers
+        # starting the next chord are seen straight away.
+        self.lock_keys |= keys
+        self.lock_until = now + DEBOUNCE_UP
+
+    def _sent(self, now, mask, code=0):
+        if STATS and self.stats:
+            self.stats.send[self.layer].record(now - self.chord_start)
+        if self.trace:
+            self.trace.action(now, self.layer, mask, code)
+
+    # ─── Core chord logic with layers 1–7 ───────────────────────────
+    def update(self, now, mask):
+        if self.trace and mask != self.last_mask:
+            self.trace.edge(now, mask)
+            self.last_mask = mask
+        if self.lock_keys:
+            if now < self.lock_until:
+                mask &= ~(self.lock_keys & ~self.last_combo)
+            else:
+                self.lock_keys = 0
+        combo = mask
+        last_combo = self.last_combo
+        if last_combo:
+            self.chord_keys |= combo
+        else:
+            self.chord_keys = combo
+
+        # ─── A) Pure-thumb release ⇒ layer-lock (always first) ─────────
+        # Only a thumb pressed and lifted on its own is a tap; a thumb that is
+        # merely the last key up after a thumb chord is not.
+        if last_combo == THUMB and not combo and self.chord_keys == THUMB:
+            # count the tap
+            if now - self.last_tap_time < TAP_WINDOW:
+                self.thumb_taps += 1
+            else:
+                self.thumb_taps = 1
+            self.last_tap_time = now
+
+            # leaving the word layer types whatever is buffered
+            if self.words and self.words.pending:
+                self.words.flush()
+
+            # clamp & switch layer
+            self.layer = min(self.thumb_taps, self.top_layer)
+            if self.debug:
+                self.log(f"→ locked to layer-{self.layer}")
+            if self.trace:
+                self.trace.layer(now, self.layer)
+
+            # Armed modifiers go along to a key layer until a shortcut has
+            # been typed with them; landing anywhere else drops them.
+            if not (self.layer in KEY_LAYERS and not self.mods_used):
+                self.mods        = 0
+                self.mods_sticky = False
+            self.mods_done  = self.mods != 0
+            self.mods_used  = False
+            self.mods_spent = False
+
+            # a drag can only be let go on layer 5
+            if self.buttons and self.layer != 5:
+                self.mouse.release(self.buttons)
+                self.buttons = 0
+
+            # reset all combo state
+            self.pending_combo     = 0
+            self.sent_release      = False
+            self.held_combo        = 0
+            self.held_nav_combo    = 0
+            self.eager_sent        = False
+            self.motion.stop()
+
+            # clear last_combo so it won’t retrigger
+            self.last_combo = combo   # combo is 0
+            return
+
+        # ─── B) Stabilize into pending_combo ─────────────────────────────
+        if combo != last_combo:
+            stagger = self.stagger
+            if stagger and last_combo:
+                if combo & last_combo == last_combo:
+                    # last_combo was half a chord: learn how long it sat
+                    stagger.extended(last_combo, combo & ~last_combo,
+                                     now - self.last_time)
+                elif last_combo == self.chord_keys:
+                    # first key up on a chord nothing joined
+                    stagger.completed(last_combo)
+            self.last_time = now
+            if not last_combo and combo:
+                self.pending_combo = 0
+                self.sent_release  = False
+                self.chord_start   = now
+
+        layer = self.layer
+        if (combo and combo != self.pending_combo
+                and (now - self.last_time) >= self._stable_ms(layer, combo)):
+            self.pending_combo = combo
+            self.settled       = now
+            if STATS and self.stats:
+                self.stats.stabilize.record(now - self.chord_start)
+
+        pending_combo   = self.pending_combo
+        pending_changed = (pending_combo != self.last_pending_combo)
+        self.last_pending_combo = pending_combo
+
+        # ─── C) Fetch this layer’s compiled tables ─────────────────────
+        kinds    = chord_tables.kinds[layer]
+        payloads = chord_tables.payloads[layer]
+
+        # ─── Typematic repeat (layers 1–3, 7) ───────────────────────────
+        # Armed when a repeatable chord settles; any change to the keys held
+        # stops it, and a chord that repeated doesn't type again on release.
+        if self.held_nav_combo and combo != self.held_nav_combo:
+            self.held_nav_combo = 0
+        if (pending_changed and combo == pending_combo and layer in KEY_LAYERS
+                and chord_tables.repeats[layer][pending_combo]):
+            self.held_nav_combo = pending_combo
+            self.last_nav       = now
+            self.nav_count      = 0
+        if self.held_nav_combo and now >= self._nav_due():
+            self._press(payloads[self.held_nav_combo])
+            if not self.nav_count:
+                if not self.eager_sent:
+                    self._sent(now, self.held_nav_combo, payloads[self.held_nav_combo])
+                self.nav_start = now
+            self.nav_count   += 1
+            self.last_nav     = now
+            self.sent_release = True
+
+        # ─── Eager commit (layers 1–3, 7) ──────────────────────────────
+        # Nothing bigger in the layer contains a terminal chord, so once it
+        # has settled no further finger can turn it into another one.
+        if (self.eager and pending_changed and combo == pending_combo
+                and not self.sent_release and layer in KEY_LAYERS
+                and chord_tables.terminal[layer][pending_combo]):
+            self._press(payloads[pending_combo])
+            self._sent(now, pending_combo, payloads[pending_combo])
+            if STATS and self.stats:
+                self.stats.settle.record(now - self.chord_start)
+            self.sent_release = True
+            self.eager_sent   = True
+
+        # ─── Layer-5: Mouse with event-only debug ───────────────────────
+        if layer == 5 and self._mouse(now, combo, pending_combo, pending_changed,
+                                      kinds, payloads):
+            return
+
+        # ─── Word layer: type a sequence nothing has extended ────────────
+        if (layer == WORD_LAYER and not combo and not last_combo
+                and self.words.pending and now - self.last_stroke >= WORD_TIMEOUT):
+            self.words.flush()
+
+        # ─── First-release send for layers 1–3,5-8 ───────────────────────
+        if POPCOUNT[combo] < POPCOUNT[last_combo] and not self.sent_release:
+            use = pending_combo or last_combo
+            # SCAG (layer-4): modifiers, then a layer-1 key
+            if layer == 4:
+                self._scag(now, use, kinds, payloads)
+            # normal layers
+            elif layer in (1, 2, 3, 6, 7):
+                if use != THUMB:  # ignore pure thumb
+                    if kinds[use] == KEY:
+                        self._press(payloads[use])
+                        self._sent(now, use, payloads[use])
+                        if STATS and self.stats and pending_combo == last_combo:
+                            self.stats.settle.record(self.settled - self.chord_start)
+                    # macOS media keys
+                    elif kinds[use] == CONSUMER:
+                        if self.debug:
+                            self.log(f"[L6] sending {payloads[use]!r} for {mask_combo(use)}")
+                        self.cc.send(payloads[use])
+                        self._sent(now, use, payloads[use])
+                    elif self.debug:
+                        self.log(f"Unknown L{layer}: {mask_combo(use)!r}")
+            # layer-5 one-key click, only if no other key joined it
+            elif layer == 5 and kinds[use] == CLICK and self.chord_keys == use:
+                self.mouse.click(payloads[use])
+                self._sent(now, use, payloads[use])
+            # word layer: one stroke into the dictionary
+            elif layer == WORD_LAYER and kinds[use] == STROKE:
+                self.words.stroke(use)
+                self.last_stroke = now
+                self._sent(now, use)
+            self.sent_release = True
+            self._lockout(now, last_combo)
+        elif self.eager_sent and POPCOUNT[combo] < POPCOUNT[last_combo]:
+            self.eager_sent = False
+            self._lockout(now, last_combo)
+
+        # ─── 8) Clear on full release ────────────────────────────────────
+        if not combo and last_combo:
+            self.pending_combo  = 0
+            self.sent_release   = False
+            self.held_nav_combo = 0
+            if self.mods_spent:
+                # a one-shot shortcut is done; from layer 4 back to letters
+                self.mods       = 0
+                self.mods_done  = False
+                self.mods_spent = False
+                if layer == 4:
+                    self.layer      = 1
+                    self.thumb_taps = 1
+                    if self.trace:
+                        self.trace.layer(now, 1)
+
+        # Save for next pass
+        self.last_combo = combo
+
+    def _press(self, key):
+        """Tap `key`, with the armed modifiers held around it."""
+        mods = self.mods
+        if mods:
+            self.keyboard.press(*[MODIFIER_MIN + i for i in range(8) if mods >> i & 1],
+                                key)
+            if self.mods_sticky:
+                self.mods_used = True
+            else:
+                self.mods_spent = True
+        else:
+            self.keyboard.press(key)
+        self.keyboard.release_all()
+
+    def _scag(self, now, use, kinds, payloads):
+        """Layer 4.  A modifier chord arms its modifier and makes the next
+        chord the key; with the thumb added it arms (or drops) it and waits
+        for more.  Arming one that is already armed latches the set for
+        repeated shortcuts.  The key is a layer-1 chord; a thumb tap or two
+        first takes the armed set to layers 2, 3 or 7 instead."""
+        mod = use & ~THUMB
+        if not self.mods_done and kinds[mod] == MODIFIER:
+            bit = 1 << (payloads[mod] - MODIFIER_MIN)
+            if use & THUMB:
+                self.mods ^= bit
+            else:
+                if self.mods & bit:
+                    self.mods_sticky = True
+                self.mods     |= bit
+                self.mods_done = True
+            if self.debug:
+                self.log(f"[L4] modifiers {self.mods:08b}"
+                         f"{' latched' if self.mods_sticky else ''}")
+        elif self.mods and chord_tables.kinds[1][use] == KEY:
+            key = chord_tables.payloads[1][use]
+            self._press(key)
+            self._sent(now, use, key)
+        elif self.debug:
+            self.log(f"Unknown L4: {mask_combo(use)!r}")
+
+    def _mouse(self, now, combo, pending_combo, pending_changed, kinds, payloads):
+        """Layer-5 actions; True when this pass is finished."""
+        mouse  = self.mouse
+        motion = self.motion
+        kind = kinds[pending_combo]
+        self.accel_active = (kind == ACCEL)
+        boost = ACCEL_MULTIPLIER if self.accel_active else 1
+
+        # motion lasts exactly as long as its chord is held
+        if motion.active and combo != self.held_combo:
+            motion.stop()
+            self.held_combo = 0
+
+        # BUTTON CLICK (a one-key click waits for release: every chord starts
+        # as one key down, so it can't fire on settle)
+        if kind == CLICK and pending_changed and POPCOUNT[pending_combo] > 1:
+            mouse.click(payloads[pending_combo])
+            self._sent(now, pending_combo, payloads[pending_combo])
+            self.held_combo   = 0
+            self.sent_release = True
+            self._lockout(now, pending_combo)
+            return True
+
+        # ─── MOVE / SCROLL: start in the chord's direction ─────────────────
+        if (kind == MOVE or kind == SCROLL) and pending_changed:
+            if kind == MOVE:
+                dx, dy = payloads[pending_combo]
+                motion.start(now, dx, dy, boost=boost)
+            else:
+                motion.start(now, wheel=payloads[pending_combo], boost=boost)
+            self._sent(now, pending_combo)
+            self.held_combo   = pending_combo
+            self.sent_release = True
+            return True
+
+        # ─── MOVE / SCROLL: one report per interval while held ─────────────
+        if pending_combo == self.held_combo and motion.active and motion.step(now):
+            return True
+
+        # HOLD
+        if kind == PRESS and pending_changed:
+            mouse.press(payloads[pending_combo])
+            self.buttons |= payloads[pending_combo]
+            self._sent(now, pending_combo, payloads[pending_combo])
+            self.held_combo   = 0
+            self.sent_release = True
+            return True
+
+        # RELEASE
+        if kind == RELEASE and pending_changed:
+            mouse.release(payloads[pending_combo])
+            self.buttons &= ~payloads[pending_combo]
+            self._sent(now, pending_combo, payloads[pending_combo])
+            self.held_combo   = 0
+            self.sent_release = True
+            return True
+
+        return False
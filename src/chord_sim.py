@@ -0,0 +1,407 @@
+# chord_sim.py
+# Deterministic host simulator for chord_engine.  A trace of timestamped
+# key presses/releases is played into a fake MCP23008, scanned with the same
+# keyscan code and main-loop pass the firmware uses, and every HID report the
+# engine sends is recorded against a fake clock.  The HID queue is drained
+# and engine timers (stabilize, mouse repeat) fire the way the asyncio tasks
+# in c5k-left.py run them.  score() then lines the
+# reports up with the chords the trace meant to type.
+#
+#   edges, expected = typing_trace("hello world", PROFILES["average"], seed=1)
+#   result = score(expected, replay(edges).reports)
+#
+# Runs on a plain CPython host; no board, busio or BLE needed.
+
+import random
+
+from adafruit_hid.keycode import Keycode
+
+import chord_tables
+from chord_engine import ChordEngine
+from chord_tables import KEY
+from fake_hw import FakeI2C, FakeMCP23008, FakeIntPin, FakeSSD1306
+from hid_output import HIDQueue
+import keyscan
+from keyscan import KEY_COUNT, KEY_BITS, RIGHT_MCP_ADDRESS
+from status_display import StatusDisplay
+
+LINK_POLL = 0.05   # c5k-left.py's link task period
+
+
+class FakeClock:
+    """time.monotonic()/time.sleep() pair that only moves when told to."""
+
+    def __init__(self, t=0.0):
+        self.t = t
+
+    def monotonic(self):
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += seconds
+
+
+class HIDLog:
+    """Every report the recording fakes send, as (time, device, data)."""
+
+    def __init__(self, clock):
+        self.clock   = clock
+        self.reports = []
+
+    def add(self, device, data):
+        self.reports.append((self.clock.t, device, data))
+
+
+class RecKeyboard:
+    """adafruit_hid Keyboard stand-in; one report per state change."""
+
+    def __init__(self, log):
+        self.log  = log
+        self.held = []
+
+    def press(self, *keycodes):
+        for k in keycodes:
+            if k not in self.held:
+                self.held.append(k)
+        self.log.add("kbd", tuple(self.held))
+
+    def release(self, *keycodes):
+        for k in keycodes:
+            if k in self.held:
+                self.held.remove(k)
+        self.log.add("kbd", tuple(self.held))
+
+    def release_all(self):
+        self.held = []
+        self.log.add("kbd", ())
+
+    def send(self, *keycodes):
+        self.press(*keycodes)
+        self.release_all()
+
+
+class RecMouse:
+    """adafruit_hid Mouse stand-in."""
+
+    def __init__(self, log):
+        self.log     = log
+        self.buttons = 0
+
+    def press(self, buttons):
+        self.buttons |= buttons
+        self.log.add("mouse", (self.buttons, 0, 0, 0))
+
+    def release(self, buttons):
+        self.buttons &= ~buttons
+        self.log.add("mouse", (self.buttons, 0, 0, 0))
+
+    def release_all(self):
+        self.release(self.buttons)
+
+    def click(self, buttons):
+        self.press(buttons)
+        self.release(buttons)
+
+    def move(self, x=0, y=0, wheel=0):
+        self.log.add("mouse", (self.buttons, x, y, wheel))
+
+
+class RecConsumer:
+    """adafruit_hid ConsumerControl stand-in."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def press(self, code):
+        self.log.add("cc", code)
+
+    def release(self):
+        self.log.add("cc", 0)
+
+    def send(self, code):
+        self.press(code)
+        self.release()
+
+
+class Sim:
+    """Engine + fake hardware + recording HID sharing one fake clock."""
+
+    def __init__(self, scan="register", interval=0.01, scheduler=None, words=None,
+                 stagger=None, stats=None, split=False, trace=None, eager=False,
+                 layer=1, display=False, clock=None, router=None):
+        self.clock = clock or FakeClock()
+        self.log   = HIDLog(self.clock)
+        self.bus   = FakeI2C()
+        self.mcp   = FakeMCP23008(self.bus)
+        if scan == "irq":
+            self.scanner = keyscan.InterruptScanner(self.bus, FakeIntPin(self.mcp))
+        elif scan == "register":
+            self.scanner = keyscan.RegisterScanner(self.bus)
+        else:
+            self.scanner = keyscan.PinScanner(
+                [self.mcp.get_pin(i) for i in range(KEY_COUNT)])
+        self.right = None
+        if split:
+            # second expander on the same bus; the right half is always polled
+            # (see chord_tables.split() for the tables this needs)
+            self.right = FakeMCP23008(self.bus, RIGHT_MCP_ADDRESS)
+            bus = self.bus
+            self.scanner = keyscan.SplitScanner(
+                self.scanner, keyscan.RegisterScanner(bus, RIGHT_MCP_ADDRESS),
+                clock=lambda: int(bus.bus_time * 1e9))
+        self.interval  = interval
+        self.scheduler = scheduler   # power.ScanScheduler, or fixed interval
+        self.passes    = 0           # scan-task wakeups
+        self.timer_wakes = 0         # timer-task wakeups
+        self.sleeps    = 0           # light sleeps entered
+        self.slept     = 0.0         # seconds spent in light sleep
+        self.keyboard = RecKeyboard(self.log)
+        self.mouse    = RecMouse(self.log)
+        self.cc       = RecConsumer(self.log)
+        self.router   = router       # hid_transport.Router over fake links
+        self.router_due = 0.0
+        if router:
+            self.hid  = HIDQueue(router.keyboard, router.mouse, router.cc,
+                                 clock=self.clock.monotonic)
+        else:
+            self.hid  = HIDQueue(self.keyboard, self.mouse, self.cc,
+                                 clock=self.clock.monotonic)
+        self.engine   = ChordEngine(self.hid.keyboard, self.hid.mouse,
+                                    self.hid.cc, debug=False, words=words,
+                                    stagger=stagger, stats=stats, trace=trace,
+                                    eager=eager)
+        self.engine.layer = layer    # as if the thumb had already been tapped
+        self.trace    = trace
+        self.display  = None
+        self.display_hold = 0.0      # longest single display write on the bus
+        if display:
+            self.oled    = FakeSSD1306(self.bus)
+            self.display = StatusDisplay(self.bus)
+
+    @property
+    def reports(self):
+        return self.log.reports
+
+    def step(self):
+        """One scan-task pass (charging the clock for bus time), then any
+        engine timers that fall before the next pass."""
+        bus_before = self.bus.bus_time
+        now = self.clock.t
+        self.passes += 1
+        if self.router and now >= self.router_due:
+            self.router.poll(now)     # c5k-left.py's link task
+            self.router_due = now + LINK_POLL
+        self.engine.service(self.scanner, now)
+        self.hid.drain()
+        if self.trace and self.trace.due(now, self.scanner.mask):
+            self.trace.flush()
+        if self.display:
+            self._display(now)
+        interval = self.interval
+        if self.scheduler:
+            sched = self.scheduler
+            sched.note(now, self.scanner, busy=self.engine.next_timer() is not None)
+            interval = sched.interval(now)
+        self.clock.t += self.bus.bus_time - bus_before
+        wake = self.clock.t + interval
+        t = self.engine.next_timer()
+        while t is not None and self.clock.t <= t < wake:
+            self.clock.t = t
+            self.timer_wakes += 1
+            self.engine.update(t, self.scanner.mask)
+            self.hid.drain()
+            nxt = self.engine.next_timer()
+            t = nxt if nxt is not None and nxt > t else None
+        self.clock.t = wake
+
+    def _display(self, now):
+        # what c5k-left.py's display task does between two scan passes
+        engine = self.engine
+        self.display.update(engine.layer, engine.mods, True,
+                            sticky=engine.mods_sticky)
+        if not self.scanner.mask and engine.next_timer() is None:
+            before = self.bus.bus_time
+            if self.display.flush(now):
+                hold = self.bus.bus_time - before
+                if hold > self.display_hold:
+                    self.display_hold = hold
+
+    def run(self, edges, tail=0.3):
+        """Play (time, key, down) edges, then keep scanning for `tail` s.
+        Keys 5..9 are the right half when the sim is split."""
+        keys = self.mcp.keys
+        i = 0
+        end = (edges[-1][0] if edges else 0.0) + tail
+        can_wake = isinstance(self.scanner, keyscan.InterruptScanner)
+        right = self.right
+        while self.clock.t < end:
+            sched = self.scheduler
+            if sched and can_wake and sched.should_sleep(self.clock.t):
+                # light sleep until the next key edge pulls INT low
+                wake = edges[i][0] if i < len(edges) else end
+                self.sleeps += 1
+                self.slept += wake - self.clock.t
+                self.clock.t = wake
+                sched.wake(wake)
+            while i < len(edges) and edges[i][0] <= self.clock.t:
+                _, key, down = edges[i]
+                keys = keys | (1 << key) if down else keys & ~(1 << key)
+                self.mcp.set_keys(keys & KEY_BITS)
+                if right:
+                    right.set_keys(keys >> KEY_COUNT)
+                i += 1
+            self.step()
+        return self
+
+
+def replay(edges, scan="register", interval=0.01, tail=0.3, scheduler=None,
+           stagger=None, stats=None, split=False, eager=False, layer=1,
+           display=False):
+    return Sim(scan, interval, scheduler, stagger=stagger, stats=stats,
+               split=split, eager=eager, layer=layer,
+               display=display).run(edges, tail)
+
+
+# ─── Trace generation ────────────────────────────────────────────────
+# Typist timing, all in seconds: spread of the press onsets, hold time of
+# the whole chord, spread of the releases, and the gap before the next chord.
+PROFILES = {
+    "careful": dict(press_spread=0.010, hold=0.120, release_spread=0.015, gap=0.120, jitter=0.02),
+    "average": dict(press_spread=0.025, hold=0.090, release_spread=0.030, gap=0.080, jitter=0.03),
+    "sloppy":  dict(press_spread=0.045, hold=0.070, release_spread=0.050, gap=0.050, jitter=0.04),
+    "fast":    dict(press_spread=0.020, hold=0.060, release_spread=0.025, gap=0.030, jitter=0.015),
+}
+
+
+def char_chords(layer=1):
+    """Printable char -> chord mask for one key layer."""
+    kinds    = chord_tables.kinds[layer]
+    payloads = chord_tables.payloads[layer]
+    out = {}
+    for m in range(chord_tables.SLOTS):
+        if kinds[m] != KEY:
+            continue
+        kc = payloads[m]
+        if kc == Keycode.SPACE:
+            out[" "] = m
+        elif Keycode.A <= kc <= Keycode.Z:
+            out[chr(ord("a") + kc - Keycode.A)] = m
+    return out
+
+
+def chord_edges(mask, start, profile, rng):
+    """Press/release edges for one chord starting at `start`; returns
+    (edges, time the last key lifted)."""
+    keys = [i for i in range(KEY_COUNT) if mask & (1 << i)]
+    jitter = profile["jitter"]
+    presses = [start + (rng.uniform(0, profile["press_spread"]) if i else 0.0)
+               for i in range(len(keys))]
+    rng.shuffle(presses)
+    down_all = max(presses)
+    hold = max(0.02, profile["hold"] + rng.uniform(-jitter, jitter))
+    releases = [down_all + hold + rng.uniform(0, profile["release_spread"])
+                for _ in keys]
+    edges = [(t, k, True) for t, k in zip(presses, keys)]
+    edges += [(t, k, False) for t, k in zip(releases, keys)]
+    return edges, max(releases)
+
+
+def typing_trace(text, profile, seed=0, start=0.1):
+    """Edges for typing `text` on the alpha layer, plus the expected output
+    as (first-press time, keycode) per chord.  Unmapped characters are
+    skipped."""
+    rng = random.Random(seed)
+    table = char_chords(1)
+    edges, expected = [], []
+    t = start
+    for ch in text.lower():
+        mask = table.get(ch)
+        if mask is None:
+            continue
+        e, end = chord_edges(mask, t, profile, rng)
+        edges += e
+        expected.append((t, chord_tables.payloads[1][mask]))
+        t = end + max(0.01, profile["gap"] + rng.uniform(-profile["jitter"], profile["jitter"]))
+    edges.sort(key=lambda e: e[0])
+    return edges, expected
+
+
+def layer_trace(layer, count, profile, seed=0, start=0.1, masks=None):
+    """Like typing_trace, but `count` chords drawn at random from `masks`
+    (default: every KEY chord of `layer`).  The sim has to be started on
+    that layer."""
+    rng = random.Random(seed)
+    kinds    = chord_tables.kinds[layer]
+    payloads = chord_tables.payloads[layer]
+    if masks is None:
+        masks = [m for m in range(chord_tables.SLOTS) if kinds[m] == KEY]
+    edges, expected = [], []
+    t = start
+    for _ in range(count):
+        mask = rng.choice(masks)
+        e, end = chord_edges(mask, t, profile, rng)
+        edges += e
+        expected.append((t, payloads[mask]))
+        t = end + max(0.01, profile["gap"] + rng.uniform(-profile["jitter"], profile["jitter"]))
+    edges.sort(key=lambda e: e[0])
+    return edges, expected
+
+
+# ─── Scoring ─────────────────────────────────────────────────────────
+def key_downs(reports):
+    """(time, keycode) for every key that newly appears in a keyboard report."""
+    downs = []
+    prev = ()
+    for t, dev, data in reports:
+        if dev != "kbd":
+            continue
+        for k in data:
+            if k not in prev:
+                downs.append((t, k))
+        prev = data
+    return downs
+
+
+def score(expected, reports):
+    """Match output key-downs to expected chords by time window.
+
+    Each chord owns the span from its first press to the next chord's first
+    press.  The first matching key-down in that span is the hit (latency =
+    report time - first press); further matches are duplicates, anything
+    else a misfire, and a chord with no match is missed."""
+    downs = key_downs(reports)
+    latencies = []
+    misfires = duplicates = missed = 0
+    j = 0
+    for n, (start, kc) in enumerate(expected):
+        end = expected[n + 1][0] if n + 1 < len(expected) else float("inf")
+        hit = False
+        while j < len(downs) and downs[j][0] < end:
+            t, k = downs[j]
+            j += 1
+            if t < start:
+                misfires += 1
+            elif k == kc and not hit:
+                latencies.append(t - start)
+                hit = True
+            elif k == kc:
+                duplicates += 1
+            else:
+                misfires += 1
+        if not hit:
+            missed += 1
+    misfires += len(downs) - j
+    return {
+        "chords":     len(expected),
+        "latencies":  latencies,
+        "misfires":   misfires,
+        "duplicates": duplicates,
+        "missed":     missed,
+    }
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(pct / 100 * (len(s) - 1))))]
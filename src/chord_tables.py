@@ -0,0 +1,323 @@
+# chord_tables.py
+# chords_config compiled into flat per-layer tables, indexed by chord mask
+# (bit i set == key i held).  Five keys give 32 slots per layer, so dispatch
+# is kinds[layer][mask] / payloads[layer][mask] with no tuple hashing.
+#
+# Compiling also checks the config: every chord must be a sorted tuple of
+# distinct key indices (the only shape a scan can produce) and no slot may be
+# claimed twice within a layer.
+#
+# chord-pack.py writes the compiled tables to chords.bin.  When that file is
+# on CIRCUITPY and matches chords_config.py, boot reads it in one go instead
+# of importing the config (its dicts, tuples and ConsumerControlCode);
+# otherwise the config is compiled as before.
+#
+#   header   b"C5T\x02", layer count, CRC32 of chords_config.py (LE)
+#   kinds    layer count * 32 bytes, layers 1..n
+#   payload  layer count * 32 * 2 bytes, little-endian; MOVE is (dx, dy)
+#            as two signed bytes, SCROLL a signed 16-bit amount
+#   repeats  layer count * 4 bytes, little-endian bit per mask: KEY chords
+#            whose key is in chords_config.repeatable (typematic repeat)
+
+import binascii
+
+from keyscan import KEY_COUNT
+
+SLOTS  = 1 << KEY_COUNT
+SPLIT_SLOTS = 1 << (2 * KEY_COUNT)   # both halves of a split keyboard
+LAYERS = 7            # layers set up in chords_config
+WORD_LAYER = 8        # strokes into word_dict, after the config layers
+THUMB  = 1 << 4
+
+TABLES_FILE = "chords.bin"
+CONFIG_FILE = "chords_config.py"
+MAGIC       = b"C5T\x02"
+HEADER      = len(MAGIC) + 5
+
+# ─── Action kinds ────────────────────────────────────────────────────
+NONE     = 0
+KEY      = 1   # payload: Keycode
+MODIFIER = 2   # payload: Keycode (SCAG modifier)
+CONSUMER = 3   # payload: ConsumerControlCode
+CLICK    = 4   # payload: mouse button
+SCROLL   = 5   # payload: wheel amount
+MOVE     = 6   # payload: (dx, dy)
+PRESS    = 7   # payload: mouse button
+RELEASE  = 8   # payload: mouse button
+ACCEL    = 9   # payload: None
+STROKE   = 10  # payload: None (word layer; see word_dict.py)
+
+# kind for the plain one-dict layers
+LAYER_KINDS = {1: KEY, 2: KEY, 3: KEY, 4: MODIFIER, 6: CONSUMER, 7: KEY}
+
+# kind for each sub-map of the mouse layer
+MOUSE_KINDS = {
+    "button":  CLICK,
+    "scroll":  SCROLL,
+    "move":    MOVE,
+    "hold":    PRESS,
+    "release": RELEASE,
+}
+
+# A bytearray so split() can extend it in place for modules that imported it.
+POPCOUNT = bytearray(bin(m).count("1") for m in range(SLOTS))
+
+
+def combo_mask(combo, keys=KEY_COUNT):
+    """Sorted key tuple -> mask; ValueError for chords a scan can't produce."""
+    mask = 0
+    prev = -1
+    for k in combo:
+        if not isinstance(k, int) or not 0 <= k < keys or k <= prev:
+            raise ValueError(f"chord {combo!r} can never match "
+                             f"(keys must be distinct, sorted 0..{keys - 1})")
+        mask |= 1 << k
+        prev = k
+    if not mask:
+        raise ValueError("empty chord")
+    return mask
+
+
+def mask_combo(mask):
+    """Mask -> key tuple, for messages and tools."""
+    return tuple(i for i in range(2 * KEY_COUNT) if mask & (1 << i))
+
+
+def _fill(kinds, payloads, layer, name, chords, kind):
+    for combo, value in chords.items():
+        try:
+            m = combo_mask(combo)
+        except ValueError as e:
+            raise ValueError(f"layer {layer} {name}: {e}") from None
+        if kinds[m]:
+            raise ValueError(f"layer {layer} {name}: chord {combo!r} "
+                             f"already used in this layer")
+        if kind == MODIFIER and not 0xE0 <= value <= 0xE7:
+            raise ValueError(f"layer {layer} {name}: chord {combo!r} needs a "
+                             f"modifier keycode (LEFT_CONTROL..RIGHT_GUI)")
+        kinds[m]    = kind
+        payloads[m] = value
+
+
+def compile_layers(layer_maps):
+    """Build (kinds, payloads); both are indexed [layer][mask], layer
+    1..WORD_LAYER.  Every chord but the lone thumb is a word-layer stroke."""
+    kinds    = [None]
+    payloads = [None]
+    for layer in range(1, LAYERS + 1):
+        k = bytearray(SLOTS)
+        p = [None] * SLOTS
+        lm = layer_maps[layer]
+        if layer in LAYER_KINDS:
+            _fill(k, p, layer, "map", lm, LAYER_KINDS[layer])
+        else:
+            for name, kind in MOUSE_KINDS.items():
+                _fill(k, p, layer, name, lm[name], kind)
+            _fill(k, p, layer, "accel", {lm["accel"]: None}, ACCEL)
+        kinds.append(k)
+        payloads.append(p)
+    k = bytearray(STROKE if m and m != THUMB else NONE for m in range(SLOTS))
+    kinds.append(k)
+    payloads.append([None] * SLOTS)
+    return kinds, payloads
+
+
+def compile_repeats(kinds, payloads, repeat_keys):
+    """Per layer, a bytearray with 1 at every KEY chord whose keycode is
+    in `repeat_keys`; the engine repeats those while held."""
+    repeats = [None]
+    for layer in range(1, len(kinds)):
+        k, p = kinds[layer], payloads[layer]
+        repeats.append(bytearray(1 if k[m] == KEY and p[m] in repeat_keys else 0
+                                 for m in range(SLOTS)))
+    return repeats
+
+
+# ─── Superset reachability ───────────────────────────────────────────
+def _terminal(k):
+    n = len(k)
+    keys = n.bit_length() - 1
+    above = bytearray(n)   # 1: some bigger chord containing this one is mapped
+    out   = bytearray(n)
+    # every strict superset of m is a larger number, so walk downwards
+    for m in range(n - 1, 0, -1):
+        for i in range(keys):
+            s = m | (1 << i)
+            if s != m and (k[s] or above[s]):
+                above[m] = 1
+                break
+        if k[m] == KEY and not above[m]:
+            out[m] = 1
+    return out
+
+
+def compile_terminal(kinds):
+    """Per layer, a bytearray with 1 at every KEY chord no other chord in
+    that layer contains.  Once such a chord has settled no more fingers can
+    be on their way to a different one, so the engine may send it without
+    waiting for a release (ChordEngine eager=True).  Cheap enough to build
+    at boot, so chords.bin doesn't carry it."""
+    return [None] + [_terminal(kinds[layer]) for layer in range(1, len(kinds))]
+
+
+# ─── Packed tables ───────────────────────────────────────────────────
+def source_crc(path=CONFIG_FILE):
+    try:
+        with open(path, "rb") as f:
+            return binascii.crc32(f.read())
+    except OSError:
+        return None
+
+
+def pack(kinds, payloads, repeats, crc=0):
+    """Compiled tables -> chords.bin contents."""
+    layers = len(kinds) - 1
+    blob = bytearray(MAGIC)
+    blob.append(layers)
+    blob += bytes((crc >> s) & 0xFF for s in (0, 8, 16, 24))
+    for layer in range(1, layers + 1):
+        blob += kinds[layer]
+    for layer in range(1, layers + 1):
+        for m in range(SLOTS):
+            kind, value = kinds[layer][m], payloads[layer][m]
+            if kind == MOVE:
+                lo, hi = value[0] & 0xFF, value[1] & 0xFF
+            elif kind in (NONE, ACCEL, STROKE):
+                lo = hi = 0
+            else:
+                if kind == SCROLL:
+                    value &= 0xFFFF
+                if not 0 <= value <= 0xFFFF:
+                    raise ValueError(f"layer {layer} {mask_combo(m)}: "
+                                     f"payload {value!r} doesn't fit 16 bits")
+                lo, hi = value & 0xFF, value >> 8
+            blob.append(lo)
+            blob.append(hi)
+    for layer in range(1, layers + 1):
+        bits = 0
+        for m in range(SLOTS):
+            if repeats[layer][m]:
+                bits |= 1 << m
+        blob += bytes((bits >> s) & 0xFF for s in (0, 8, 16, 24))
+    return bytes(blob)
+
+
+def _signed(v, bits):
+    return v - (1 << bits) if v & (1 << (bits - 1)) else v
+
+
+def unpack(blob):
+    """chords.bin contents -> (kinds, payloads, repeats, crc).  Kinds are
+    views of the blob, so only the payload lists and repeat flags are
+    allocated."""
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a packed chord table")
+    layers = blob[len(MAGIC)]
+    crc = int.from_bytes(blob[len(MAGIC) + 1:HEADER], "little")
+    if len(blob) != HEADER + (3 * SLOTS + 4) * layers:
+        raise ValueError("truncated chord table")
+    view = memoryview(blob)
+    kinds    = [None]
+    payloads = [None]
+    p = HEADER + SLOTS * layers
+    for layer in range(layers):
+        k = view[HEADER + SLOTS * layer:HEADER + SLOTS * (layer + 1)]
+        values = [None] * SLOTS
+        for m in range(SLOTS):
+            kind = k[m]
+            lo, hi = blob[p], blob[p + 1]
+            p += 2
+            if kind == MOVE:
+                values[m] = (_signed(lo, 8), _signed(hi, 8))
+            elif kind == SCROLL:
+                values[m] = _signed(lo | (hi << 8), 16)
+            elif kind not in (NONE, ACCEL, STROKE):
+                values[m] = lo | (hi << 8)
+        kinds.append(k)
+        payloads.append(values)
+    repeats = [None]
+    for layer in range(layers):
+        bits = blob[p:p + 4]
+        p += 4
+        repeats.append(bytearray((bits[m >> 3] >> (m & 7)) & 1 for m in range(SLOTS)))
+    return kinds, payloads, repeats, crc
+
+
+def load_tables(path=TABLES_FILE, config=CONFIG_FILE):
+    """(kinds, payloads, repeats) from chords.bin, or None when it is
+    missing, from an older chord-pack.py, or was packed from a different
+    chords_config.py."""
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    try:
+        kinds, payloads, repeats, crc = unpack(blob)
+    except ValueError as e:
+        print(f"{path}: {e}; compiling the config")
+        return None
+    current = source_crc(config)
+    if current is not None and current != crc:
+        print(f"{path} is stale (chords_config.py changed); compiling the config")
+        return None
+    return kinds, payloads, repeats
+
+
+_tables = load_tables()
+if _tables:
+    SOURCE = TABLES_FILE
+else:
+    import chords_config
+    _tables = compile_layers(chords_config.layer_maps)
+    _tables += (compile_repeats(_tables[0], _tables[1], chords_config.repeatable),)
+    SOURCE = "chords_config"
+kinds, payloads, repeats = _tables
+del _tables
+terminal = compile_terminal(kinds)
+
+
+# ─── Split keyboards ─────────────────────────────────────────────────
+def split(split_maps=None, repeat_keys=None):
+    """Widen the loaded tables to SPLIT_SLOTS for a two-half keyboard (keys
+    5..9 are the right half) and add chords_config.split_layer_maps.
+
+    Kinds, repeats and terminal become 1024-entry bytearrays; payloads become dicts,
+    which the engine indexes the same way but which only hold the left
+    half's 32 slots and the split chords that exist.  chords.bin doesn't carry the split maps, so they always
+    come from chords_config."""
+    if split_maps is None or repeat_keys is None:
+        import chords_config
+        split_maps  = chords_config.split_layer_maps
+        repeat_keys = chords_config.repeatable
+    if len(POPCOUNT) < SPLIT_SLOTS:
+        POPCOUNT.extend(POPCOUNT[m & (SLOTS - 1)] + POPCOUNT[m >> KEY_COUNT]
+                        for m in range(SLOTS, SPLIT_SLOTS))
+    for layer in range(1, len(kinds)):
+        if len(kinds[layer]) == SPLIT_SLOTS:
+            continue
+        k = bytearray(SPLIT_SLOTS)
+        k[:SLOTS] = kinds[layer]
+        p = dict(enumerate(payloads[layer]))
+        extra = split_maps.get(layer, {})
+        if extra and layer not in LAYER_KINDS:
+            raise ValueError(f"layer {layer} split map: layer {layer} "
+                             f"can't take split chords")
+        for combo, value in extra.items():
+            try:
+                m = combo_mask(combo, 2 * KEY_COUNT)
+            except ValueError as e:
+                raise ValueError(f"layer {layer} split map: {e}") from None
+            if k[m]:
+                raise ValueError(f"layer {layer} split map: chord {combo!r} "
+                                 f"already used in this layer")
+            k[m] = LAYER_KINDS[layer]
+            p[m] = value
+        r = bytearray(SPLIT_SLOTS)
+        for m in range(SPLIT_SLOTS):
+            if k[m] == KEY and p[m] in repeat_keys:
+                r[m] = 1
+        kinds[layer]    = k
+        payloads[layer] = p
+        repeats[layer]  = r
+        terminal[layer] = _terminal(k)
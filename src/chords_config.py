@@ -3,7 +3,15 @@
 
 from adafruit_hid.keycode import Keycode
 from adafruit_hid.consumer_control_code import ConsumerControlCode
-from adafruit_hid.mouse import Mouse
+
+# Mouse button bits (same values as adafruit_hid.mouse.Mouse.*_BUTTON).  Not
+# imported from Mouse, which needs a usb_hid backend and so can't load on a
+# host; this keeps the file importable by chord_sim.py and the other tools.
+LEFT_BUTTON    = 1
+RIGHT_BUTTON   = 2
+MIDDLE_BUTTON  = 4
+BACK_BUTTON    = 8
+FORWARD_BUTTON = 16
 
 # ────────────── Layer 1: Alpha ──────────────
 alpha = {  # layer-1: alpha
@@ -97,33 +105,35 @@ scag = {
 # ────────────── Layer 5: Mouse Actions ──────────────
 
 # ─── Mouse move chords: thumb + one finger ───────────────────────────
+# Values are directions; speed and acceleration live in mouse_motion.py.
 mouse_move_chords = {
-    (0, 4): ( 0, -50),  # Up
-    (1, 4): ( 0,  50),  # Down
-    (2, 4): ( 50,  0),  # Right
-    (3, 4): (-50,  0),  # Left
+    (0, 4): ( 0, -1),   # Up
+    (1, 4): ( 0,  1),   # Down
+    (2, 4): ( 1,  0),   # Right
+    (3, 4): (-1,  0),   # Left
 }
 
 # ─── Mouse button chords: two fingers only ──────────────────────────
 mouse_button_chords = {
-    (3, 2): Mouse.LEFT_BUTTON,     # ← no thumb
-    (1, 1): Mouse.MIDDLE_BUTTON,
-    (0, 1): Mouse.RIGHT_BUTTON,
-    (0, 3): Mouse.FORWARD_BUTTON,
+    (2, 3): LEFT_BUTTON,     # ← no thumb
+    (1,):   MIDDLE_BUTTON,   # one key: clicks on release (chord_engine)
+    (0, 1): RIGHT_BUTTON,
+    (0, 3): FORWARD_BUTTON,
 }
 
 # ─── Mouse scroll chords: two fingers + thumb ───────────────────────
+# +1 scrolls up, -1 down, at mouse_motion.SCROLL_CURVE speed.
 mouse_scroll_chords = {
-    (0, 1, 4):  50,   # Scroll Up
-    (2, 3, 4): -50,   # Scroll Down
+    (0, 1, 4):  1,    # Scroll Up
+    (2, 3, 4): -1,    # Scroll Down
 }
 
 # ─── Mouse hold/release chords (three fingers) ─────────────────────
 mouse_hold_chords = {
-    (0, 1, 2): Mouse.LEFT_BUTTON,   # press & hold
+    (0, 1, 2): LEFT_BUTTON,   # press & hold
 }
 mouse_release_chords = {
-    (0, 1, 3): Mouse.LEFT_BUTTON,   # release
+    (0, 1, 3): LEFT_BUTTON,   # release
 }
 
 # ─── Acceleration chord (three fingers) ─────────────────────────────
@@ -161,7 +171,24 @@ function = {
     (0, 2, 3):   Keycode.F12,  # following 3-finger combo → F12
 }
 
+# ────────────── Typematic repeat ──────────────
+# Keys that repeat while their chord is held on layers 1–3 or 7
+# (chord_engine.KEY_LAYERS, timing in chord_engine.REPEAT_*).  Everything
+# else types once on release.
+repeatable = (
+    Keycode.UP_ARROW,
+    Keycode.DOWN_ARROW,
+    Keycode.LEFT_ARROW,
+    Keycode.RIGHT_ARROW,
+    Keycode.PAGE_UP,
+    Keycode.PAGE_DOWN,
+    Keycode.BACKSPACE,
+    Keycode.DELETE,
+)
+
 # ────────────── Central Layer Map ──────────────
+# Chord keys must be sorted tuples of distinct keys; chord_tables.py rejects
+# anything else at import since the scanner can never produce it.
 layer_maps = {
     1: alpha,                                   # letters
     2: num_nav,                                 # numbers / navigation
@@ -179,3 +206,20 @@ layer_maps = {
     7: function,                                # F1 - F12
 }
 
+
+# ────────────── Split keyboard: right half ──────────────
+# Only used when c5k-left.py drives a second keypad (RIGHT_MCP).  Keys 5..9
+# are the right half's index, middle, ring, pinky and thumb; a chord may use
+# keys from both halves.  Entries are added to the layer of the same number.
+def _right(chords):
+    """The same chords played on the right half."""
+    return {tuple(k + 5 for k in combo): value for combo, value in chords.items()}
+
+split_right = _right(num_nav)                 # right hand: numbers and arrows
+split_right[(4, 9)] = Keycode.ENTER          # both thumbs
+split_right[(0, 5)] = Keycode.TAB            # both index fingers
+
+split_layer_maps = {
+    1: split_right,
+    2: _right(alpha),                        # right hand: letters
+}
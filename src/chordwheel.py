@@ -0,0 +1,220 @@
+# chordwheel.py
+# Renders a chord wheel SVG for every layer straight from
+# chords_config.layer_maps, so the pictures can't drift from the firmware.
+#
+#   python3 chordwheel.py                # all layers -> ../pics/chordwheel-layerN.svg
+#   python3 chordwheel.py --layers 1 5   # just these
+#   python3 chordwheel.py --force        # ignore the hashes, redraw everything
+#
+# Each wedge is one chord: a ring per finger, a marker where that finger is
+# pressed, and the action's name outside the wheel.  Layers render in a
+# process pool.  Each worker draws the rings, legend and axes once and reuses
+# them (and its separator/marker artists) for every layer it is handed.  A
+# layer is skipped when the hash of its chords matches the one recorded for
+# its existing SVG in chordwheel.json.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+from adafruit_hid.consumer_control_code import ConsumerControlCode
+from adafruit_hid.keycode import Keycode
+
+import chords_config
+from chord_tables import LAYERS, combo_mask
+
+HERE     = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR  = os.path.join(HERE, "..", "pics")
+HASHES   = "chordwheel.json"
+STYLE    = 1   # bump when the drawing changes, to redraw every layer
+
+# Rings from the inside out, as in the original wheels.  Key index per ring.
+FINGERS        = ["Pinky", "Ring", "Middle", "Index", "Thumb"]
+FINGER_KEYS    = [3, 2, 1, 0, 4]
+FINGER_COLORS  = ["#d62728", "#ff7f0e", "#ffdb58", "#2ca02c", "#1f77b4"]
+FINGER_MARKERS = ["o", "s", "^", "D", "*"]
+RING_RADII     = [2, 3, 4, 5, 6]
+LABEL_RADIUS   = RING_RADII[-1] + 1.1
+
+LAYER_TITLES = {
+    1: "Layer 1: Letters",
+    2: "Layer 2: Numbers & Arrows",
+    3: "Layer 3: Whitespace & Delimiters",
+    4: "Layer 4: Modifiers",
+    5: "Layer 5: Mouse",
+    6: "Layer 6: Media",
+    7: "Layer 7: F1 - F12",
+}
+
+
+# ─── Wedges from the config ──────────────────────────────────────────
+def _names(cls, used):
+    """Value -> attribute name, preferring the names chords_config uses."""
+    out = {}
+    for name in sorted(dir(cls)):
+        if not name.isupper():
+            continue
+        value = getattr(cls, name)
+        if value not in out or (name in used and out[value] not in used):
+            out[value] = name
+    return out
+
+
+def _config_names():
+    with open(os.path.join(HERE, "chords_config.py")) as f:
+        used = set(re.findall(r"(?:Keycode|ConsumerControlCode)\.(\w+)", f.read()))
+    buttons = {getattr(chords_config, n): n.replace("_BUTTON", "")
+               for n in dir(chords_config) if n.endswith("_BUTTON")}
+    return _names(Keycode, used), _names(ConsumerControlCode, used), buttons
+
+
+def _move_label(dx, dy):
+    if dx and dy:
+        return f"MOVE {dx:+d},{dy:+d}"
+    return "MOVE " + ("UP" if dy < 0 else "DOWN" if dy else
+                      "RIGHT" if dx > 0 else "LEFT")
+
+
+def layer_wedges(layer):
+    """[(label, mask)] for one layer, in config order."""
+    keys, consumer, buttons = _config_names()
+    lm = chords_config.layer_maps[layer]
+    if layer == 6:
+        return [(consumer.get(v, str(v)), combo_mask(c)) for c, v in lm.items()]
+    if layer != 5:
+        return [(keys.get(v, str(v)), combo_mask(c)) for c, v in lm.items()]
+    wedges = []
+    for c, (dx, dy) in lm["move"].items():
+        wedges.append((_move_label(dx, dy), combo_mask(c)))
+    for c, amt in lm["scroll"].items():
+        wedges.append(("SCROLL " + ("UP" if amt > 0 else "DOWN"), combo_mask(c)))
+    for name, verb in (("button", "CLICK"), ("hold", "HOLD"), ("release", "RELEASE")):
+        for c, b in lm[name].items():
+            wedges.append((f"{verb} {buttons.get(b, b)}", combo_mask(c)))
+    wedges.append(("ACCEL", combo_mask(lm["accel"])))
+    return wedges
+
+
+def wedge_hash(layer, wedges):
+    return hashlib.sha1(repr((STYLE, layer, wedges)).encode()).hexdigest()
+
+
+# ─── Drawing ─────────────────────────────────────────────────────────
+_base = None   # per worker: (fig, ax, separators, finger markers)
+
+
+def _build_base():
+    """The parts every wheel shares, drawn once per worker process."""
+    plt.rcParams["svg.hashsalt"] = "chordwheel"   # stable ids, stable diffs
+    fig, ax = plt.subplots(figsize=(12, 12), subplot_kw=dict(polar=True))
+    ax.set_theta_zero_location("N")
+    ax.set_theta_direction(-1)
+    ax.set_ylim(0, 7.5)
+    theta = np.linspace(0, 2 * np.pi, 500)
+    for color, r in zip(FINGER_COLORS, RING_RADII):
+        ax.fill_between(theta, r, r + 0.7, color=color, alpha=0.15)
+    legend = [Line2D([0], [0], marker=m, color="w", label=f, markerfacecolor=c,
+                     markeredgecolor="k", markersize=12, markeredgewidth=0.8)
+              for m, c, f in zip(FINGER_MARKERS, FINGER_COLORS, FINGERS)]
+    leg = ax.legend(handles=legend, loc="lower center", bbox_to_anchor=(0.5, -0.1),
+                    fontsize=12, frameon=False, ncol=5, title="Fingers")
+    leg.get_title().set_fontsize("14")
+    leg.get_title().set_fontweight("bold")
+    ax.grid(False)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    separators = LineCollection([], colors="lightgray", linewidths=0.8)
+    ax.add_collection(separators)
+    markers = [ax.plot([], [], m, markersize=18, color=c, markeredgecolor="k",
+                       markeredgewidth=0.8, linestyle="none")[0]
+               for m, c in zip(FINGER_MARKERS, FINGER_COLORS)]
+    return fig, ax, separators, markers
+
+
+def _label_align(angle):
+    if 3 * np.pi / 4 <= angle <= 5 * np.pi / 4:
+        return "right"
+    if np.pi / 4 < angle < 3 * np.pi / 4 or 5 * np.pi / 4 < angle < 7 * np.pi / 4:
+        return "center"
+    return "left"
+
+
+def render(job):
+    """Draw one layer into `path` on this worker's shared base figure."""
+    global _base
+    layer, wedges, path = job
+    if _base is None:
+        _base = _build_base()
+    fig, ax, separators, markers = _base
+
+    step = 2 * np.pi / len(wedges)
+    separators.set_segments([[(i * step, RING_RADII[0]), (i * step, RING_RADII[-1] + 0.7)]
+                             for i in range(len(wedges))])
+    for ring, marker in enumerate(markers):
+        bit = 1 << FINGER_KEYS[ring]
+        angles = [(i + 0.5) * step for i, (_, m) in enumerate(wedges) if m & bit]
+        marker.set_data(angles, [RING_RADII[ring] + 0.35] * len(angles))
+    size = 16 if max(len(label) for label, _ in wedges) <= 2 else 11
+    texts = [ax.text((i + 0.5) * step, LABEL_RADIUS, label, fontsize=size,
+                     fontweight="bold", ha=_label_align((i + 0.5) * step), va="center")
+             for i, (label, _) in enumerate(wedges)]
+    title = ax.set_title(LAYER_TITLES.get(layer, f"Layer {layer}"),
+                         fontsize=18, fontweight="bold", pad=40)
+
+    fig.savefig(path, format="svg", bbox_inches="tight", metadata={"Date": None})
+    for t in texts:
+        t.remove()
+    title.set_text("")
+    return layer, path
+
+
+# ─── Main ────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--layers", type=int, nargs="+", default=list(range(1, LAYERS + 1)))
+    ap.add_argument("--out", default=OUT_DIR, help="output directory")
+    ap.add_argument("--force", action="store_true", help="redraw unchanged layers")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes")
+    args = ap.parse_args()
+
+    hash_path = os.path.join(args.out, HASHES)
+    try:
+        with open(hash_path) as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        hashes = {}
+
+    jobs, digests = [], {}
+    for layer in args.layers:
+        wedges = layer_wedges(layer)
+        path = os.path.join(args.out, f"chordwheel-layer{layer}.svg")
+        digest = wedge_hash(layer, wedges)
+        if not args.force and hashes.get(str(layer)) == digest and os.path.exists(path):
+            print(f"layer {layer}: unchanged")
+            continue
+        jobs.append((layer, wedges, path))
+        digests[layer] = digest
+
+    if jobs:
+        os.makedirs(args.out, exist_ok=True)
+        workers = min(len(jobs), args.jobs or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for layer, path in pool.map(render, jobs):
+                hashes[str(layer)] = digests[layer]
+                print(f"layer {layer}: wrote {os.path.relpath(path)}")
+        with open(hash_path, "w") as f:
+            json.dump(hashes, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# fake_hw.py
+# Host-side stand-ins for the keypad hardware, so keyscan.py and the chord
+# logic can be exercised on a Linux box without a board attached.
+#
+#   bus = FakeI2C()
+#   mcp = FakeMCP23008(bus)          # registers itself at 0x20
+#   irq = FakeIntPin(mcp)            # what the nRF52840 sees on INT
+#   mcp.set_keys(0b00011)            # index + middle down
+#
+# FakeI2C counts transactions/bytes and the bus time they would take, which
+# is what the scan-mode comparisons care about.
+#
+# FakeSSD1306 is the status panel (status_display.py) on the same bus.
+#
+# FakeBLERadio stands in for adafruit_ble's BLERadio against a scanning host,
+# for timing reconnects (ble_link.py, ble-reconnect.py).
+
+import random
+
+from keyscan import (MCP_ADDRESS, IODIR, GPINTEN, DEFVAL, INTCON, IOCON,
+                     INTF, INTCAP, GPIO)
+
+_REG_COUNT = 11
+
+
+class FakeI2C:
+    """busio.I2C look-alike that routes transfers to fake devices."""
+
+    def __init__(self, frequency=400000):
+        self.frequency    = frequency
+        self.devices      = {}
+        self.transactions = 0
+        self.bytes        = 0
+        self.bus_time     = 0.0   # seconds the wire would have been busy
+        self._locked      = False
+
+    def attach(self, address, device):
+        self.devices[address] = device
+
+    def try_lock(self):
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def _account(self, nbytes, restarts=1):
+        # address byte per (re)start + payload, 9 clocks per byte
+        self.transactions += 1
+        self.bytes += nbytes
+        self.bus_time += (nbytes + restarts) * 9 / self.frequency
+
+    def _device(self, address):
+        try:
+            return self.devices[address]
+        except KeyError:
+            raise OSError(19, "No such device") from None
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        self._device(address).i2c_write(data)
+        self._account(len(data))
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        dev = self._device(address)
+        for i in range(start, end):
+            buffer[i] = dev.i2c_read()
+        self._account(end - start)
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *,
+                              out_start=0, out_end=None,
+                              in_start=0, in_end=None):
+        dev  = self._device(address)
+        data = bytes(buffer_out[out_start:out_end])
+        dev.i2c_write(data)
+        in_end = len(buffer_in) if in_end is None else in_end
+        for i in range(in_start, in_end):
+            buffer_in[i] = dev.i2c_read()
+        self._account(len(data) + in_end - in_start, restarts=2)
+
+
+class FakeMCP23008:
+    """Register-level MCP23008 model with the interrupt logic the firmware uses.
+
+    Keys are wired active-low against the internal pull-ups, so a held key
+    reads as 0 in GPIO/INTCAP.
+    """
+
+    def __init__(self, bus, address=MCP_ADDRESS):
+        self.bus     = bus
+        self.address = address
+        self.regs    = bytearray(_REG_COUNT)
+        self.regs[IODIR] = 0xFF
+        self.keys    = 0
+        self._ptr    = 0
+        self._port   = 0xFF
+        bus.attach(address, self)
+
+    # ─── physical side ──────────────────────────────────────────────
+    def set_keys(self, mask):
+        """Set which keys are physically held (bit i == key i)."""
+        self.keys = mask
+        port = ~mask & 0xFF
+        changed = port ^ self._port
+        self._port = port
+        regs = self.regs
+        enabled = regs[GPINTEN]
+        # INTCON=0 pins fire on any change, INTCON=1 pins on != DEFVAL.
+        fire = changed & enabled & ~regs[INTCON]
+        fire |= (port ^ regs[DEFVAL]) & enabled & regs[INTCON]
+        if fire:
+            if not regs[INTF]:
+                regs[INTCAP] = port
+            regs[INTF] |= fire
+
+    def press(self, key):
+        self.set_keys(self.keys | (1 << key))
+
+    def release(self, key):
+        self.set_keys(self.keys & ~(1 << key))
+
+    @property
+    def int_asserted(self):
+        return self.regs[INTF] != 0
+
+    def int_level(self):
+        """Electrical level of the INT pin (True == high)."""
+        active_high = self.regs[IOCON] & 0x02 and not self.regs[IOCON] & 0x04
+        return bool(active_high) == self.int_asserted
+
+    # ─── bus side ───────────────────────────────────────────────────
+    def _clear_int(self):
+        regs = self.regs
+        regs[INTF] = 0
+        still = (self._port ^ regs[DEFVAL]) & regs[GPINTEN] & regs[INTCON]
+        if still:
+            regs[INTCAP] = self._port
+            regs[INTF] = still
+
+    def i2c_write(self, data):
+        if not data:
+            return
+        self._ptr = data[0] % _REG_COUNT
+        for b in data[1:]:
+            if self._ptr not in (INTF, INTCAP):
+                self.regs[self._ptr] = b
+            self._advance()
+
+    def i2c_read(self):
+        reg = self._ptr
+        if reg == GPIO:
+            value = self._port
+            self._clear_int()
+        elif reg == INTCAP:
+            value = self.regs[INTCAP]
+            self._clear_int()
+        else:
+            value = self.regs[reg]
+        self._advance()
+        return value
+
+    def _advance(self):
+        if not self.regs[IOCON] & 0x20:       # SEQOP clear: auto-increment
+            self._ptr = (self._ptr + 1) % _REG_COUNT
+
+    def get_pin(self, pin):
+        return FakeExpanderPin(self, pin)
+
+
+class FakeExpanderPin:
+    """adafruit_mcp230xx DigitalInOut stand-in: each .value is a GPIO read."""
+
+    def __init__(self, mcp, pin):
+        self.mcp       = mcp
+        self.pin       = pin
+        self.direction = None
+        self.pull      = None
+        self._buf      = bytearray(1)
+
+    @property
+    def value(self):
+        bus = self.mcp.bus
+        bus.writeto_then_readfrom(self.mcp.address, bytes((GPIO,)), self._buf)
+        return bool(self._buf[0] & (1 << self.pin))
+
+
+class FakeIntPin:
+    """Controller-side DigitalInOut wired to the expander's INT pad."""
+
+    def __init__(self, mcp):
+        self.mcp       = mcp
+        self.direction = None
+        self.pull      = None
+
+    @property
+    def value(self):
+        return self.mcp.int_level()
+
+
+class FakeSSD1306:
+    """SSD1306 display RAM behind its I2C interface: commands after a 0x00
+    control byte (only the column/page window ones do anything here), RAM
+    data after 0x40, written through the window in horizontal order."""
+
+    def __init__(self, bus, address=0x3C, width=128, pages=4):
+        self.width  = width
+        self.pages  = pages
+        self.ram    = bytearray(width * pages)
+        self.cols   = (0, width - 1)
+        self.rows   = (0, pages - 1)
+        self.col    = 0
+        self.page   = 0
+        self.data_bytes = 0
+        bus.attach(address, self)
+
+    def i2c_write(self, data):
+        if not data:
+            return
+        if data[0] == 0x40:
+            for b in data[1:]:
+                self.ram[self.page * self.width + self.col] = b
+                self.data_bytes += 1
+                self.col += 1
+                if self.col > self.cols[1]:
+                    self.col = self.cols[0]
+                    self.page = self.page + 1 if self.page < self.rows[1] else self.rows[0]
+            return
+        cmd = data[1:]
+        i = 0
+        while i < len(cmd):
+            c = cmd[i]
+            if c in (0x21, 0x22) and i + 2 < len(cmd):
+                if c == 0x21:
+                    self.cols = (cmd[i + 1], cmd[i + 2])
+                    self.col  = cmd[i + 1]
+                else:
+                    self.rows = (cmd[i + 1], cmd[i + 2])
+                    self.page = cmd[i + 1]
+                i += 3
+            elif c in (0x20, 0x81, 0x8D, 0xA8, 0xD3, 0xD5, 0xD9, 0xDA, 0xDB):
+                i += 2          # one argument byte
+            else:
+                i += 1
+
+    def i2c_read(self):
+        return 0
+
+    def text(self):
+        """The RAM as rows of '#' and ' ', for eyeballing in a terminal."""
+        rows = []
+        for y in range(self.pages * 8):
+            page, bit = divmod(y, 8)
+            row = self.ram[page * self.width:(page + 1) * self.width]
+            rows.append("".join("#" if b >> bit & 1 else " " for b in row).rstrip())
+        return "\n".join(rows)
+
+
+class FakeBLERadio:
+    """adafruit_ble BLERadio look-alike with a scanning host on the far end.
+
+    The host scans `window` seconds out of every `scan_interval` seconds,
+    from `host_awake` on, at a random point in its scan cycle.  An advertising event (every interval plus the
+    spec's random 0-10 ms advDelay) is heard if it falls inside a scan
+    window.  The link is up `setup` seconds later, which covers the connect
+    plus bonded re-encryption.  drop() loses the link, with the host
+    scanning again after `host_delay`."""
+
+    def __init__(self, clock, scan_interval=1.0, window=1.0, setup=0.05,
+                 host_awake=0.0, seed=0):
+        self.clock         = clock
+        self.scan_interval = scan_interval
+        self.window        = window
+        self.setup         = setup
+        self.host_awake    = host_awake
+        self.rng           = random.Random(seed)
+        self.phase         = self.rng.uniform(0, scan_interval)
+        self._up           = False
+        self._adv_start    = None
+        self._interval     = 0.1
+        self._connect_at   = None
+        self.adverts       = 0      # advertising events sent before connecting
+
+    def _heard(self, t):
+        if t < self.host_awake:
+            return False
+        return (t - self.host_awake + self.phase) % self.scan_interval < self.window
+
+    def _resolve(self):
+        if self._up or self._adv_start is None:
+            return
+        if self._connect_at is None:
+            t = self._adv_start
+            n = 1
+            while not self._heard(t) and n < 1000000:
+                t += self._interval + self.rng.uniform(0, 0.01)
+                n += 1
+            self._connect_at = t + self.setup
+            self._events = n
+        if self.clock() >= self._connect_at:
+            self._up = True
+            self.adverts += self._events
+            self._adv_start = None
+
+    @property
+    def connected(self):
+        self._resolve()
+        return self._up
+
+    @property
+    def advertising(self):
+        self._resolve()
+        return self._adv_start is not None
+
+    def start_advertising(self, advertisement, scan_response=None, interval=0.1,
+                          timeout=None):
+        self._adv_start  = self.clock()
+        self._interval   = interval
+        self._connect_at = None
+
+    def stop_advertising(self):
+        self._resolve()
+        if self._adv_start is not None and self._connect_at is not None:
+            # count what went out before the stop
+            elapsed = self.clock() - self._adv_start
+            self.adverts += int(elapsed / (self._interval + 0.005)) + 1
+        self._adv_start  = None
+        self._connect_at = None
+
+    def drop(self, host_delay=0.0):
+        self._up = False
+        self.host_awake = self.clock() + host_delay
+        self.phase = self.rng.uniform(0, self.scan_interval)
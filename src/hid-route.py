@@ -0,0 +1,146 @@
+# hid-route.py
+# Keystroke latency over BLE, over USB, and with the cable plugged in and
+# pulled out while typing.  hid_transport.Router picks the link the way
+# c5k-left.py runs it, in front of fake hosts.  A BLE host hears a report
+# at its next connection event; a USB host at its next 1 ms poll.
+#
+#   python3 hid-route.py
+#   python3 hid-route.py --chords 2000 --profile fast --hold 0.3 1.0
+#
+# Latency runs from a chord's first press to the host seeing its key.
+# In the "plug/pull" run the cable comes and goes every --hold seconds.
+# Pulling it makes the send in flight fail, and that op then goes out over
+# BLE.  lost and extra compare the keys the hosts got, in order, with a
+# run sending straight to one host; both should stay at 0 through every
+# switch.
+
+import argparse
+import difflib
+import random
+
+from chord_sim import (FakeClock, HIDLog, RecKeyboard, RecMouse, RecConsumer,
+                       Sim, PROFILES, key_downs, layer_trace, percentile, replay,
+                       score)
+from hid_transport import Router, Transport
+
+USB_POLL     = 0.001    # full-speed HID interrupt endpoint
+BLE_INTERVAL = 0.015    # shortest connection interval hosts grant a keyboard
+ENUMERATE    = 0.5      # s from plugging in to the host enumerating the board
+
+
+class LinkLog(HIDLog):
+    """A host's view: each report is stamped with the time it arrives, at
+    the link's next poll or connection event.  With the cable out a send
+    raises OSError, as usb_hid does."""
+
+    def __init__(self, clock, period, phase, cabled):
+        super().__init__(clock)
+        self.period = period
+        self.phase  = phase
+        self.cabled = cabled
+
+    def add(self, device, data):
+        t = self.clock.t
+        if not self.cabled(t):
+            raise OSError("USB not connected")
+        t += self.period - (t - self.phase) % self.period
+        self.reports.append((t, device, data))
+
+
+class FakeLink:
+    """One host behind one link.  `plugged` is a list of (time, up) cable
+    changes; without it the link is always up."""
+
+    def __init__(self, name, clock, period, plugged=None, rng=None):
+        self.clock   = clock
+        self.plugged = plugged
+        self.log     = LinkLog(clock, period, rng.uniform(0, period), self.cabled)
+        log = self.log
+        self.transport = Transport(name, lambda: RecKeyboard(log),
+                                   lambda: RecMouse(log), lambda: RecConsumer(log),
+                                   self.up)
+
+    def cabled(self, t):
+        if self.plugged is None:
+            return True
+        up = False
+        for at, state in self.plugged:
+            if at > t:
+                break
+            up = state
+        return up
+
+    def up(self):
+        # the firmware only sees the host once it has enumerated the board
+        t = self.clock.t
+        return self.cabled(t) and self.cabled(t - ENUMERATE)
+
+
+def plug_schedule(end, hold, rng):
+    changes = []
+    t = rng.uniform(*hold)
+    up = True
+    while t < end:
+        changes.append((t, up))
+        up = not up
+        t += rng.uniform(*hold)
+    return changes
+
+
+def run(mode, edges, expected, direct, hold, seed):
+    rng = random.Random(seed)
+    clock = FakeClock()
+    end = edges[-1][0] + 1.0
+    links = [FakeLink("ble", clock, BLE_INTERVAL, rng=rng)]
+    if mode == "usb":
+        links.insert(0, FakeLink("usb", clock, USB_POLL, rng=rng))
+    elif mode == "plug/pull":
+        links.insert(0, FakeLink("usb", clock, USB_POLL,
+                                 plug_schedule(end, hold, rng), rng=rng))
+    router = Router([link.transport for link in links], clock=clock.monotonic,
+                    clock_ns=lambda: int(clock.t * 1e9))
+    Sim(clock=clock, router=router).run(edges, tail=1.0)
+    # merge the hosts' keystrokes; each host's reports only make sense alone
+    downs = sorted(d for link in links for d in key_downs(link.log.reports))
+    reports = []
+    for t, k in downs:
+        reports += [(t, "kbd", (k,)), (t, "kbd", ())]
+    result = score(expected, reports)
+    result["router"] = router
+    result["lost"] = result["extra"] = 0
+    typed = [k for _, k in downs]
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, direct, typed).get_opcodes():
+        if op != "equal":
+            result["lost"]  += i2 - i1
+            result["extra"] += j2 - j1
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--chords", type=int, default=1000)
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="average")
+    ap.add_argument("--hold", type=float, nargs=2, default=[0.5, 2.0],
+                    help="seconds the cable stays in / out (min max)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    edges, expected = layer_trace(1, args.chords, PROFILES[args.profile], seed=args.seed)
+    direct = [k for _, k in key_downs(replay(edges, tail=1.0).reports)]
+    print(f"{args.chords} chords, {args.profile} typist\n")
+    print(f"{'link':10} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}  "
+          f"{'lost':>5} {'extra':>5}  switches  failed sends")
+    for mode in ("ble", "usb", "plug/pull"):
+        r = run(mode, edges, expected, direct, args.hold, args.seed)
+        lat = r["latencies"]
+        mean = sum(lat) / len(lat) if lat else 0.0
+        router = r["router"]
+        failed = sum(t.failures for t in router.transports)
+        print(f"{mode:10} {mean * 1000:6.1f}ms {percentile(lat, 50) * 1000:6.1f}ms "
+              f"{percentile(lat, 95) * 1000:6.1f}ms {max(lat, default=0) * 1000:6.1f}ms  "
+              f"{r['lost']:5d} {r['extra']:5d}  "
+              f"{router.switches:8d}  {failed:12d}")
+
+
+if __name__ == "__main__":
+    main()
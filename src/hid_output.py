@@ -0,0 +1,224 @@
+# hid_output.py
+# Queue between the chord engine and the HID devices.  The engine talks to
+# .keyboard/.mouse/.cc exactly as it would to the adafruit_hid objects, but
+# the calls are recorded into a preallocated ring and replayed on the real
+# devices by drain() -- from the asyncio output task on the board, or once
+# per pass in the host simulator.  A slow BLE report then never holds up the
+# scan task.
+#
+# Replay also batches keyboard output.  The engine taps every key as press +
+# release_all, which is two reports.  When the next queued op is another
+# press that can share a report (same modifiers, a key not already down,
+# room in the 6-key array), the release is skipped and the new key is added
+# to the held ones.  Each key still appears in exactly one new report, so
+# the host sees the same keystrokes in the same order.  The typed word
+# "them" is then [t] [t h] [t h e] [t h e m] [] -- five reports, not eight.
+#
+# With lazy=True the mouse and consumer-control arguments are factories,
+# called the first time an op for that device is sent.
+
+import asyncio
+import time
+
+# ─── Queued operations ───────────────────────────────────────────────
+K_PRESS       = 1   # a: keycode tuple
+K_RELEASE_ALL = 2
+M_CLICK       = 3   # a: buttons
+M_MOVE        = 4   # a, b, c: x, y, wheel
+M_PRESS       = 5   # a: buttons
+M_RELEASE     = 6   # a: buttons
+C_SEND        = 7   # a: consumer code
+
+MAX_KEYS      = 6      # boot keyboard report: 6 keycodes + modifier byte
+MODIFIER_MIN  = 0xE0   # Keycode.LEFT_CONTROL .. RIGHT_GUI are 0xE0..0xE7
+
+
+class _Keyboard:
+    def __init__(self, q):
+        self.q = q
+
+    def press(self, *keycodes):
+        self.q.put(K_PRESS, keycodes)
+
+    def release_all(self):
+        self.q.put(K_RELEASE_ALL)
+
+
+class _Mouse:
+    def __init__(self, q):
+        self.q = q
+
+    def click(self, buttons):
+        self.q.put(M_CLICK, buttons)
+
+    def move(self, x=0, y=0, wheel=0):
+        self.q.put(M_MOVE, x, y, wheel)
+
+    def press(self, buttons):
+        self.q.put(M_PRESS, buttons)
+
+    def release(self, buttons):
+        self.q.put(M_RELEASE, buttons)
+
+
+class _Consumer:
+    def __init__(self, q):
+        self.q = q
+
+    def send(self, code):
+        self.q.put(C_SEND, code)
+
+
+class HIDQueue:
+    def __init__(self, keyboard, mouse, cc, depth=32, batch=True,
+                 clock=time.monotonic, lazy=False):
+        self.devices  = [keyboard, mouse, cc]
+        self._unopened = [False, lazy, lazy]
+        self.batch    = batch
+        self.clock    = clock
+        self.keyboard = _Keyboard(self)
+        self.mouse    = _Mouse(self)
+        self.cc       = _Consumer(self)
+        self._op  = bytearray(depth)
+        self._a   = [0] * depth
+        self._b   = [0] * depth
+        self._c   = [0] * depth
+        self._head  = 0
+        self._count = 0
+        self.overflows = 0
+        self.online    = True   # False while the BLE link is down
+        self.ready = asyncio.Event()
+        # keyboard state as last sent, for batching
+        self._held  = bytearray(MAX_KEYS)
+        self._nheld = 0
+        self._mods  = 0
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.reports = 0      # HID reports sent (all devices)
+        self.merged  = 0      # keyboard releases folded into the next press
+        self.busy    = 0.0    # seconds spent inside device sends
+        self.dropped = 0      # ops discarded while offline
+
+    def __len__(self):
+        return self._count
+
+    def pause(self):
+        """Link lost: discard what is queued and anything put until resume()."""
+        self.online = False
+        self.dropped += self._count
+        self._head  = 0
+        self._count = 0
+        self._nheld = 0
+        self._mods  = 0
+
+    def resume(self):
+        """Link back: start the host from a clean, all-released state."""
+        keyboard, mouse, _ = self.devices
+        keyboard.release_all()
+        if not self._unopened[1]:
+            mouse.release_all()
+        self.online = True
+
+    def _open(self, n):
+        dev = self.devices[n] = self.devices[n]()
+        self._unopened[n] = False
+        return dev
+
+    def put(self, op, a=0, b=0, c=0):
+        if not self.online:
+            self.dropped += 1
+            return
+        depth = len(self._op)
+        if self._count == depth:
+            # The output task has fallen behind.  Dropping an op could strand
+            # a pressed key, so send the backlog inline instead.
+            self.overflows += 1
+            self.drain()
+        i = (self._head + self._count) % depth
+        self._op[i] = op
+        self._a[i] = a
+        self._b[i] = b
+        self._c[i] = c
+        self._count += 1
+        self.ready.set()
+
+    def _fits(self, keys):
+        """True if pressing `keys` can share a report with the held keys."""
+        mods = 0
+        n = self._nheld
+        held = self._held
+        for k in keys:
+            if k >= MODIFIER_MIN:
+                mods |= 1 << (k - MODIFIER_MIN)
+                continue
+            for j in range(self._nheld):
+                if held[j] == k:
+                    return False
+            n += 1
+        return mods == self._mods and n <= MAX_KEYS
+
+    def _pressed(self, keys):
+        for k in keys:
+            if k >= MODIFIER_MIN:
+                self._mods |= 1 << (k - MODIFIER_MIN)
+            elif self._nheld < MAX_KEYS:
+                self._held[self._nheld] = k
+                self._nheld += 1
+
+    def drain(self):
+        """Send everything queued, oldest first."""
+        if not self._count:
+            return
+        keyboard, mouse, cc = self.devices
+        depth = len(self._op)
+        start = self.clock()
+        while self._count:
+            i = self._head
+            self._head = (i + 1) % depth
+            self._count -= 1
+            op, a = self._op[i], self._a[i]
+            self._a[i] = 0
+            if op == K_PRESS:
+                keyboard.press(*a)
+                self._pressed(a)
+            elif op == K_RELEASE_ALL:
+                nxt = self._head
+                if (self.batch and self._count and self._op[nxt] == K_PRESS
+                        and self._fits(self._a[nxt])):
+                    self.merged += 1
+                    continue
+                keyboard.release_all()
+                self._nheld = 0
+                self._mods  = 0
+            elif op <= M_RELEASE:
+                if self._unopened[1]:
+                    mouse = self._open(1)
+                if op == M_CLICK:
+                    mouse.click(a)
+                elif op == M_MOVE:
+                    mouse.move(a, self._b[i], self._c[i])
+                elif op == M_PRESS:
+                    mouse.press(a)
+                else:
+                    mouse.release(a)
+            elif op == C_SEND:
+                if self._unopened[2]:
+                    cc = self._open(2)
+                cc.send(a)
+            self.reports += 2 if op == M_CLICK or op == C_SEND else 1
+        self.busy += self.clock() - start
+
+    def dump(self, out=print):
+        rate = self.reports / self.busy if self.busy > 0 else 0.0
+        out(f"hid: {self.reports} reports, {self.merged} releases merged, "
+            f"{rate:.0f} reports/s while sending, {self.overflows} overflows, "
+            f"{self.dropped} dropped offline")
+
+    async def run(self):
+        """Output task: wait for work, send it, repeat."""
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            self.drain()
+            await asyncio.sleep(0)
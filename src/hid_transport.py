@@ -0,0 +1,221 @@
+# hid_transport.py
+# HID output over USB or BLE, whichever is best right now.  Over BLE every
+# report waits for the next connection event (15 ms at best); over USB the
+# host polls every 1 ms.  So when the board is plugged in and enumerated,
+# output goes over USB, and it goes back to BLE when the cable comes out.
+#
+# Router looks like the three adafruit_hid devices (.keyboard, .mouse, .cc)
+# and hid_output.HIDQueue drains into it.  Each call goes to the active
+# Transport.  poll() (from c5k-left.py's link task) picks the preferred link
+# that is up.  The route only changes between chords, when nothing is held
+# down on the old link, so a batched key or a mouse drag is never split
+# across two hosts.  When a send fails (cable pulled mid-chord) that link
+# is dropped at once and the same op goes out on the next one.  No
+# keystroke is lost unless no link is up at all.
+#
+# Devices are built from factories on first use.  adafruit_hid's Keyboard
+# raises if it is built before USB enumerates, and most sessions never use
+# the mouse or media keys.  Each transport keeps a histogram of the time
+# spent inside its sends; `s` on the serial console prints:
+#
+#   hid route: usb, 3 switches, 1 failed sends, 0 lost
+#   usb_send: n=412 min=0.1 avg=0.4 max=1.1 ms
+#   ble_send: n=96 min=0.3 avg=1.2 max=7.9 ms
+
+import time
+
+from hid_output import (K_PRESS, K_RELEASE_ALL, M_CLICK, M_MOVE, M_PRESS,
+                        M_RELEASE, C_SEND)
+from latency_stats import Histogram
+
+M_RELEASE_ALL = 8    # after hid_output's ops; only HIDQueue.resume() sends it
+
+RETRY = 1.0          # s a link is skipped after a failed send
+
+
+class Transport:
+    """One link: factories for its keyboard, mouse and consumer control,
+    and `up`, a callable that says whether the link can send right now."""
+
+    def __init__(self, name, keyboard, mouse, cc, up):
+        self.name      = name
+        self.factories = (keyboard, mouse, cc)
+        self.devices   = [None, None, None]
+        self.up        = up
+        self.send      = Histogram(f"{name}_send")
+        self.failed_at = None     # last failed send; skipped for RETRY s after
+        self.failures  = 0
+
+    def device(self, n):
+        dev = self.devices[n]
+        if dev is None:
+            dev = self.devices[n] = self.factories[n]()
+        return dev
+
+
+class _Keyboard:
+    def __init__(self, router):
+        self.router = router
+
+    def press(self, *keycodes):
+        self.router.send(K_PRESS, keycodes)
+
+    def release_all(self):
+        self.router.send(K_RELEASE_ALL)
+
+
+class _Mouse:
+    def __init__(self, router):
+        self.router = router
+
+    def click(self, buttons):
+        self.router.send(M_CLICK, buttons)
+
+    def move(self, x=0, y=0, wheel=0):
+        self.router.send(M_MOVE, x, y, wheel)
+
+    def press(self, buttons):
+        self.router.send(M_PRESS, buttons)
+
+    def release(self, buttons):
+        self.router.send(M_RELEASE, buttons)
+
+    def release_all(self):
+        self.router.send(M_RELEASE_ALL)
+
+
+class _Consumer:
+    def __init__(self, router):
+        self.router = router
+
+    def send(self, code):
+        self.router.send(C_SEND, code)
+
+
+class Router:
+    def __init__(self, transports, clock=time.monotonic,
+                 clock_ns=time.monotonic_ns):
+        self.transports = transports    # most preferred first
+        self.clock      = clock
+        self.clock_ns   = clock_ns
+        self.want    = None     # the link poll() picked
+        self.active  = None     # the link sends go to
+        self.keys    = False    # keys down on the active link
+        self.buttons = 0        # mouse buttons down on it
+        self.keyboard = _Keyboard(self)
+        self.mouse    = _Mouse(self)
+        self.cc       = _Consumer(self)
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.switches = 0
+        self.lost     = 0       # ops with no link to go to
+        for t in self.transports:
+            t.failures = 0
+            t.send.reset()
+
+    @property
+    def online(self):
+        return self.want is not None
+
+    @property
+    def name(self):
+        return self.want.name if self.want else None
+
+    def _usable(self, t, now):
+        return (t.failed_at is None or now - t.failed_at >= RETRY) and t.up()
+
+    def poll(self, now):
+        """Pick the preferred link that is up.  The switch itself waits for
+        the next op with nothing held, unless the active link is gone."""
+        want = None
+        for t in self.transports:
+            if self._usable(t, now):
+                want = t
+                break
+        self.want = want
+        if want is not self.active and not (self.keys or self.buttons):
+            self._switch(want)
+
+    def _switch(self, t):
+        old = self.active
+        if (old is not None and (self.keys or self.buttons)
+                and self._usable(old, self.clock())):
+            # nothing may stay pressed on the host we leave
+            try:
+                if self.keys:
+                    old.device(0).release_all()
+                if self.buttons:
+                    old.device(1).release_all()
+            except OSError:
+                pass
+        self.active  = t
+        self.keys    = False
+        self.buttons = 0
+        if t is None:
+            return
+        self.switches += 1
+        # the devices may still hold a report from the last time this link
+        # was used (or a send that failed half-way); start the host clean
+        try:
+            for dev in t.devices[0], t.devices[1]:
+                if dev is not None:
+                    dev.release_all()
+        except OSError:
+            pass
+
+    def send(self, op, a=0, b=0, c=0):
+        """Send one op on the active link.  A link whose send fails is
+        skipped from then on (for RETRY s) and the op goes again on the
+        next one."""
+        while True:
+            t = self.active
+            if t is not self.want and not (self.keys or self.buttons):
+                self._switch(self.want)
+                t = self.active
+            if t is None:
+                self.lost += 1
+                return
+            start = self.clock_ns()
+            try:
+                self._send(t, op, a, b, c)
+            except OSError:
+                t.failures += 1
+                t.failed_at = self.clock()
+                self.keys    = False    # the host lets go when the link drops
+                self.buttons = 0
+                self.poll(t.failed_at)
+                continue
+            t.send.record((self.clock_ns() - start) / 1e9)
+            return
+
+    def _send(self, t, op, a, b, c):
+        if op == K_PRESS:
+            t.device(0).press(*a)
+            self.keys = True
+        elif op == K_RELEASE_ALL:
+            t.device(0).release_all()
+            self.keys = False
+        elif op == C_SEND:
+            t.device(2).send(a)
+        elif op == M_MOVE:
+            t.device(1).move(a, b, c)
+        elif op == M_CLICK:
+            t.device(1).click(a)
+        elif op == M_PRESS:
+            t.device(1).press(a)
+            self.buttons |= a
+        elif op == M_RELEASE:
+            t.device(1).release(a)
+            self.buttons &= ~a
+        elif op == M_RELEASE_ALL:
+            if t.devices[1] is not None:
+                t.devices[1].release_all()
+            self.buttons = 0
+
+    def dump(self, out=print):
+        failures = sum(t.failures for t in self.transports)
+        out(f"hid route: {self.name or 'none'}, {self.switches} switches, "
+            f"{failures} failed sends, {self.lost} lost")
+        for t in self.transports:
+            t.send.dump(out)
@@ -0,0 +1,242 @@
+# keyscan.py
+# Key-state sources for c5k-left.py.  Every scanner reports the keypad as a
+# 5-bit mask (bit i set == key i held) and queues timestamped edges so the
+# chord logic sees each transition in the order it happened.
+#
+# Nothing in here touches board/busio directly, so the same code runs against
+# the fakes in fake_hw.py on a Linux host.
+#
+# SplitScanner joins two halves (a second MCP23008 on the same bus) into one
+# 10-bit mask, the right half in bits 5..9.
+
+from latency_stats import Histogram
+
+KEY_COUNT = 5
+KEY_BITS  = (1 << KEY_COUNT) - 1
+RIGHT_MCP_ADDRESS = 0x21   # A0 strapped high on the right-hand keypad
+
+# ─── MCP23008 registers ──────────────────────────────────────────────
+MCP_ADDRESS = 0x20
+IODIR   = 0x00
+IPOL    = 0x01
+GPINTEN = 0x02
+DEFVAL  = 0x03
+INTCON  = 0x04
+IOCON   = 0x05
+GPPU    = 0x06
+INTF    = 0x07
+INTCAP  = 0x08
+GPIO    = 0x09
+
+IOCON_ODR = 0x04   # INT pin open-drain (needs the controller-side pull-up)
+
+
+class Registers:
+    """Raw register access to one MCP23008, with preallocated buffers."""
+
+    def __init__(self, i2c, address=MCP_ADDRESS):
+        self.i2c     = i2c
+        self.address = address
+        self._out    = bytearray(2)
+        self.buf     = bytearray(3)
+
+    def write(self, reg, value):
+        self._out[0] = reg
+        self._out[1] = value
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto(self.address, self._out)
+        finally:
+            self.i2c.unlock()
+
+    def read(self, reg, count=1):
+        # Sequential reads (IOCON.SEQOP=0) walk consecutive registers, so
+        # INTF/INTCAP/GPIO come back in one transaction.
+        self._out[0] = reg
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto_then_readfrom(
+                self.address, self._out, self.buf,
+                out_end=1, in_end=count)
+        finally:
+            self.i2c.unlock()
+        return self.buf
+
+
+class Scanner:
+    """Common edge queue; subclasses implement poll(now)."""
+
+    def __init__(self, depth=16):
+        self.mask    = 0
+        self.edges   = 0          # transitions seen since boot
+        self.dropped = 0          # edges overwritten before pop()
+        self._times  = [0.0] * depth
+        self._masks  = bytearray(depth)
+        self._head   = 0
+        self._count  = 0
+
+    def _push(self, now, mask):
+        if mask == self.mask:
+            return
+        self.mask = mask
+        self.edges += 1
+        depth = len(self._masks)
+        if self._count == depth:
+            self._head = (self._head + 1) % depth
+            self._count -= 1
+            self.dropped += 1
+        i = (self._head + self._count) % depth
+        self._times[i] = now
+        self._masks[i] = mask
+        self._count += 1
+
+    @property
+    def pending(self):
+        return self._count
+
+    def peek(self):
+        """Timestamp of the oldest queued edge."""
+        return self._times[self._head]
+
+    def pop(self):
+        """Mask of the oldest queued edge, removing it; peek() first for its
+        timestamp.  Two calls rather than a tuple, so the scan loop doesn't
+        allocate."""
+        i = self._head
+        self._head = (i + 1) % len(self._masks)
+        self._count -= 1
+        return self._masks[i]
+
+    def poll(self, now):
+        raise NotImplementedError
+
+
+class PinScanner(Scanner):
+    """Reads every key through its own DigitalInOut (one I2C read per key)."""
+
+    def __init__(self, pins, depth=16):
+        super().__init__(depth)
+        self.pins = pins
+
+    def poll(self, now):
+        mask = 0
+        pins = self.pins
+        for i in range(len(pins)):
+            if not pins[i].value:
+                mask |= 1 << i
+        self._push(now, mask)
+
+
+class RegisterScanner(Scanner):
+    """Reads all five keys with a single GPIO register read per poll."""
+
+    def __init__(self, i2c, address=MCP_ADDRESS, depth=16):
+        super().__init__(depth)
+        self.regs = Registers(i2c, address)
+        self.regs.write(IODIR, 0xFF)
+        self.regs.write(GPPU, KEY_BITS)
+        self.regs.write(IPOL, 0x00)
+        self.mask = ~self.regs.read(GPIO)[0] & KEY_BITS
+
+    def poll(self, now):
+        self._push(now, ~self.regs.read(GPIO)[0] & KEY_BITS)
+
+
+class InterruptScanner(Scanner):
+    """Edge-driven scan off the MCP23008 INT line.
+
+    GPINTEN/INTCON are set so any key change asserts INT (active low,
+    open-drain).  poll() only reads the controller pin while INT is idle; on
+    an edge it reads INTF, INTCAP and GPIO in one burst, queues the captured
+    state and, if the keys moved again before we got there, the current one.
+    """
+
+    def __init__(self, i2c, int_pin, address=MCP_ADDRESS, depth=16):
+        super().__init__(depth)
+        self.int_pin = int_pin
+        self.regs    = Registers(i2c, address)
+        self.irqs    = 0          # INT assertions serviced
+        regs = self.regs
+        regs.write(IODIR, 0xFF)
+        regs.write(GPPU, KEY_BITS)
+        regs.write(IPOL, 0x00)
+        regs.write(IOCON, IOCON_ODR)
+        regs.write(INTCON, 0x00)          # compare against previous value
+        regs.write(GPINTEN, KEY_BITS)
+        # Clear anything latched during setup and take the starting state.
+        buf = regs.read(INTF, 3)
+        self.mask = ~buf[2] & KEY_BITS
+
+    def poll(self, now):
+        if self.int_pin.value:            # INT idle: nothing changed
+            return
+        buf = self.regs.read(INTF, 3)     # INTF, INTCAP, GPIO
+        self.irqs += 1
+        self._push(now, ~buf[1] & KEY_BITS)
+        self._push(now, ~buf[2] & KEY_BITS)
+
+
+class SplitScanner(Scanner):
+    """Left and right halves (any two scanners) as one 10-bit mask.
+
+    Both halves are read back to back in every poll() and edges they saw at
+    the same timestamp go out as a single edge, so the engine never sees half
+    of a snapshot.  `skew` is how much later the right half was sampled than
+    the left (its read time, by `clock`, a nanosecond counter such as
+    time.monotonic_ns); `cross` is how far apart the two hands started a
+    chord that spans both halves."""
+
+    def __init__(self, left, right, clock=None, depth=16):
+        super().__init__(depth)
+        self._masks = [0] * depth          # 10 bits doesn't fit a bytearray
+        self.left   = left
+        self.right  = right
+        self.clock  = clock
+        self.skew   = Histogram("split_skew")
+        self.cross  = Histogram("cross_half")
+        self._left  = left.mask
+        self._right = right.mask
+        self._left_at  = -1.0              # first left press of this chord
+        self._right_at = -1.0
+        self.mask = self._left | self._right << KEY_COUNT
+
+    def poll(self, now):
+        left, right = self.left, self.right
+        clock = self.clock
+        left.poll(now)
+        if clock:
+            t = clock()
+            right.poll(now)
+            self.skew.record((clock() - t) / 1e9)
+        else:
+            right.poll(now)
+        while left.pending or right.pending:
+            if not right.pending or (left.pending and left.peek() <= right.peek()):
+                t = left.peek()
+            else:
+                t = right.peek()
+            if left.pending and left.peek() == t:
+                self._left = left.pop()
+            if right.pending and right.peek() == t:
+                self._right = right.pop()
+            self._note(t)
+            self._push(t, self._left | self._right << KEY_COUNT)
+
+    def _note(self, t):
+        lm, rm = self._left, self._right
+        if not (lm or rm):
+            self._left_at = self._right_at = -1.0
+            return
+        both = self._left_at >= 0 and self._right_at >= 0
+        if lm and self._left_at < 0:
+            self._left_at = t
+        if rm and self._right_at < 0:
+            self._right_at = t
+        if not both and self._left_at >= 0 and self._right_at >= 0:
+            self.cross.record(abs(self._right_at - self._left_at))
+
+    def dump(self, out=print):
+        self.skew.dump(out)
+        self.cross.dump(out)
@@ -0,0 +1,233 @@
+# keytrace.py
+# Opt-in keystroke trace for "it ate my keystroke" reports.  The engine logs
+# every raw key-mask transition and every action it resolves into a
+# preallocated ring buffer; c5k-left.py appends the buffer to a file on
+# CIRCUITPY in one write once the keys have been idle for a while.
+# trace-analyze.py reads the file back on a desktop.
+#
+# CircuitPython can only write CIRCUITPY when boot.py remounts it
+# (storage.remount("/", readonly=False)), which makes it read-only over USB.
+# Without that the first flush fails and the recorder switches itself off.
+#
+# File: MAGIC, then records.  Each starts with a tag byte (top two bits the
+# record type) and the ms since the previous record as a LEB128 varint:
+#
+#   EDGE    000mmmmm  [delta]          keys now held, mask bits 0..4
+#           001mmmmm  [delta] [hi]     split keyboard: bits 5..9 follow
+#   ACTION  01 layer  [delta] [mask] [code]   chord sent; code = keycode,
+#                                             consumer code, button or 0
+#   LAYER   10 layer  [delta]          thumb taps switched layers
+#   MARK    11 kind   [delta] [arg]    SESSION (boot: time restarts at 0),
+#                                      GAP (arg records lost, buffer full)
+#
+# A keystroke is two or three bytes; an hour of steady typing is ~100 kB.
+
+MAGIC = b"C5R\x01"
+
+EDGE   = 0x00
+ACTION = 0x40
+LAYER  = 0x80
+MARK   = 0xC0
+
+SESSION = 0
+GAP     = 1
+
+BUFFER     = 4096        # bytes of RAM for records not yet written
+MAX_FILE   = 1000000     # stop recording once the file reaches this size
+IDLE_FLUSH = 2.0         # s with no keys held before the buffer is written
+FULL_FLUSH = 0.75        # ...or as soon as no keys are held, past this full
+
+
+class TraceRecorder:
+    def __init__(self, path, size=BUFFER, max_file=MAX_FILE):
+        self.path     = path
+        self.max_file = max_file
+        self.buf      = bytearray(size)
+        self.head     = 0         # oldest unwritten byte
+        self.count    = 0         # unwritten bytes
+        self.last_ms  = 0         # time of the last record
+        self.last_t   = 0.0
+        self.dropped  = 0         # records lost since the last GAP mark
+        self.written  = 0
+        self.enabled  = True
+        self._rec     = bytearray(16)
+        self._n       = 0
+        try:
+            import os
+            self.written = os.stat(path)[6]
+        except OSError:
+            self.written = 0
+        if not self.written:
+            self._raw(MAGIC)
+        self._begin(MARK | SESSION, 0)
+        self._varint(0)
+        self._commit()
+
+    # ─── Records ────────────────────────────────────────────────────
+    def edge(self, now, mask):
+        if mask > 0x1F:
+            self._begin(EDGE | 0x20 | (mask & 0x1F), now)
+            self._rec[self._n] = mask >> 5
+            self._n += 1
+        else:
+            self._begin(EDGE | mask, now)
+        self._commit()
+
+    def action(self, now, layer, mask, code):
+        self._begin(ACTION | layer, now)
+        self._varint(mask)
+        self._varint(code if isinstance(code, int) else 0)
+        self._commit()
+
+    def layer(self, now, layer):
+        self._begin(LAYER | layer, now)
+        self._commit()
+
+    # ─── Encoding ───────────────────────────────────────────────────
+    def _begin(self, tag, now):
+        if self.dropped and self.enabled:
+            # say what was lost before the next record that fits
+            self._rec[0] = MARK | GAP
+            self._n = 1
+            self._varint(0)
+            self._varint(self.dropped)
+            if self.count + self._n <= len(self.buf):
+                self._pending_ms = self.last_ms
+                self._pending_t  = self.last_t
+                self.dropped = 0
+                self._commit()
+        ms = int(now * 1000)
+        delta = ms - self.last_ms if ms > self.last_ms else 0
+        self._pending_ms = ms if ms > self.last_ms else self.last_ms
+        self._pending_t  = now
+        self._rec[0] = tag
+        self._n = 1
+        self._varint(delta)
+
+    def _varint(self, v):
+        rec = self._rec
+        n = self._n
+        while v >= 0x80:
+            rec[n] = (v & 0x7F) | 0x80
+            v >>= 7
+            n += 1
+        rec[n] = v
+        self._n = n + 1
+
+    def _commit(self):
+        n = self._n
+        if not self.enabled:
+            return
+        if self.count + n > len(self.buf):
+            self.dropped += 1
+            return
+        self.last_ms = self._pending_ms
+        self.last_t  = self._pending_t
+        buf = self.buf
+        size = len(buf)
+        i = (self.head + self.count) % size
+        rec = self._rec
+        for j in range(n):
+            buf[i] = rec[j]
+            i += 1
+            if i == size:
+                i = 0
+        self.count += n
+
+    def _raw(self, data):
+        self._rec[:len(data)] = data
+        self._n = len(data)
+        self._pending_ms = self.last_ms
+        self._pending_t  = self.last_t
+        self._commit()
+
+    # ─── Output ─────────────────────────────────────────────────────
+    def due(self, now, mask):
+        """True when a flush() now won't land in the middle of a chord."""
+        if not self.count or mask or not self.enabled:
+            return False
+        return (now - self.last_t >= IDLE_FLUSH
+                or self.count >= FULL_FLUSH * len(self.buf))
+
+    def flush(self):
+        """Append what is buffered to the file.  Slow (flash); call it while
+        the keys are idle."""
+        if not self.count or not self.enabled:
+            return 0
+        n = self.count
+        view = memoryview(self.buf)
+        end = self.head + n
+        try:
+            with open(self.path, "ab") as f:
+                if end <= len(self.buf):
+                    f.write(view[self.head:end])
+                else:
+                    f.write(view[self.head:])
+                    f.write(view[:end - len(self.buf)])
+        except OSError as e:
+            print(f"trace: can't write {self.path} ({e}); recording off")
+            self.enabled = False
+            return 0
+        self.head = end % len(self.buf)
+        self.count = 0
+        self.written += n
+        if self.written >= self.max_file:
+            print(f"trace: {self.path} is full; recording off")
+            self.enabled = False
+        return n
+
+
+# ─── Reading (host side) ─────────────────────────────────────────────
+def records(f, chunk=65536):
+    """Decode a trace file as a stream of (seconds, type, a, b, c):
+
+        EDGE:   (t, EDGE, mask, 0, 0)
+        ACTION: (t, ACTION, layer, mask, code)
+        LAYER:  (t, LAYER, layer, 0, 0)
+        MARK:   (t, MARK, kind, arg, 0)
+
+    Reads `chunk` bytes at a time, so a trace of any length streams."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a keystroke trace")
+
+    def stream():
+        while True:
+            data = f.read(chunk)
+            if not data:
+                return
+            yield from data
+
+    it = stream()
+
+    def varint():
+        v = shift = 0
+        for b in it:
+            v |= (b & 0x7F) << shift
+            if b < 0x80:
+                return v
+            shift += 7
+        raise EOFError
+
+    ms = 0
+    for tag in it:
+        try:
+            kind = tag & 0xC0
+            delta = varint()
+            if kind == MARK and tag & 0x3F == SESSION:
+                ms = 0
+            ms += delta
+            t = ms / 1000
+            if kind == EDGE:
+                mask = tag & 0x1F
+                if tag & 0x20:
+                    mask |= next(it) << 5
+                yield t, EDGE, mask, 0, 0
+            elif kind == ACTION:
+                mask = varint()
+                yield t, ACTION, tag & 0x3F, mask, varint()
+            elif kind == LAYER:
+                yield t, LAYER, tag & 0x3F, 0, 0
+            else:
+                yield t, MARK, tag & 0x3F, varint(), 0
+        except (EOFError, StopIteration):
+            return   # torn last record (power cut mid-write)
@@ -0,0 +1,86 @@
+# latency_stats.py
+# Fixed-size latency histograms for the firmware.  Everything is allocated up
+# front; record() only bumps integers/floats, so it is safe to call from the
+# scan loop.  dump() formats text and is only meant for the serial command.
+
+# Bucket upper edges in ms; the last bucket catches everything above.
+BUCKETS_MS = (1, 2, 4, 8, 12, 16, 24, 32, 48, 64, 96, 128, 256, 512)
+
+
+class Histogram:
+    def __init__(self, name, edges=BUCKETS_MS):
+        self.name   = name
+        self.edges  = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.reset()
+
+    def reset(self):
+        counts = self.counts
+        for i in range(len(counts)):
+            counts[i] = 0
+        self.n     = 0
+        self.total = 0.0
+        self.lo    = 0.0
+        self.hi    = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        edges = self.edges
+        i = 0
+        last = len(edges)
+        while i < last and ms > edges[i]:
+            i += 1
+        self.counts[i] += 1
+        if not self.n or ms < self.lo:
+            self.lo = ms
+        if ms > self.hi:
+            self.hi = ms
+        self.n += 1
+        self.total += ms
+
+    def dump(self, out=print):
+        if not self.n:
+            out(f"{self.name}: no samples")
+            return
+        out(f"{self.name}: n={self.n} min={self.lo:.1f} "
+            f"avg={self.total / self.n:.1f} max={self.hi:.1f} ms")
+        parts = []
+        for i, c in enumerate(self.counts):
+            if c:
+                edge = f"<={self.edges[i]}" if i < len(self.edges) else f">{self.edges[-1]}"
+                parts.append(f"{edge}:{c}")
+        out("  " + " ".join(parts))
+
+
+class Stats:
+    """Scan period, stabilize time, settle time of the chords sent and
+    per-layer send latency."""
+
+    def __init__(self, layers=8):
+        self.scan      = Histogram("scan_period")
+        self.stabilize = Histogram("stabilize")
+        self.settle    = Histogram("settle")   # first press -> sent chord pending
+        self.send      = [None] + [Histogram(f"send_L{n}")
+                                   for n in range(1, layers + 1)]
+        self.last_scan = -1.0
+
+    def tick(self, now):
+        if self.last_scan >= 0:
+            self.scan.record(now - self.last_scan)
+        self.last_scan = now
+
+    def histograms(self):
+        yield self.scan
+        yield self.stabilize
+        yield self.settle
+        for h in self.send[1:]:
+            yield h
+
+    def reset(self):
+        for h in self.histograms():
+            h.reset()
+
+    def dump(self, out=print):
+        for h in self.histograms():
+            if h.n or h is self.scan:
+                h.dump(out)
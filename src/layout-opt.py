@@ -0,0 +1,290 @@
+# layout-opt.py
+# Scores the layer-1 (alpha) layout against a text corpus and searches for a
+# cheaper one.  The current layout is read from the compiled chord tables
+# (chord_tables / chords_config), so the numbers describe what the firmware
+# actually types.
+#
+#   python3 layout-opt.py                          # built-in corpus
+#   python3 layout-opt.py --text book.txt --restarts 20
+#   python3 layout-opt.py --layout mine.txt        # score another layout
+#   python3 layout-opt.py --pin " es"              # keep space, e, s put
+#
+# Cost model, in units of one plain single-finger chord:
+#   every chord         1.0
+#   extra finger        FINGER_COST each
+#   thumb in the chord  THUMB_COST
+#   skipped finger      GAP_COST for each unpressed finger between two
+#                       pressed ones, e.g. (0, 2) skips the middle finger
+#   shared finger       SHARED_COST per finger in both this chord and the
+#                       previous one (it has to lift and press again)
+#   same chord again    REPEAT_COST (the engine's DEBOUNCE_UP lockout)
+# Characters off layer 1 cost their thumb taps and chords as whole strokes.
+# WPM is scaled so the current layout types at BASE_WPM, the README figure.
+# presses/char is keys pressed per character, shared/char the fingers two
+# consecutive chords have in common (what SHARED_COST charges for).
+#
+# A --layout file has one "<char> <keys>" line per chord, e.g. "e 0" or
+# "t 23"; use "space" for the space chord.
+
+import argparse
+import random
+
+import numpy as np
+
+import chord_sim
+import chord_tables
+import word_dict
+from chord_tables import SLOTS, THUMB, KEY, POPCOUNT, mask_combo
+
+FINGER_COST = 0.35
+THUMB_COST  = 0.25
+GAP_COST    = 0.30
+SHARED_COST = 0.40
+REPEAT_COST = 0.30
+BASE_WPM    = 25.0
+
+CORPUS = (
+    "the quick brown fox jumps over the lazy dog. "
+    "it was the best of times, it was the worst of times, it was the age of "
+    "wisdom, it was the age of foolishness, it was the epoch of belief, it "
+    "was the epoch of incredulity, it was the season of light, it was the "
+    "season of darkness, it was the spring of hope, it was the winter of "
+    "despair. a chording keyboard trades key count for timing, so every "
+    "millisecond spent waiting for fingers to settle is felt by the typist. "
+    "Call me Ishmael. Some years ago, never mind how long precisely, having "
+    "little or no money in my purse, and nothing particular to interest me "
+    "on shore, I thought I would sail about a little and see the watery "
+    "part of the world. There were 12 of them in 1851."
+)
+
+CHARS = " abcdefghijklmnopqrstuvwxyz"
+
+
+# ─── Chord costs ─────────────────────────────────────────────────────
+def chord_costs():
+    """Per-mask chord cost (SLOTS,) and transition cost (SLOTS, SLOTS)."""
+    masks = np.arange(SLOTS)
+    fingers = np.array([POPCOUNT[m & ~THUMB] for m in range(SLOTS)])
+    thumb = (masks & THUMB) != 0
+    gaps = np.zeros(SLOTS)
+    for m in range(SLOTS):
+        keys = [k for k in range(4) if m & (1 << k)]
+        if keys:
+            gaps[m] = keys[-1] - keys[0] + 1 - len(keys)
+    chord = (1.0 + FINGER_COST * np.maximum(fingers + thumb - 1, 0)
+             + THUMB_COST * thumb + GAP_COST * gaps)
+    shared = np.array([[POPCOUNT[a & b] for b in range(SLOTS)]
+                       for a in range(SLOTS)])
+    trans = SHARED_COST * shared + REPEAT_COST * np.eye(SLOTS)
+    return chord, trans
+
+
+# ─── Corpus ──────────────────────────────────────────────────────────
+CAPITAL_STROKES = 5   # layer-4 SCAG: four thumb taps + the shift chord
+
+
+def other_strokes():
+    """Char -> strokes to type it off layer 1: one thumb tap per layer
+    number to get there, the chord, one tap back."""
+    layer_of = {}
+    for layer in range(2, chord_tables.LAYERS + 1):
+        kinds, payloads = chord_tables.kinds[layer], chord_tables.payloads[layer]
+        for m in range(SLOTS):
+            if kinds[m] == KEY:
+                layer_of.setdefault(payloads[m], layer)
+    out = {}
+    for ch, code in word_dict._keymap().items():
+        if not code & word_dict.SHIFT and code in layer_of:
+            out[ch] = layer_of[code] + 2
+    return out
+
+
+def corpus_stats(text):
+    """Letter counts (27,), bigram counts (27, 27), strokes spent off
+    layer 1, characters typed, characters the layout can't type."""
+    index = {c: i for i, c in enumerate(CHARS)}
+    elsewhere = other_strokes()
+    counts = np.zeros(len(CHARS))
+    bigrams = np.zeros((len(CHARS), len(CHARS)))
+    other = 0
+    typed = skipped = 0
+    prev = None
+    for c in text:
+        low = c.lower()
+        i = index.get(low)
+        if i is None:
+            if c in elsewhere:
+                other += elsewhere[c]
+                typed += 1
+            else:
+                skipped += 1
+            prev = None
+            continue
+        if c != low:
+            other += CAPITAL_STROKES
+            prev = None
+        counts[i] += 1
+        typed += 1
+        if prev is not None:
+            bigrams[prev, i] += 1
+        prev = i
+    return counts, bigrams, other, typed, skipped
+
+
+# ─── Layouts ─────────────────────────────────────────────────────────
+def current_layout():
+    table = chord_sim.char_chords(1)
+    return {c: table[c] for c in CHARS if c in table}
+
+
+def read_layout(path):
+    layout = {}
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            ch = " " if parts[0] == "space" else parts[0].lower()
+            if len(parts) != 2 or ch not in CHARS or not parts[1].isdigit():
+                raise SystemExit(f"{path}:{n}: expected '<char> <keys>'")
+            layout[ch] = chord_tables.combo_mask(tuple(int(k) for k in parts[1]))
+    if len(set(layout.values())) != len(layout):
+        raise SystemExit(f"{path}: two characters share a chord")
+    return layout
+
+
+class Model:
+    """Vectorized layout cost.  A layout is an int array L where L[i] is
+    the mask for item i: the 27 characters, then free slots (zero weight)."""
+
+    def __init__(self, counts, bigrams, other, typed, free):
+        self.chord, self.trans = chord_costs()
+        self.keys = np.array([POPCOUNT[m] for m in range(SLOTS)])
+        self.overlap = np.array([[POPCOUNT[a & b] for b in range(SLOTS)]
+                                 for a in range(SLOTS)])
+        n = len(CHARS) + len(free)
+        self.f = np.zeros(n)
+        self.f[:len(CHARS)] = counts
+        self.b = np.zeros((n, n))
+        self.b[:len(CHARS), :len(CHARS)] = bigrams
+        self.other = other      # strokes off layer 1, at 1.0 each
+        self.total = typed
+        self.free = free
+
+    def array(self, layout):
+        return np.array([layout[c] for c in CHARS] + list(self.free))
+
+    def cost(self, L):
+        """Cost per typed character."""
+        return (self.f @ self.chord[L] + (self.b * self.trans[np.ix_(L, L)]).sum()
+                + self.other) / self.total
+
+    def swap_costs(self, L, pairs):
+        """Cost of L with each (i, j) in pairs swapped, all at once."""
+        LL = np.repeat(L[None, :], len(pairs), axis=0)
+        rows = np.arange(len(pairs))
+        LL[rows, pairs[:, 0]] = L[pairs[:, 1]]
+        LL[rows, pairs[:, 1]] = L[pairs[:, 0]]
+        chord = self.chord[LL] @ self.f
+        trans = (self.trans[LL[:, :, None], LL[:, None, :]] * self.b).sum(axis=(1, 2))
+        return (chord + trans + self.other) / self.total
+
+    def presses(self, L):
+        """Keys pressed per typed character (a stroke off layer 1 counts
+        as one)."""
+        return (self.f @ self.keys[L] + self.other) / self.total
+
+    def shared(self, L):
+        """Fingers in both of two consecutive chords, per typed character."""
+        return (self.b * self.overlap[np.ix_(L, L)]).sum() / self.total
+
+
+def optimize(model, start, pinned, restarts, kicks, seed):
+    """Steepest-descent swaps from the current layout, then iterated local
+    search: kick the best layout with a few random swaps and descend again."""
+    rng = random.Random(seed)
+    n = len(start)
+    movable = [i for i in range(n) if i not in pinned]
+    pairs = np.array([(i, j) for a, i in enumerate(movable) for j in movable[a + 1:]])
+
+    def descend(L):
+        cost = model.cost(L)
+        while True:
+            costs = model.swap_costs(L, pairs)
+            k = int(np.argmin(costs))
+            if costs[k] >= cost - 1e-12:
+                return L, cost
+            i, j = pairs[k]
+            L = L.copy()
+            L[i], L[j] = L[j], L[i]
+            cost = costs[k]
+
+    best, best_cost = descend(start.copy())
+    for _ in range(restarts):
+        L = best.copy()
+        for _ in range(kicks):
+            i, j = rng.sample(movable, 2)
+            L[i], L[j] = L[j], L[i]
+        L, cost = descend(L)
+        if cost < best_cost - 1e-12:
+            best, best_cost = L, cost
+    return best, best_cost
+
+
+def show(model, name, L, base_cost):
+    cost = model.cost(L)
+    print(f"{name:10} cost/char {cost:5.3f}  presses/char {model.presses(L):5.3f}"
+          f"  shared/char {model.shared(L):5.3f}"
+          f"  est. {BASE_WPM * base_cost / cost:5.1f} WPM")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--text", action="append", help="corpus file(s) (default: built-in)")
+    ap.add_argument("--layout", help="score this layout instead of optimizing")
+    ap.add_argument("--pin", default="", help="characters the optimizer must not move")
+    ap.add_argument("--restarts", type=int, default=30)
+    ap.add_argument("--kicks", type=int, default=3, help="random swaps per restart")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    text = "".join(open(p).read() for p in args.text) if args.text else CORPUS
+    counts, bigrams, other, typed, skipped = corpus_stats(text)
+    if skipped:
+        print(f"({skipped} characters have no chord and are left out)")
+
+    current = current_layout()
+    missing = [c for c in CHARS if c not in current]
+    if missing:
+        raise SystemExit(f"layer 1 has no chord for {missing!r}")
+    used = set(current.values())
+    free = [m for m in range(1, SLOTS) if m != THUMB and m not in used
+            and chord_tables.kinds[1][m] != KEY]
+    model = Model(counts, bigrams, other, typed, free)
+
+    base = model.array(current)
+    base_cost = model.cost(base)
+    show(model, "current", base, base_cost)
+
+    if args.layout:
+        layout = read_layout(args.layout)
+        missing = [c for c in CHARS if c not in layout]
+        if missing:
+            raise SystemExit(f"{args.layout}: no chord for {missing!r}")
+        show(model, args.layout, model.array(layout), base_cost)
+        return
+
+    pinned = {CHARS.index(c) for c in args.pin.lower() if c in CHARS}
+    best, _ = optimize(model, base, pinned, args.restarts, args.kicks, args.seed)
+    show(model, "optimized", best, base_cost)
+
+    print("\nalpha changes for chords_config.py:")
+    for i, c in enumerate(CHARS):
+        if best[i] != base[i]:
+            name = "SPACE" if c == " " else c.upper()
+            print(f"    {str(mask_combo(int(best[i]))) + ':':16}Keycode.{name},"
+                  f"   # was {mask_combo(int(base[i]))}")
+
+
+if __name__ == "__main__":
+    main()
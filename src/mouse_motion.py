@@ -0,0 +1,84 @@
+# mouse_motion.py
+# Pointer and wheel motion for layer 5.  A move or scroll chord picks a
+# direction; while it is held the engine calls step() once per report
+# interval and the speed ramps along a curve of (seconds held, units per
+# second) points.  Sub-pixel motion is accumulated so slow speeds still
+# move smoothly instead of rounding to zero.
+#
+# REPORT_INTERVAL matches the 15 ms BLE connection interval hosts give an
+# HID device: reporting faster only queues reports the link can't carry.
+
+REPORT_INTERVAL = 0.015
+
+# (seconds held, speed); linear between points, flat after the last one
+MOVE_CURVE   = ((0.0, 60.0), (0.3, 240.0), (1.0, 900.0), (2.0, 1800.0))   # px/s
+SCROLL_CURVE = ((0.0, 8.0), (0.5, 25.0), (1.5, 100.0))                    # clicks/s
+
+MOVE_NUDGE   = 1   # px sent on press, so a tap is a one-pixel step
+SCROLL_NUDGE = 1   # wheel clicks sent on press
+
+
+def speed(curve, t):
+    """Speed after `t` seconds held."""
+    t0, v0 = curve[0]
+    if t <= t0:
+        return v0
+    for t1, v1 in curve[1:]:
+        if t < t1:
+            return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+        t0, v0 = t1, v1
+    return v0
+
+
+class Motion:
+    def __init__(self, mouse, interval=REPORT_INTERVAL, move_curve=MOVE_CURVE,
+                 scroll_curve=SCROLL_CURVE):
+        self.mouse        = mouse
+        self.interval     = interval
+        self.move_curve   = move_curve
+        self.scroll_curve = scroll_curve
+        self.active = False
+        self.dx = self.dy = self.wheel = 0   # direction
+        self.fx = self.fy = self.fw = 0.0    # fractional remainders
+        self.boost = 1
+        self.start_t = self.last = 0.0
+
+    def start(self, now, dx=0, dy=0, wheel=0, boost=1):
+        """Begin moving in direction (dx, dy) and/or scrolling by `wheel`'s
+        sign, with a one-step nudge straight away."""
+        self.dx, self.dy, self.wheel = dx, dy, wheel
+        self.fx = self.fy = self.fw = 0.0
+        self.boost   = boost
+        self.start_t = self.last = now
+        self.active  = True
+        self.mouse.move(dx * MOVE_NUDGE * boost, dy * MOVE_NUDGE * boost,
+                        wheel * SCROLL_NUDGE * boost)
+
+    def stop(self):
+        self.active = False
+
+    def next_time(self):
+        return self.last + self.interval if self.active else None
+
+    def step(self, now):
+        """Send the motion accumulated since the last report.  True when a
+        report went out."""
+        if not self.active or now - self.last < self.interval:
+            return False
+        dt = now - self.last
+        held = now - self.start_t
+        self.last = now
+        if self.dx or self.dy:
+            d = speed(self.move_curve, held) * self.boost * dt
+            self.fx += self.dx * d
+            self.fy += self.dy * d
+        if self.wheel:
+            self.fw += self.wheel * speed(self.scroll_curve, held) * self.boost * dt
+        x, y, w = int(self.fx), int(self.fy), int(self.fw)
+        if not (x or y or w):
+            return False
+        self.fx -= x
+        self.fy -= y
+        self.fw -= w
+        self.mouse.move(x, y, w)
+        return True
@@ -0,0 +1,110 @@
+# power-model.py
+# Host-side duty-cycle / battery estimate for the scan scheduler.  Replays a
+# session (typing bursts separated by idle gaps, or a recorded trace) through
+# chord_sim with a fixed 10 ms loop, the adaptive scheduler, and adaptive +
+# light sleep on INT, then turns wakeups and bus time into an average current.
+#
+#   python3 power-model.py
+#   python3 power-model.py --trace session.txt   # lines: "<t> <key> <0|1>"
+#
+# The currents below are ballpark nRF52840 + CircuitPython figures; measure
+# your own board and pass --active-ma/--idle-ma/--sleep-ma for real numbers.
+# The relative comparison between modes is what this is for.
+
+import argparse
+
+import chord_sim
+from power import ScanScheduler
+
+BATTERY_MAH = 1200
+
+CPU_PER_PASS  = 0.0008   # s awake per scan-task pass (interpreter + engine)
+CPU_PER_TIMER = 0.0003   # s awake per timer-task wakeup
+ACTIVE_MA = 6.0          # CPU running
+IDLE_MA   = 1.0          # between passes, BLE link up
+SLEEP_MA  = 0.3          # light sleep, BLE link up
+
+SESSION_TEXT = "the quick brown fox jumps over the lazy dog "
+SESSION_IDLE = (5.0, 20.0, 90.0, 300.0)   # seconds idle after each burst
+
+
+def session_trace(profile, seed=0):
+    """Typing bursts separated by SESSION_IDLE gaps."""
+    edges, expected = [], []
+    t = 0.1
+    for n, idle in enumerate(SESSION_IDLE):
+        e, x = chord_sim.typing_trace(SESSION_TEXT, profile, seed=seed + n, start=t)
+        edges += e
+        expected += x
+        t = e[-1][0] + idle
+    return edges, expected, t
+
+
+def load_trace(path):
+    edges = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and not line.startswith("#"):
+                edges.append((float(parts[0]), int(parts[1]), parts[2] == "1"))
+    edges.sort(key=lambda e: e[0])
+    return edges, None, (edges[-1][0] if edges else 0.0) + 1.0
+
+
+def model(edges, end, scan, adaptive, sleep, args):
+    base = 0.002 if scan == "irq" else 0.01
+    sched = ScanScheduler(base, can_sleep=sleep) if adaptive else None
+    sim = chord_sim.Sim(scan, base, sched)
+    sim.run(edges, tail=max(0.3, end - (edges[-1][0] if edges else 0.0)))
+    total = sim.clock.t
+    awake = (sim.passes * args.cpu_per_pass + sim.timer_wakes * args.cpu_per_timer
+             + sim.bus.bus_time)
+    asleep = sim.slept
+    idle = max(0.0, total - awake - asleep)
+    avg_ma = (awake * args.active_ma + idle * args.idle_ma
+              + asleep * args.sleep_ma) / total
+    return sim, {
+        "total_s": total,
+        "passes":  sim.passes,
+        "duty":    100 * awake / total,
+        "sleep":   100 * asleep / total,
+        "avg_ma":  avg_ma,
+        "hours":   BATTERY_MAH / avg_ma,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--trace", help="recorded trace file (default: synthetic session)")
+    ap.add_argument("--profile", default="average", choices=sorted(chord_sim.PROFILES))
+    ap.add_argument("--active-ma", type=float, default=ACTIVE_MA)
+    ap.add_argument("--idle-ma", type=float, default=IDLE_MA)
+    ap.add_argument("--sleep-ma", type=float, default=SLEEP_MA)
+    ap.add_argument("--cpu-per-pass", type=float, default=CPU_PER_PASS)
+    ap.add_argument("--cpu-per-timer", type=float, default=CPU_PER_TIMER)
+    args = ap.parse_args()
+
+    if args.trace:
+        edges, expected, end = load_trace(args.trace)
+    else:
+        edges, expected, end = session_trace(chord_sim.PROFILES[args.profile])
+
+    modes = (
+        ("fixed 10ms poll",    "register", False, False),
+        ("adaptive poll",      "register", True,  False),
+        ("fixed 2ms irq",      "irq",      False, False),
+        ("adaptive irq+sleep", "irq",      True,  True),
+    )
+    print(f"{'mode':20} {'passes':>8} {'duty':>7} {'sleep':>7} {'avg':>8} {'battery':>9} {'p95 lat':>8}")
+    for name, scan, adaptive, sleep in modes:
+        sim, r = model(edges, end, scan, adaptive, sleep, args)
+        lat = ""
+        if expected:
+            res = chord_sim.score(expected, sim.reports)
+            lat = f"{1000 * chord_sim.percentile(res['latencies'], 95):6.1f}ms"
+        print(f"{name:20} {r['passes']:8d} {r['duty']:6.2f}% {r['sleep']:6.1f}%"
+              f" {r['avg_ma']:6.2f}mA {r['hours']:7.0f} h {lat:>8}")
+
+
+if __name__ == "__main__":
+    main()
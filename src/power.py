@@ -0,0 +1,48 @@
+# power.py
+# Adaptive scan rate.  The scan loop runs at full rate while keys are moving
+# (or held, or the engine has a timer pending) and backs off step by step the
+# longer the keypad sits idle.  With the MCP23008 INT line wired, the board
+# can drop into light sleep after SLEEP_AFTER and wake on the next key edge.
+#
+# Host-importable: power-model.py drives this same class from chord_sim.
+
+# (idle seconds, scan interval) -- the interval in effect once the keys have
+# been idle that long.  The first step is the loop's base rate.
+IDLE_STEPS = (
+    (2.0,  0.02),
+    (10.0, 0.04),
+    (30.0, 0.08),
+)
+SLEEP_AFTER = 60.0   # idle seconds before light sleep (needs a wake pin)
+
+
+class ScanScheduler:
+    def __init__(self, base, steps=IDLE_STEPS, sleep_after=SLEEP_AFTER,
+                 can_sleep=False, now=0.0):
+        self.base        = base
+        self.steps       = steps
+        self.sleep_after = sleep_after if can_sleep else None
+        self.last_active = now
+        self._edges      = 0
+
+    def note(self, now, scanner, busy=False):
+        """Record activity after a scan pass: any edge, any key still held,
+        or `busy` (engine timer or HID output pending)."""
+        if busy or scanner.mask or scanner.edges != self._edges:
+            self._edges = scanner.edges
+            self.last_active = now
+
+    def interval(self, now):
+        idle = now - self.last_active
+        iv = self.base
+        for after, step in self.steps:
+            if idle >= after and step > iv:
+                iv = step
+        return iv
+
+    def should_sleep(self, now):
+        return (self.sleep_after is not None
+                and now - self.last_active >= self.sleep_after)
+
+    def wake(self, now):
+        self.last_active = now
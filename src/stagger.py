@@ -0,0 +1,196 @@
+# stagger.py
+# Learned stabilization windows.  A chord's keys never land together: the
+# engine waits for the combo to sit still for a window before taking it as
+# pending.  The fixed STABLE_MS_* windows have to cover the slowest finger on
+# the worst day, so this learns them instead.  That moves settle time only:
+# a chord sent on its first release goes out when it did before, and only
+# what is sent at settle (eager commit, repeat, mouse) gets there sooner.
+#
+# For every combo the model keeps a running estimate of how long it sat
+# before another key joined it (it was half a chord) and how often that
+# happens.  A combo that is nearly always the whole chord gets MIN_WINDOW;
+# one that is often a stepping stone gets a window covering its usual gap.
+# Combos without enough samples fall back to the per-finger estimates: the
+# longest the missing fingers usually lag behind the previous key.
+#
+# Only the left half's 32 combos are learned; chords reaching into a split
+# keyboard's right half keep the fixed windows.
+#
+# Everything is fixed-size and updated in place.  to_bytes()/from_bytes()
+# pack it into 143 bytes for microcontroller.nvm, so it survives a reset.
+# The running estimates move a little with every chord, but an nvm write
+# erases a flash page (about 10k cycles on the nRF52840).  So save() only
+# writes when a window has moved by more than SAVE_TOLERANCE since the last
+# save or load.
+
+SLOTS = 32
+KEYS  = 5
+
+MIN_WINDOW  = 0.006    # s; below one scan pass there is nothing to gain
+MAX_WINDOW  = 0.08
+MARGIN      = 0.004    # s added to every learned window
+SPREAD      = 1.5      # windows cover mean + SPREAD * mean deviation
+GAIN        = 0.125    # weight of each new sample in the running estimates
+MIN_SAMPLES = 8        # samples before a combo's own estimate is used
+CLEAN       = 0.05     # extension rate under which a combo is a whole chord
+SAVE_TOLERANCE = 5     # ms a window must move before it is worth a flash write
+
+MAGIC = b"C5S\x01"
+SIZE  = len(MAGIC) + SLOTS * 4 + KEYS * 2 + 1
+
+
+def _ms(seconds):
+    ms = int(seconds * 1000 + 0.5)
+    return 255 if ms > 255 else ms
+
+
+class StaggerModel:
+    def __init__(self):
+        self.gap     = [0.0] * SLOTS   # s a combo sat before a key joined it
+        self.dev     = [0.0] * SLOTS   # mean absolute deviation of gap
+        self.ext     = [0.0] * SLOTS   # fraction of the time it was extended
+        self.n       = [0] * SLOTS     # samples, saturating at 255
+        self.lag     = [0.0] * KEYS    # s a finger lands after the previous key
+        self.lag_dev = [0.0] * KEYS
+        self.lag_n   = 0
+        self.dirty   = False
+        self.saved   = self.windows_ms()   # windows as last saved or loaded
+
+    # ─── Learning ───────────────────────────────────────────────────
+    def extended(self, mask, added, dt):
+        """`mask` was held `dt` seconds before the keys in `added` joined."""
+        if mask >= SLOTS:
+            return                       # spans the right half; not learned
+        if self.n[mask] < 255:
+            self.n[mask] += 1
+        self.ext[mask] += (1.0 - self.ext[mask]) * GAIN
+        d = dt - self.gap[mask]
+        self.gap[mask] += d * GAIN
+        self.dev[mask] += ((d if d > 0 else -d) - self.dev[mask]) * GAIN
+        for k in range(KEYS):
+            if added & (1 << k):
+                d = dt - self.lag[k]
+                self.lag[k] += d * GAIN
+                self.lag_dev[k] += ((d if d > 0 else -d) - self.lag_dev[k]) * GAIN
+        if self.lag_n < 255:
+            self.lag_n += 1
+        self.dirty = True
+
+    def completed(self, mask):
+        """`mask` was the whole chord: its first key came up with nothing
+        having joined it."""
+        if mask >= SLOTS:
+            return
+        if self.n[mask] < 255:
+            self.n[mask] += 1
+        self.ext[mask] -= self.ext[mask] * GAIN
+        self.dirty = True
+
+    # ─── Windows ────────────────────────────────────────────────────
+    def window(self, mask):
+        """Seconds `mask` must sit still to become pending, or None while
+        there is nothing learned to go on."""
+        if mask >= SLOTS:
+            return None
+        if self.n[mask] >= MIN_SAMPLES:
+            if self.ext[mask] < CLEAN:
+                return MIN_WINDOW
+            w = self.gap[mask] + SPREAD * self.dev[mask]
+        elif self.lag_n >= MIN_SAMPLES:
+            w = 0.0
+            for k in range(KEYS):
+                if not mask & (1 << k):
+                    lk = self.lag[k] + SPREAD * self.lag_dev[k]
+                    if lk > w:
+                        w = lk
+        else:
+            return None
+        w += MARGIN
+        if w < MIN_WINDOW:
+            return MIN_WINDOW
+        return MAX_WINDOW if w > MAX_WINDOW else w
+
+    def windows_ms(self):
+        """Every combo's window in whole ms, 0 where nothing is learned."""
+        out = bytearray(SLOTS)
+        for m in range(1, SLOTS):
+            w = self.window(m)
+            if w is not None:
+                out[m] = _ms(w)
+        return out
+
+    def moved(self):
+        """True if a window differs from the saved one by more than
+        SAVE_TOLERANCE ms, or was learned or lost since."""
+        saved = self.saved
+        now = self.windows_ms()
+        for m in range(1, SLOTS):
+            a, b = now[m], saved[m]
+            if (a == 0) != (b == 0) or a - b > SAVE_TOLERANCE or b - a > SAVE_TOLERANCE:
+                return True
+        return False
+
+    # ─── Persistence ────────────────────────────────────────────────
+    def to_bytes(self):
+        out = bytearray(SIZE)
+        out[0:len(MAGIC)] = MAGIC
+        i = len(MAGIC)
+        for m in range(SLOTS):
+            out[i]     = _ms(self.gap[m])
+            out[i + 1] = _ms(self.dev[m])
+            out[i + 2] = int(self.ext[m] * 255 + 0.5)
+            out[i + 3] = self.n[m]
+            i += 4
+        for k in range(KEYS):
+            out[i]     = _ms(self.lag[k])
+            out[i + 1] = _ms(self.lag_dev[k])
+            i += 2
+        out[i] = self.lag_n
+        return out
+
+    def from_bytes(self, blob):
+        """Load a to_bytes() image; False (and nothing changed) if `blob`
+        doesn't hold one."""
+        if len(blob) < SIZE or bytes(blob[0:len(MAGIC)]) != MAGIC:
+            return False
+        i = len(MAGIC)
+        for m in range(SLOTS):
+            self.gap[m] = blob[i] / 1000
+            self.dev[m] = blob[i + 1] / 1000
+            self.ext[m] = blob[i + 2] / 255
+            self.n[m]   = blob[i + 3]
+            i += 4
+        for k in range(KEYS):
+            self.lag[k]     = blob[i] / 1000
+            self.lag_dev[k] = blob[i + 1] / 1000
+            i += 2
+        self.lag_n = blob[i]
+        self.dirty = False
+        self.saved = self.windows_ms()
+        return True
+
+    def save(self, nvm, offset=0):
+        """Write to `nvm` (microcontroller.nvm) if a window has moved since
+        the last save or load; True when it did.  Flash wears, so callers
+        rate-limit on top of this."""
+        if not self.dirty:
+            return False
+        self.dirty = False
+        if not self.moved():
+            return False
+        blob = self.to_bytes()
+        if nvm[offset:offset + SIZE] != blob:
+            nvm[offset:offset + SIZE] = blob
+        self.saved = self.windows_ms()
+        return True
+
+    def dump(self, out=print):
+        parts = []
+        for m in range(1, SLOTS):
+            w = self.window(m)
+            if w is not None and self.n[m] >= MIN_SAMPLES:
+                parts.append(f"{m:05b}:{w * 1000:.0f}")
+        lags = " ".join(f"{self.lag[k] * 1000:.0f}±{self.lag_dev[k] * 1000:.0f}"
+                        for k in range(KEYS))
+        out(f"stagger: finger lag ms {lags} ({self.lag_n} samples)")
+        out("  windows ms " + (" ".join(parts) if parts else "(learning)"))
@@ -0,0 +1,260 @@
+# status_display.py
+# Optional 128x32 SSD1306 status panel on the keypad's I2C bus: the layer
+# locked in, an armed SCAG modifier, the link state and the battery.
+#
+#   L2 NUMBERS       BLE
+#
+#   +C+S LOCK        87%
+#
+# The panel is driven with raw I2C writes, like keyscan.Registers, rather
+# than displayio: a displayio refresh sends everything it considers changed
+# in one blocking transfer, while the MCP23008 waits on the same bus.  Here
+# every field owns a fixed strip of one display page.  A changed field is
+# re-rendered into its own buffer, and flush() sends at most CHUNK bytes of
+# it per call, so the bus is never held for more than ~1 ms at 400 kHz.
+# Nothing is sent for fields that didn't change.
+#
+# c5k-left.py calls flush() from its own task, only while no key is held
+# and no engine timer is due.  Refreshes start at most every REFRESH_MIN s.
+
+OLED_ADDRESS = 0x3C
+WIDTH  = 128
+PAGES  = 4             # 32 rows, 8 per page
+CELL   = 6             # px per character: 5 wide plus a gap
+
+CHUNK       = 32       # data bytes per I2C write
+REFRESH_MIN = 0.25     # s between refreshes
+
+LAYER_NAMES = {1: "LETTERS", 2: "NUMBERS", 3: "SPACES", 4: "SCAG",
+               5: "MOUSE", 6: "MEDIA", 7: "F KEYS", 8: "WORDS"}
+# armed modifier bits (Keycode.LEFT_CONTROL .. RIGHT_GUI); short ones when stacked
+MODIFIER_NAMES = ("CTRL", "SHIFT", "ALT", "GUI", "RCTRL", "RSHIFT", "RALT", "RGUI")
+MODIFIER_SHORT = ("C", "S", "A", "G", "RC", "RS", "RA", "RG")
+
+# (page, column, characters) of each field
+LAYER   = 0
+LINK    = 1
+MOD     = 2
+BATTERY = 3
+FIELDS = ((0, 0, 14), (0, WIDTH - 4 * CELL, 4),
+          (2, 0, 14), (2, WIDTH - 4 * CELL, 4))
+
+# Battery (LiPo) volts -> percent, linear between points
+BATTERY_CURVE = ((3.3, 0), (3.6, 10), (3.7, 35), (3.8, 60), (3.9, 75),
+                 (4.0, 85), (4.2, 100))
+
+# 5x7 glyphs, one byte per column (bit 0 at the top)
+FONT_CHARS = " %+-0123456789:?ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+FONT = bytes((
+    0x00, 0x00, 0x00, 0x00, 0x00,   # space
+    0x23, 0x13, 0x08, 0x64, 0x62,   # %
+    0x08, 0x08, 0x3E, 0x08, 0x08,   # +
+    0x08, 0x08, 0x08, 0x08, 0x08,   # -
+    0x3E, 0x51, 0x49, 0x45, 0x3E,   # 0
+    0x00, 0x42, 0x7F, 0x40, 0x00,   # 1
+    0x42, 0x61, 0x51, 0x49, 0x46,   # 2
+    0x21, 0x41, 0x45, 0x4B, 0x31,   # 3
+    0x18, 0x14, 0x12, 0x7F, 0x10,   # 4
+    0x27, 0x45, 0x45, 0x45, 0x39,   # 5
+    0x3C, 0x4A, 0x49, 0x49, 0x30,   # 6
+    0x01, 0x71, 0x09, 0x05, 0x03,   # 7
+    0x36, 0x49, 0x49, 0x49, 0x36,   # 8
+    0x06, 0x49, 0x49, 0x29, 0x1E,   # 9
+    0x00, 0x36, 0x36, 0x00, 0x00,   # :
+    0x02, 0x01, 0x51, 0x09, 0x06,   # ?
+    0x7E, 0x11, 0x11, 0x11, 0x7E,   # A
+    0x7F, 0x49, 0x49, 0x49, 0x36,   # B
+    0x3E, 0x41, 0x41, 0x41, 0x22,   # C
+    0x7F, 0x41, 0x41, 0x22, 0x1C,   # D
+    0x7F, 0x49, 0x49, 0x49, 0x41,   # E
+    0x7F, 0x09, 0x09, 0x09, 0x01,   # F
+    0x3E, 0x41, 0x49, 0x49, 0x7A,   # G
+    0x7F, 0x08, 0x08, 0x08, 0x7F,   # H
+    0x00, 0x41, 0x7F, 0x41, 0x00,   # I
+    0x20, 0x40, 0x41, 0x3F, 0x01,   # J
+    0x7F, 0x08, 0x14, 0x22, 0x41,   # K
+    0x7F, 0x40, 0x40, 0x40, 0x40,   # L
+    0x7F, 0x02, 0x0C, 0x02, 0x7F,   # M
+    0x7F, 0x04, 0x08, 0x10, 0x7F,   # N
+    0x3E, 0x41, 0x41, 0x41, 0x3E,   # O
+    0x7F, 0x09, 0x09, 0x09, 0x06,   # P
+    0x3E, 0x41, 0x51, 0x21, 0x5E,   # Q
+    0x7F, 0x09, 0x19, 0x29, 0x46,   # R
+    0x46, 0x49, 0x49, 0x49, 0x31,   # S
+    0x01, 0x01, 0x7F, 0x01, 0x01,   # T
+    0x3F, 0x40, 0x40, 0x40, 0x3F,   # U
+    0x1F, 0x20, 0x40, 0x20, 0x1F,   # V
+    0x3F, 0x40, 0x38, 0x40, 0x3F,   # W
+    0x63, 0x14, 0x08, 0x14, 0x63,   # X
+    0x07, 0x08, 0x70, 0x08, 0x07,   # Y
+    0x61, 0x51, 0x49, 0x45, 0x43,   # Z
+))
+
+# ─── SSD1306 commands ────────────────────────────────────────────────
+SET_COLUMNS = 0x21
+SET_PAGES   = 0x22
+INIT = bytes((
+    0x00,               # control byte: commands follow
+    0xAE,               # display off
+    0xD5, 0x80,         # clock divide / oscillator
+    0xA8, 0x1F,         # multiplex: 32 rows
+    0xD3, 0x00,         # no display offset
+    0x40,               # start line 0
+    0x8D, 0x14,         # charge pump on
+    0x20, 0x00,         # horizontal addressing
+    0xA1, 0xC8,         # segment remap, COM scan from the bottom
+    0xDA, 0x02,         # COM pins for 128x32
+    0x81, 0x8F,         # contrast
+    0xD9, 0xF1,         # pre-charge
+    0xDB, 0x40,         # VCOMH deselect level
+    0xA4, 0xA6,         # show RAM, not inverted
+    0xAF,               # display on
+))
+
+
+def battery_percent(volts):
+    v0, p0 = BATTERY_CURVE[0]
+    if volts <= v0:
+        return 0
+    for v1, p1 in BATTERY_CURVE[1:]:
+        if volts < v1:
+            return int(p0 + (p1 - p0) * (volts - v0) / (v1 - v0))
+        v0, p0 = v1, p1
+    return 100
+
+
+class StatusDisplay:
+    def __init__(self, i2c, address=OLED_ADDRESS, chunk=CHUNK,
+                 refresh=REFRESH_MIN, names=LAYER_NAMES):
+        self.i2c     = i2c
+        self.address = address
+        self.refresh = refresh
+        self.names   = names
+        self.bufs    = [bytearray(n * CELL) for _, _, n in FIELDS]
+        self.dirty   = 0          # bit per field waiting to be sent
+        self.field   = -1         # field being sent, -1 between refreshes
+        self.pos     = 0          # bytes of it sent
+        self.active  = False      # a refresh is under way
+        self.last    = -refresh   # start of the last refresh
+        self.writes  = 0          # I2C transactions, for the serial dump
+        self.sent    = 0          # data bytes
+        self._out    = bytearray(chunk + 1)
+        self._out[0] = 0x40       # control byte: display data follows
+        self._cmd    = bytearray((0x00, SET_COLUMNS, 0, 0, SET_PAGES, 0, 0))
+        self._layer = self._link = self._mod = self._battery = self._sticky = None
+        self._write(INIT)
+        self._clear()
+
+    # ─── Fields ─────────────────────────────────────────────────────
+    def update(self, layer, mods=0, connected=False, battery=None, sticky=False,
+               usb=False):
+        """Take the current state; only fields that changed are rendered
+        (and later sent).  `mods` is the engine's armed-modifier bits,
+        `battery` a percentage or None when there is no monitor, `usb` true
+        while output goes over the cable."""
+        if layer != self._layer:
+            self._layer = layer
+            self._set(LAYER, f"L{layer} {self.names.get(layer, '')}")
+        link = " USB" if usb else " BLE" if connected else " ADV"
+        if link != self._link:
+            self._link = link
+            self._set(LINK, link)
+        if mods != self._mod or sticky != self._sticky:
+            self._mod    = mods
+            self._sticky = sticky
+            names = MODIFIER_NAMES if mods & (mods - 1) == 0 else MODIFIER_SHORT
+            text = "".join("+" + names[i] for i in range(8) if mods >> i & 1)
+            self._set(MOD, text + " LOCK" if mods and sticky else text)
+        if battery != self._battery:
+            self._battery = battery
+            self._set(BATTERY, "" if battery is None else f"{battery:3d}%")
+
+    def _set(self, field, text):
+        buf = self.bufs[field]
+        i = 0
+        for ch in text:
+            if i + CELL > len(buf):
+                break
+            g = FONT_CHARS.find(ch)
+            g = (FONT_CHARS.find("?") if g < 0 else g) * 5
+            for c in range(5):
+                buf[i + c] = FONT[g + c]
+            buf[i + 5] = 0
+            i += CELL
+        while i < len(buf):
+            buf[i] = 0
+            i += 1
+        self.dirty |= 1 << field
+        if field == self.field:
+            self.field = -1       # half sent and already stale: start it over
+
+    # ─── Output ─────────────────────────────────────────────────────
+    @property
+    def pending(self):
+        return self.dirty != 0
+
+    def flush(self, now):
+        """Send one chunk of the changed fields.  True when the bus was
+        used; call again (soon) while `pending`."""
+        if not self.dirty:
+            return False
+        if self.field < 0:
+            if not self.active:
+                if now - self.last < self.refresh:
+                    return False
+                self.last   = now
+                self.active = True
+            field = 0
+            while not self.dirty & (1 << field):
+                field += 1
+            self.field = field
+            self.pos   = 0
+            self._window(field)
+            return True
+        buf = self.bufs[self.field]
+        out = self._out
+        n = len(buf) - self.pos
+        if n > len(out) - 1:
+            n = len(out) - 1
+        pos = self.pos
+        for i in range(n):
+            out[i + 1] = buf[pos + i]
+        self._write(out, n + 1)
+        self.sent += n
+        self.pos += n
+        if self.pos >= len(buf):
+            self.dirty &= ~(1 << self.field)
+            self.field  = -1
+            self.active = self.dirty != 0
+        return True
+
+    def _window(self, field):
+        page, col, n = FIELDS[field]
+        cmd = self._cmd
+        cmd[2] = col
+        cmd[3] = col + n * CELL - 1
+        cmd[5] = cmd[6] = page
+        self._write(cmd)
+
+    def _clear(self):
+        cmd = self._cmd
+        cmd[2], cmd[3], cmd[5], cmd[6] = 0, WIDTH - 1, 0, PAGES - 1
+        self._write(cmd)
+        out = self._out
+        for i in range(1, len(out)):
+            out[i] = 0
+        for _ in range(WIDTH * PAGES // (len(out) - 1)):
+            self._write(out)
+
+    def _write(self, buf, end=None):
+        i2c = self.i2c
+        while not i2c.try_lock():
+            pass
+        try:
+            i2c.writeto(self.address, buf, end=len(buf) if end is None else end)
+        finally:
+            i2c.unlock()
+        self.writes += 1
+
+    def dump(self, out=print):
+        out(f"display: {self.writes} I2C writes, {self.sent} data bytes")
@@ -0,0 +1,165 @@
+# trace-analyze.py
+# Reads a keystroke trace (keytrace.py; TRACE in c5k-left.py) copied off
+# CIRCUITPY, rebuilds every chord's timeline and flags the suspicious ones:
+#
+#   wrong   the chord sent isn't the most keys that were down together
+#           before the first release (a staggered press resolved early)
+#   eaten   keys went down and up and nothing was sent
+#
+#   python3 trace-analyze.py trace.bin
+#   python3 trace-analyze.py trace.bin --limit 0      # summary only
+#
+# The file is decoded as a stream and only the chord in progress is kept,
+# so multi-hour traces need no more memory than short ones.
+
+import argparse
+
+import keytrace
+from chord_tables import THUMB, mask_combo
+from latency_stats import Histogram
+
+MAX_EDGES = 32   # a chord's timeline is cut off after this many edges
+SILENT_LAYERS = (4,)   # layer-4 chords arm a modifier and send nothing
+
+
+def _names():
+    """Code -> name per layer kind, where adafruit_hid is installed."""
+    try:
+        from adafruit_hid.keycode import Keycode
+        from adafruit_hid.consumer_control_code import ConsumerControlCode
+    except ImportError:
+        return {}, {}
+    keys = {getattr(Keycode, n): n for n in dir(Keycode) if n.isupper()}
+    media = {getattr(ConsumerControlCode, n): n
+             for n in dir(ConsumerControlCode) if n.isupper()}
+    return keys, media
+
+
+class Chord:
+    __slots__ = ("start", "layer", "edges", "peak", "released", "actions")
+
+    def __init__(self, t, layer, mask):
+        self.start    = t
+        self.layer    = layer
+        self.edges    = [(t, mask)]
+        self.peak     = mask      # keys down together before the first release
+        self.released = False
+        self.actions  = []        # (t, layer, mask, code)
+
+
+def chords(stream, report):
+    """Group trace records into chords; report(kind, record) gets the
+    layer switches, marks and GAPs on the way.  The engine logs a release
+    before what it sends on it, so a chord is only yielded at the next edge."""
+    layer = 1
+    prev = 0
+    chord = None
+    done = None     # all keys up, but its actions may still follow
+    for t, kind, a, b, c in stream:
+        if kind == keytrace.EDGE:
+            if done:
+                yield done
+                done = None
+            mask = a
+            if not prev and mask:
+                chord = Chord(t, layer, mask)
+            elif chord:
+                if len(chord.edges) < MAX_EDGES:
+                    chord.edges.append((t, mask))
+                if not chord.released:
+                    if mask & prev == prev:
+                        chord.peak = mask
+                    else:
+                        chord.released = True
+                if not mask:
+                    done, chord = chord, None
+            prev = mask
+        elif kind == keytrace.ACTION:
+            if chord or done:
+                (chord or done).actions.append((t, a, b, c))
+        elif kind == keytrace.LAYER:
+            # thumb taps, and the engine's own drop from layer 4 to 1 once
+            # a one-shot shortcut is let go
+            layer = a
+            report("layer", (t, a))
+        elif kind == keytrace.MARK:
+            if a == keytrace.SESSION:
+                if done:
+                    yield done
+                prev, chord, done, layer = 0, None, None, 1
+            report("mark", (t, a, b))
+    if done:
+        yield done
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("path")
+    ap.add_argument("--limit", type=int, default=50,
+                    help="flagged chords to print (0: summary only)")
+    args = ap.parse_args()
+
+    keys, media = _names()
+
+    def name(layer, code):
+        table = media if layer == 6 else keys
+        return table.get(code, str(code))
+
+    counts = {"chords": 0, "actions": 0, "wrong": 0, "eaten": 0,
+              "sessions": 0, "lost": 0, "layer switches": 0}
+    spread = Histogram("press spread")     # first press -> all keys of the chord down
+    end = [0.0]
+    printed = 0
+
+    def report(kind, rec):
+        end[0] = max(end[0], rec[0])
+        if kind == "layer":
+            counts["layer switches"] += 1
+        elif rec[1] == keytrace.SESSION:
+            counts["sessions"] += 1
+        elif rec[1] == keytrace.GAP:
+            counts["lost"] += rec[2]
+            print(f"{rec[0]:10.3f}s  gap: {rec[2]} records lost (buffer full)")
+
+    with open(args.path, "rb") as f:
+        for ch in chords(keytrace.records(f), report):
+            end[0] = ch.edges[-1][0]
+            counts["chords"] += 1
+            counts["actions"] += len(ch.actions)
+            if ch.peak == THUMB:
+                continue                         # layer tap
+            peak_at = next(t for t, m in ch.edges if m == ch.peak)
+            spread.record(peak_at - ch.start)
+            if not ch.actions:
+                if ch.layer in SILENT_LAYERS:
+                    continue
+                flag = "eaten"
+            elif ch.actions[0][2] != ch.peak:
+                flag = "wrong"
+            else:
+                continue
+            counts[flag] += 1
+            if printed >= args.limit:
+                continue
+            printed += 1
+            timeline = " ".join(f"+{(t - ch.start) * 1000:.0f}:{mask_combo(m)}"
+                                for t, m in ch.edges)
+            sent = ", ".join(f"{mask_combo(m)}={name(l, c)} at "
+                             f"+{(t - ch.start) * 1000:.0f}ms"
+                             for t, l, m, c in ch.actions) or "nothing"
+            print(f"{ch.start:10.3f}s  {flag:5} L{ch.layer} held {mask_combo(ch.peak)}"
+                  f" ({bin(ch.peak).count('1')} keys), sent {sent}\n"
+                  f"{'':13}{timeline}")
+
+    print(f"\n{counts['sessions']} session(s), {end[0]:.0f} s of trace, "
+          f"{counts['chords']} chords, {counts['actions']} actions, "
+          f"{counts['layer switches']} layer switches")
+    n = max(1, counts["chords"])
+    print(f"wrong chord: {counts['wrong']} ({100 * counts['wrong'] / n:.2f}%)  "
+          f"eaten: {counts['eaten']} ({100 * counts['eaten'] / n:.2f}%)  "
+          f"records lost: {counts['lost']}")
+    spread.dump()
+
+
+if __name__ == "__main__":
+    main()
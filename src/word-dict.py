@@ -0,0 +1,72 @@
+# word-dict.py
+# Packs a word-layer dictionary (word_dict.py format) for CIRCUITPY and
+# reports what it costs.
+#
+#   python3 word-dict.py words.txt -o words.bin   # then copy words.bin over
+#   python3 word-dict.py words.bin --list         # strokes -> text
+#
+# Briefs that are also the start of a longer brief are listed: those wait
+# for the next stroke (or WORD_TIMEOUT) before they type.
+
+import argparse
+
+import word_dict
+from chord_tables import mask_combo
+
+
+def stroke_names():
+    names = {m: c for c, m in word_dict.letter_masks().items()}
+    return lambda m: names.get(m) or "[" + "".join(map(str, mask_combo(m))) + "]"
+
+
+def keys_text(keys):
+    back = {v: k for k, v in word_dict._keymap().items()}
+    return "".join(back.get(k, "?") for k in keys)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("source", help="dictionary .txt or packed .bin")
+    ap.add_argument("-o", "--output", help="write the packed .bin here")
+    ap.add_argument("--list", action="store_true", help="print every entry")
+    args = ap.parse_args()
+
+    trie = word_dict.load(args.source)
+    if trie is None:
+        raise SystemExit(f"can't read {args.source}")
+    name = stroke_names()
+    entries = [("".join(name(m) for m in strokes), keys_text(keys))
+               for strokes, keys in trie.entries()]
+
+    blob = trie.blob
+    nodes = 0
+    stack = [word_dict.ROOT]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        i = node + 2 + blob[node + 1]
+        for _ in range(blob[node]):
+            stack.append(blob[i + 1] | (blob[i + 2] << 8))
+            i += 3
+    text = sum(len(t) for _, t in entries)
+    print(f"{len(entries)} entries, {nodes} nodes, {len(blob)} bytes "
+          f"({text} of them text)")
+
+    briefs = {s for s, _ in entries}
+    waits = sorted(s for s in briefs
+                   if any(o != s and o.startswith(s) for o in briefs))
+    if waits:
+        print("prefix briefs (wait for the next stroke):", " ".join(waits))
+
+    if args.list:
+        for strokes, t in entries:
+            print(f"{strokes:10} {t}")
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(blob)
+        print("wrote", args.output)
+
+
+if __name__ == "__main__":
+    main()
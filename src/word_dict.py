@@ -0,0 +1,314 @@
+# word_dict.py
+# Word layer: short sequences of chords ("strokes") look up whole words in a
+# dictionary and type them in one burst, steno style.
+#
+# The dictionary source is a text file, one entry per line:
+#
+#     th      the
+#     a[023]  a lot
+#
+# The first field is the stroke sequence.  Each letter is one stroke, namely
+# that letter's layer-1 chord ("th" == the T chord, then the H chord).
+# Bracketed key digits spell a stroke by its keys ([023] == keys 0, 2 and 3).
+# The rest of the line is the text to type.
+#
+# pack() turns the entries into one packed trie, a bytes blob that WordTrie
+# walks in place, so a loaded dictionary costs its file size in RAM and no
+# per-word objects.  word-dict.py does the packing on a desktop; load() will
+# also pack a .txt at boot for small dictionaries.
+#
+#   header  b"C5W\x01"
+#   node    [n children][text length][text ...][mask, offset lo, offset hi] * n
+#
+# The text bytes are HID keycodes, with 0x80 meaning shift.  Children are
+# sorted by mask, and offsets are absolute, so a blob can be at most 64 KiB.
+
+from adafruit_hid.keycode import Keycode
+
+from chord_tables import THUMB, combo_mask
+
+MAGIC       = b"C5W\x01"
+ROOT        = len(MAGIC)
+MAX_STROKES = 8       # longest stroke sequence in a dictionary
+MAX_TEXT    = 255
+SHIFT       = 0x80
+
+
+# ─── Text <-> keycodes (US layout) ───────────────────────────────────
+def _keymap():
+    m = {" ": Keycode.SPACE, "\t": Keycode.TAB, "\n": Keycode.ENTER}
+    for i in range(26):
+        m[chr(ord("a") + i)] = Keycode.A + i
+        m[chr(ord("A") + i)] = (Keycode.A + i) | SHIFT
+    for i, c in enumerate("1234567890"):
+        m[c] = Keycode.ONE + i
+    for i, c in enumerate("!@#$%^&*()"):
+        m[c] = (Keycode.ONE + i) | SHIFT
+    for plain, shifted, code in (
+        ("-", "_", Keycode.MINUS),
+        ("=", "+", Keycode.EQUALS),
+        ("[", "{", Keycode.LEFT_BRACKET),
+        ("]", "}", Keycode.RIGHT_BRACKET),
+        ("\\", "|", Keycode.BACKSLASH),
+        (";", ":", Keycode.SEMICOLON),
+        ("'", '"', Keycode.QUOTE),
+        ("`", "~", Keycode.GRAVE_ACCENT),
+        (",", "<", Keycode.COMMA),
+        (".", ">", Keycode.PERIOD),
+        ("/", "?", Keycode.FORWARD_SLASH),
+    ):
+        m[plain]   = code
+        m[shifted] = code | SHIFT
+    return m
+
+
+def text_keys(text):
+    """Text -> packed keycode bytes; ValueError for untypeable characters."""
+    keymap = _keymap()
+    try:
+        return bytes(keymap[c] for c in text)
+    except KeyError as e:
+        raise ValueError(f"can't type {e.args[0]!r}") from None
+
+
+def letter_masks():
+    """Letter -> its layer-1 chord mask."""
+    import chords_config   # only when parsing; boot may not load the config
+    out = {}
+    for combo, code in chords_config.alpha.items():
+        if Keycode.A <= code <= Keycode.Z:
+            out[chr(ord("a") + code - Keycode.A)] = combo_mask(combo)
+    return out
+
+
+# ─── Dictionary source ───────────────────────────────────────────────
+def parse_strokes(field, letters):
+    strokes = []
+    i = 0
+    while i < len(field):
+        c = field[i]
+        if c == "[":
+            j = field.find("]", i)
+            if j < 0:
+                raise ValueError(f"unclosed '[' in {field!r}")
+            keys = field[i + 1:j]
+            if not keys.isdigit():
+                raise ValueError(f"bad stroke [{keys}] in {field!r}")
+            mask = combo_mask(tuple(int(k) for k in keys))
+            i = j + 1
+        else:
+            mask = letters.get(c.lower())
+            if mask is None:
+                raise ValueError(f"no layer-1 chord types {c!r}")
+            i += 1
+        if mask == THUMB:
+            raise ValueError("the thumb alone is a layer tap, not a stroke")
+        strokes.append(mask)
+    if not 0 < len(strokes) <= MAX_STROKES:
+        raise ValueError(f"{field!r}: 1..{MAX_STROKES} strokes per entry")
+    return bytes(strokes)
+
+
+def parse(lines):
+    """Dictionary text lines -> [(strokes, text)]."""
+    letters = letter_masks()
+    entries = []
+    for n, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        parts = line.split(None, 1)
+        if len(parts) < 2:
+            raise ValueError(f"line {n}: expected '<strokes> <text>'")
+        try:
+            entries.append((parse_strokes(parts[0], letters), parts[1].strip()))
+        except ValueError as e:
+            raise ValueError(f"line {n}: {e}") from None
+    return entries
+
+
+# ─── Packing ─────────────────────────────────────────────────────────
+def pack(entries):
+    """[(strokes, text)] -> packed trie blob."""
+    root = [None, {}]   # [text keycodes, {mask: child}]
+    for strokes, text in entries:
+        node = root
+        for m in strokes:
+            node = node[1].setdefault(m, [None, {}])
+        if node[0] is not None:
+            raise ValueError(f"strokes for {text!r} already used")
+        keys = text_keys(text)
+        if not 0 < len(keys) <= MAX_TEXT:
+            raise ValueError(f"{text!r}: 1..{MAX_TEXT} characters per entry")
+        node[0] = keys
+
+    # Lay the nodes out depth-first, then write them with known offsets.
+    order = []
+    offsets = {}
+    size = ROOT
+
+    def place(node):
+        nonlocal size
+        offsets[id(node)] = size
+        order.append(node)
+        size += 2 + len(node[0] or b"") + 3 * len(node[1])
+        for m in sorted(node[1]):
+            place(node[1][m])
+
+    place(root)
+    if size > 0x10000:
+        raise ValueError(f"dictionary packs to {size} bytes (max 65536)")
+
+    blob = bytearray(MAGIC)
+    for node in order:
+        text = node[0] or b""
+        blob.append(len(node[1]))
+        blob.append(len(text))
+        blob += text
+        for m in sorted(node[1]):
+            off = offsets[id(node[1][m])]
+            blob += bytes((m, off & 0xFF, off >> 8))
+    return bytes(blob)
+
+
+class WordTrie:
+    """Read-only view of a packed dictionary.  Nodes are blob offsets; 0
+    means no such node."""
+
+    def __init__(self, blob):
+        if blob[:ROOT] != MAGIC:
+            raise ValueError("not a packed word dictionary")
+        self.blob = blob
+
+    def child(self, node, mask):
+        blob = self.blob
+        i = node + 2 + blob[node + 1]
+        for _ in range(blob[node]):
+            m = blob[i]
+            if m == mask:
+                return blob[i + 1] | (blob[i + 2] << 8)
+            if m > mask:
+                break
+            i += 3
+        return 0
+
+    def has_text(self, node):
+        return self.blob[node + 1] != 0
+
+    def has_children(self, node):
+        return self.blob[node] != 0
+
+    def entries(self, node=ROOT, prefix=b""):
+        """Yield (strokes, keycodes) for every word; host tools only."""
+        blob = self.blob
+        n = blob[node + 1]
+        if n:
+            yield prefix, blob[node + 2:node + 2 + n]
+        i = node + 2 + n
+        for _ in range(blob[node]):
+            off = blob[i + 1] | (blob[i + 2] << 8)
+            yield from self.entries(off, prefix + bytes((blob[i],)))
+            i += 3
+
+
+def load(path):
+    """WordTrie from a packed .bin or a source .txt, or None if missing or
+    unreadable (the keyboard then boots without the word layer)."""
+    try:
+        if path.endswith(".txt"):
+            with open(path) as f:
+                return WordTrie(pack(parse(f)))
+        with open(path, "rb") as f:
+            return WordTrie(f.read())
+    except OSError:
+        return None
+    except ValueError as e:
+        print(f"{path}: {e}; no word layer")
+        return None
+
+
+# ─── Stroke translation ──────────────────────────────────────────────
+class Translator:
+    """Turns strokes into typing.  A stroke that extends a dictionary path
+    is buffered.  A stroke that can't extend it commits the longest word
+    found so far, and the leftover strokes are translated again.  Strokes
+    that start no word type their layer-1 letter (`raw`, indexed by mask).
+    A word is followed by a space when `space` is set."""
+
+    def __init__(self, trie, keyboard, raw, space=True):
+        self.trie     = trie
+        self.keyboard = keyboard
+        self.raw      = raw
+        self.space    = space
+        self.strokes  = bytearray(MAX_STROKES)
+        self.count    = 0
+        self.node     = ROOT
+        self.match    = 0     # deepest buffered node with text
+        self.match_n  = 0     # strokes up to that node
+
+    @property
+    def pending(self):
+        return self.count > 0
+
+    def _reset(self):
+        self.count   = 0
+        self.node    = ROOT
+        self.match   = 0
+        self.match_n = 0
+
+    def stroke(self, mask):
+        trie = self.trie
+        while True:
+            child = trie.child(self.node, mask) if self.count < MAX_STROKES else 0
+            if child:
+                self.strokes[self.count] = mask
+                self.count += 1
+                self.node = child
+                if trie.has_text(child):
+                    self.match   = child
+                    self.match_n = self.count
+                if not trie.has_children(child):
+                    self.flush()
+                return
+            if not self.count:
+                self._type_raw(mask)
+                return
+            self._commit()
+
+    def flush(self):
+        """Commit whatever is buffered (timeout, layer change)."""
+        while self.count:
+            self._commit()
+
+    def _commit(self):
+        n = self.match_n
+        if n:
+            self._type_word(self.match)
+        else:
+            n = 1
+            self._type_raw(self.strokes[0])
+        rest = self.strokes[n:self.count]
+        self._reset()
+        for m in rest:
+            self.stroke(m)
+
+    def _type_word(self, node):
+        keyboard = self.keyboard
+        blob = self.trie.blob
+        start = node + 2
+        for i in range(start, start + blob[node + 1]):
+            k = blob[i]
+            if k & SHIFT:
+                keyboard.press(Keycode.LEFT_SHIFT, k & ~SHIFT)
+            else:
+                keyboard.press(k)
+            keyboard.release_all()
+        if self.space:
+            keyboard.press(Keycode.SPACE)
+            keyboard.release_all()
+
+    def _type_raw(self, mask):
+        code = self.raw[mask]
+        if code:
+            self.keyboard.press(code)
+            self.keyboard.release_all()